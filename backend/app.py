@@ -1,12 +1,29 @@
+import logging
+from contextlib import asynccontextmanager
+
 from starlette.applications import Starlette
 from starlette.middleware.cors import CORSMiddleware
 from starlette.responses import JSONResponse
 from starlette.routing import Route, WebSocketRoute
 
+from archive_service import archive, get_game_handler, recent_games_handler
+from bot_service import bot_metrics_handler
+from history_service import get_moves_handler, get_state_at_handler
+from lobby_service import list_rooms_handler
+from matchmaking_service import (
+    cancel_handler,
+    enqueue_handler,
+    get_ticket_handler,
+    matchmaker,
+    matchmaking_metrics_handler,
+)
+from room_actor import shutdown_room_actors
 from room_service import create_room, join_room, leave_room
 from swagger import openapi, swagger_ui
 from user_service import create_user, get_user_handler
-from ws_service import websocket_endpoint
+from ws_service import restore_turn_timers, room_hub, room_hub_metrics_handler, turn_timers, websocket_endpoint
+
+logger = logging.getLogger(__name__)
 
 
 async def homepage(request):
@@ -19,19 +36,45 @@ async def homepage(request):
     """
     return JSONResponse({"status": "ok"})
 
+
+@asynccontextmanager
+async def lifespan(app):
+    try:
+        await restore_turn_timers()
+    except Exception:
+        logger.exception("Could not restore turn deadlines")
+    matchmaker.start()
+    yield
+    await matchmaker.stop()
+    await turn_timers.stop()
+    await room_hub.close()
+    await shutdown_room_actors()
+    await archive.stop()
+
 routes = [
     Route("/", homepage),
     Route("/openapi.json", openapi),
     Route("/docs", swagger_ui),
     Route("/users", create_user, methods=["POST"]),
     Route("/users/{user_id:str}", get_user_handler, methods=["GET"]),
+    Route("/users/{user_id:str}/games", recent_games_handler, methods=["GET"]),
+    Route("/games/{game_id:str}", get_game_handler, methods=["GET"]),
+    Route("/rooms", list_rooms_handler, methods=["GET"]),
     Route("/rooms", create_room, methods=["POST"]),
     Route("/rooms/{code:str}/join", join_room, methods=["POST"]),
     Route("/rooms/{code:str}/leave", leave_room, methods=["POST"]),
+    Route("/rooms/{code:str}/moves", get_moves_handler, methods=["GET"]),
+    Route("/rooms/{code:str}/moves/{index:int}", get_state_at_handler, methods=["GET"]),
+    Route("/matchmaking", enqueue_handler, methods=["POST"]),
+    Route("/matchmaking/{user_id:str}", get_ticket_handler, methods=["GET"]),
+    Route("/matchmaking/{user_id:str}", cancel_handler, methods=["DELETE"]),
+    Route("/metrics/bots", bot_metrics_handler, methods=["GET"]),
+    Route("/metrics/matchmaking", matchmaking_metrics_handler, methods=["GET"]),
+    Route("/metrics/room-hub", room_hub_metrics_handler, methods=["GET"]),
     WebSocketRoute("/ws", websocket_endpoint),
 ]
 
-app = Starlette(routes=routes)
+app = Starlette(routes=routes, lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -0,0 +1,333 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from game_service import end_game_score_deltas
+from history_service import replay_entries
+from redis_store import get_redis, room_deal_key, room_moves_key, room_players_key
+from room_service import deserialize_players
+from schemas import GameState
+
+# Finished games go to an embedded SQLite file so they outlive the room's Redis keys.
+# Turn handling only queues a record; ARCHIVE_FLUSH_SECONDS later everything queued
+# by then is written in one transaction per ARCHIVE_BATCH_SIZE games, in a worker
+# thread. When the queue is full, records are dropped with a warning rather than
+# slowing the game down.
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "1") != "0"
+ARCHIVE_PATH = os.getenv("ARCHIVE_PATH", "archive.sqlite3")
+ARCHIVE_FLUSH_SECONDS = float(os.getenv("ARCHIVE_FLUSH_SECONDS", "0.5"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_QUEUE_SIZE = int(os.getenv("ARCHIVE_QUEUE_SIZE", "10000"))
+RECENT_GAMES_LIMIT = 100
+
+logger = logging.getLogger(__name__)
+
+# Times are epoch milliseconds. The deal seed is a 64-bit unsigned value, more than
+# an SQLite INTEGER holds, so it is kept as text.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id TEXT PRIMARY KEY,
+    room_code TEXT NOT NULL,
+    room_id TEXT NOT NULL,
+    deal_seed TEXT,
+    started_at INTEGER,
+    finished_at INTEGER NOT NULL,
+    winner_id TEXT,
+    move_count INTEGER NOT NULL,
+    moves TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS game_players (
+    game_id TEXT NOT NULL REFERENCES games (id),
+    seat INTEGER NOT NULL,
+    player_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    is_bot INTEGER NOT NULL,
+    cards_left INTEGER NOT NULL,
+    score_delta INTEGER,
+    finished_at INTEGER NOT NULL,
+    PRIMARY KEY (game_id, seat)
+);
+CREATE INDEX IF NOT EXISTS game_players_user_finished ON game_players (user_id, finished_at DESC);
+CREATE INDEX IF NOT EXISTS games_finished ON games (finished_at);
+"""
+
+ArchiveRecord = Dict[str, Any]
+
+
+class GameArchive:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._pending: List[ArchiveRecord] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._connection: Optional[sqlite3.Connection] = None
+        self._write_lock = threading.Lock()
+
+    def submit(self, record: ArchiveRecord) -> None:
+        if len(self._pending) >= ARCHIVE_QUEUE_SIZE:
+            logger.warning("Game archive queue is full; dropping game from room %s", record["code"])
+            return
+        self._pending.append(record)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(ARCHIVE_FLUSH_SECONDS)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Could not write the game archive, retrying")
+            if self._flush_task is None:
+                self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending[:ARCHIVE_BATCH_SIZE], self._pending[ARCHIVE_BATCH_SIZE:]
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except BaseException:
+                self._pending[:0] = batch
+                raise
+
+    async def stop(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        with self._write_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(_SCHEMA)
+        return connection
+
+    def _write(self, batch: List[ArchiveRecord]) -> None:
+        # Runs in a worker thread.
+        games, players = [], []
+        for record in batch:
+            try:
+                game, seats = _game_rows(record)
+            except Exception:
+                logger.exception("Could not build archive rows for room %s", record["code"])
+                continue
+            games.append(game)
+            players.extend(seats)
+        with self._write_lock:
+            if self._connection is None:
+                self._connection = self._connect()
+            with self._connection:
+                self._connection.executemany("INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", games)
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO game_players VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", players
+                )
+
+    async def recent_games(self, user_id: str, limit: int, before: Optional[int] = None) -> List[dict]:
+        return await asyncio.to_thread(self._recent_games, user_id, limit, before)
+
+    async def game(self, game_id: str) -> Optional[dict]:
+        return await asyncio.to_thread(self._game, game_id)
+
+    def _read(self) -> sqlite3.Connection:
+        # Readers use their own short-lived connection; WAL lets them run alongside a write.
+        connection = self._connect()
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def _recent_games(self, user_id: str, limit: int, before: Optional[int]) -> List[dict]:
+        connection = self._read()
+        try:
+            rows = connection.execute(
+                "SELECT g.id, g.room_code, g.started_at, g.finished_at, g.winner_id, g.move_count"
+                " FROM game_players p JOIN games g ON g.id = p.game_id"
+                " WHERE p.user_id = ? AND p.finished_at < ? ORDER BY p.finished_at DESC LIMIT ?",
+                (user_id, before if before is not None else 2**62, limit),
+            ).fetchall()
+            games = {row["id"]: {**dict(row), "players": []} for row in rows}
+            if games:
+                placeholders = ",".join("?" * len(games))
+                for row in connection.execute(
+                    f"SELECT * FROM game_players WHERE game_id IN ({placeholders}) ORDER BY seat", list(games)
+                ):
+                    games[row["game_id"]]["players"].append(_player_json(row))
+            return list(games.values())
+        finally:
+            connection.close()
+
+    def _game(self, game_id: str) -> Optional[dict]:
+        connection = self._read()
+        try:
+            row = connection.execute("SELECT * FROM games WHERE id = ?", (game_id,)).fetchone()
+            if row is None:
+                return None
+            game = dict(row)
+            game["moves"] = json.loads(game["moves"])
+            game["players"] = [
+                _player_json(player)
+                for player in connection.execute(
+                    "SELECT * FROM game_players WHERE game_id = ? ORDER BY seat", (game_id,)
+                )
+            ]
+            return game
+        finally:
+            connection.close()
+
+
+archive = GameArchive(ARCHIVE_PATH)
+
+
+def _player_json(row: sqlite3.Row) -> dict:
+    player = {key: row[key] for key in ("player_id", "user_id", "name", "seat", "cards_left", "score_delta")}
+    player["is_bot"] = bool(row["is_bot"])
+    return player
+
+
+def _game_rows(record: ArchiveRecord) -> Tuple[tuple, List[tuple]]:
+    state: GameState = record["state"]
+    entries = record["entries"]
+    players = deserialize_players(record["players_raw"])
+    deal = json.loads(record["deal_raw"]) if record["deal_raw"] else None
+
+    times = {fields["type"]: int(fields["ts"]) for _, fields in entries if fields["type"] in ("start", "end")}
+    finished_at = times.get("end", record["archived_at"])
+    seats = {player_id: seat for seat, player_id in enumerate(state.players_order)}
+    moves = [
+        [fields["type"], seats.get(UUID(fields["player"])), fields.get("cards"), int(fields["ts"])]
+        for _, fields in entries
+    ]
+
+    # Game points: chops replayed from the move log plus the end-of-game ranking.
+    score_deltas: Optional[Dict[UUID, int]] = None
+    if entries and "state" in entries[0][1] and state.winner_id is not None:
+        _, _, score_deltas = replay_entries(entries)
+        for player_id, delta in end_game_score_deltas(players, state.winner_id).items():
+            score_deltas[player_id] = score_deltas.get(player_id, 0) + delta
+
+    game = (
+        record["game_id"],
+        record["code"],
+        str(state.room_id),
+        str(deal["seed"]) if deal else None,
+        times.get("start"),
+        finished_at,
+        str(state.winner_id) if state.winner_id is not None else None,
+        state.move_count,
+        json.dumps(moves, separators=(",", ":")),
+    )
+    rows = [
+        (
+            record["game_id"],
+            player.seat,
+            str(player.id),
+            str(player.user_id),
+            player.name,
+            int(player.is_bot),
+            player.hand_count,
+            score_deltas.get(player.id, 0) if score_deltas is not None else None,
+            finished_at,
+        )
+        for player in players
+        if player.id in seats
+    ]
+    return game, rows
+
+
+async def archive_finished_game(code: str, state: GameState) -> None:
+    # One read pipeline on the game's path; building the rows happens in the writer.
+    if not ARCHIVE_ENABLED:
+        return
+    code = code.upper()
+    client = await get_redis()
+    pipeline = client.pipeline(transaction=False)
+    pipeline.get(room_deal_key(code))
+    pipeline.xrange(room_moves_key(code))
+    pipeline.hgetall(room_players_key(code))
+    deal_raw, entries, players_raw = await pipeline.execute()
+    archive.submit(
+        {
+            "game_id": str(uuid4()),
+            "code": code,
+            "state": state,
+            "deal_raw": deal_raw,
+            "entries": entries,
+            "players_raw": players_raw,
+            "archived_at": int(time.time() * 1000),
+        }
+    )
+
+
+async def recent_games_handler(request: Request):
+    """
+    ---
+    summary: A user's most recently finished games
+    parameters:
+      - in: path
+        name: user_id
+        required: true
+        schema:
+          type: string
+      - in: query
+        name: limit
+        required: false
+        schema:
+          type: integer
+          default: 20
+      - in: query
+        name: before
+        required: false
+        description: Only games finished before this time (epoch milliseconds), for paging
+        schema:
+          type: integer
+    responses:
+      200:
+        description: OK
+      400:
+        description: Validation error
+    """
+    try:
+        user_id = str(UUID(request.path_params["user_id"]))
+        limit = min(int(request.query_params.get("limit", 20)), RECENT_GAMES_LIMIT)
+        before = request.query_params.get("before")
+        before = int(before) if before is not None else None
+    except ValueError:
+        return JSONResponse({"error": "Invalid user_id, limit or before"}, status_code=400)
+    if limit < 1:
+        return JSONResponse({"error": "Invalid user_id, limit or before"}, status_code=400)
+    games = await archive.recent_games(user_id, limit, before)
+    return JSONResponse({"games": games})
+
+
+async def get_game_handler(request: Request):
+    """
+    ---
+    summary: An archived game with its players and moves
+    parameters:
+      - in: path
+        name: game_id
+        required: true
+        schema:
+          type: string
+    responses:
+      200:
+        description: OK
+      404:
+        description: Game not found
+    """
+    game = await archive.game(request.path_params["game_id"])
+    if game is None:
+        return JSONResponse({"error": "Game not found"}, status_code=404)
+    return JSONResponse({"game": game})
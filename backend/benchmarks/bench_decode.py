@@ -0,0 +1,156 @@
+"""CPU cost of the Redis-read side of ``play_turn`` and ``get_room``: full pydantic
+validation (what the services did before) vs. the trusted decoders in
+``storage_codec``, with a cProfile breakdown of the validated path.
+
+Run from ``backend/``: ``python -m benchmarks.bench_decode``.
+"""
+
+import argparse
+import cProfile
+import json
+import pstats
+import random
+import timeit
+from datetime import datetime
+from typing import Callable, Dict, List
+from uuid import uuid4
+
+from card_mask import cards_to_mask, mask_to_cards
+from game_engine import create_deck, deal_hands
+from game_service import resolve_play
+from schemas import Card, ComboType, GameState, GameStatus, LastPlay, Player, Room, RoomStatus
+from storage_codec import (
+    decode_hand,
+    decode_player,
+    decode_room,
+    decode_state,
+    encode_hand,
+    encode_state,
+)
+
+
+def _validated_state(raw: str) -> GameState:
+    # The previous decode_state: parse the record into plain values, then model_validate.
+    _, room_id, status, order_raw, current, last_raw, pass_count, winner, flags, special_raw, moves, _ = raw.split("|")
+    order = order_raw.split(",")
+    last_play = None
+    if last_raw:
+        combo_type, mask, by_player = last_raw.split(".")
+        last_play = {
+            "type": list(ComboType)[int(combo_type)],
+            "cards": mask_to_cards(int(mask, 16)),
+            "by_player_id": order[int(by_player)],
+        }
+    return GameState.model_validate(
+        {
+            "room_id": room_id,
+            "status": list(GameStatus)[int(status)],
+            "players_order": order,
+            "current_turn": order[int(current)],
+            "last_play": last_play,
+            "pass_count": int(pass_count),
+            "winner_id": order[int(winner)] if winner else None,
+            "first_game": bool(int(flags) & 1),
+            "first_turn_required": bool(int(flags) & 2),
+            "move_count": int(moves),
+        }
+    )
+
+
+def _validated_room(meta_raw: str, raw_players: List[str]) -> Room:
+    players = [Player.model_validate(json.loads(raw)) for raw in raw_players]
+    return Room.model_validate({**json.loads(meta_raw), "players": players})
+
+
+def _trusted_room(meta_raw: str, raw_players: List[str]) -> Room:
+    return decode_room(json.loads(meta_raw), [decode_player(raw) for raw in raw_players])
+
+
+def _fixture(seed: int) -> Dict[str, object]:
+    rng = random.Random(seed)
+    deck = create_deck()
+    rng.shuffle(deck)
+    players = [Player(id=uuid4(), user_id=uuid4(), name=f"P{seat}", seat=seat, hand_count=13) for seat in range(4)]
+    order = [player.id for player in players]
+    hand_mask = cards_to_mask(deal_hands(order, deck)[order[1]])
+    lead = cards_to_mask(deal_hands(order, deck)[order[0]])
+    lead &= -lead
+    state = GameState(
+        room_id=uuid4(),
+        status=GameStatus.playing,
+        players_order=order,
+        current_turn=order[1],
+        last_play=LastPlay(type=ComboType.single, cards=mask_to_cards(lead), by_player_id=order[0]),
+    )
+    room = Room(
+        id=uuid4(),
+        code="ABC234",
+        host_id=order[0],
+        host_user_id=players[0].user_id,
+        status=RoomStatus.in_game,
+        created_at=datetime.utcnow(),
+    )
+    beating = next((1 << index for index in range(52) if hand_mask >> index & 1 and 1 << index > lead), hand_mask)
+    return {
+        "player_id": order[1],
+        "raw_state": encode_state(state),
+        "raw_hand": encode_hand(hand_mask),
+        "payload": [card.model_dump(mode="json") for card in mask_to_cards(beating)],
+        "raw_players": [json.dumps(player.model_dump(mode="json")) for player in players],
+        "raw_meta": json.dumps(room.model_dump(mode="json", exclude={"players"})),
+    }
+
+
+def _play_turn(fixture: Dict[str, object], decode: Callable[[str], GameState]) -> Callable[[], object]:
+    def run():
+        cards = [Card.model_validate(item) for item in fixture["payload"]]
+        state = decode(fixture["raw_state"])
+        remaining, _ = resolve_play(
+            state, fixture["player_id"], decode_hand(fixture["raw_hand"]), cards, cards_to_mask(cards)
+        )
+        return encode_state(state), encode_hand(remaining)
+
+    return run
+
+
+def _validation_share(func: Callable[[], object], number: int) -> float:
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for _ in range(number):
+        func()
+    profiler.disable()
+    stats = pstats.Stats(profiler).stats
+    total = sum(entry[2] for entry in stats.values())
+    validating = sum(
+        entry[2] for (_, _, name), entry in stats.items() if "SchemaValidator" in name or "UUID" in name
+    )
+    return validating / total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    fixture = _fixture(args.seed)
+    cases = [
+        ("play_turn", _play_turn(fixture, _validated_state), _play_turn(fixture, decode_state)),
+        (
+            "get_room",
+            lambda: _validated_room(fixture["raw_meta"], fixture["raw_players"]),
+            lambda: _trusted_room(fixture["raw_meta"], fixture["raw_players"]),
+        ),
+    ]
+    for label, validated, trusted in cases:
+        validated_us = min(timeit.repeat(validated, number=args.number, repeat=9)) / args.number * 1e6
+        trusted_us = min(timeit.repeat(trusted, number=args.number, repeat=9)) / args.number * 1e6
+        share = _validation_share(validated, args.number)
+        print(
+            f"{label + ':':11s} validated {validated_us:6.2f} us ({share:5.1%} validating)  "
+            f"trusted {trusted_us:6.2f} us  ({validated_us / trusted_us:4.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
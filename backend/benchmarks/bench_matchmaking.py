@@ -0,0 +1,90 @@
+"""Quick join under synthetic load: users arrive at a steady rate, each asking for a
+random table size, while one or more matchers (standing in for backend instances)
+tick against the same Redis. Reports queue wait percentiles, users seated and rooms
+made per second, and checks that nobody was seated twice.
+
+Runs against fakeredis, so absolute numbers are CPU-bound; queue waits are dominated
+by the tick interval and by how often a table size fills up.
+
+Run from ``backend/``: ``python -m benchmarks.bench_matchmaking``.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from datetime import datetime
+from uuid import uuid4
+
+from fakeredis import FakeAsyncRedis
+
+import redis_store
+from matchmaking_service import TABLE_SIZES, Matchmaker, _wait_at, enqueue
+from redis_store import ROOMS_ACTIVE_KEY, USER_TTL_SECONDS, room_players_key, user_key
+from storage_codec import decode_players
+from user_service import User
+
+
+async def _arrivals(client: FakeAsyncRedis, rate: float, seconds: float) -> int:
+    arrived = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        due = int((time.perf_counter() - started) * rate)
+        pipeline = client.pipeline(transaction=False)
+        new_users = []
+        for index in range(arrived, due):
+            now = datetime.utcnow()
+            user = User(id=uuid4(), name=f"U{index}", created_at=now, last_joined_at=now)
+            pipeline.set(user_key(str(user.id)), json.dumps(user.model_dump(mode="json")), ex=USER_TTL_SECONDS)
+            new_users.append(str(user.id))
+        await pipeline.execute()
+        for user_id in new_users:
+            await enqueue(user_id, random.choice(TABLE_SIZES))
+        arrived = due
+        await asyncio.sleep(0.01)
+    return arrived
+
+
+async def _seated_twice(client: FakeAsyncRedis) -> int:
+    seats = Counter()
+    for code in await client.smembers(ROOMS_ACTIVE_KEY):
+        seats.update(player.user_id for player in decode_players(await client.hgetall(room_players_key(code))))
+    return sum(count - 1 for count in seats.values() if count > 1)
+
+
+async def _run(rate: float, seconds: float, instances: int, interval: float) -> None:
+    client = FakeAsyncRedis(decode_responses=True)
+    redis_store._redis = client
+    matchers = [Matchmaker(interval=interval) for _ in range(instances)]
+    for matcher in matchers:
+        matcher.start()
+    started = time.perf_counter()
+    arrived = await _arrivals(client, rate, seconds)
+    elapsed = time.perf_counter() - started
+    for matcher in matchers:
+        await matcher.stop()
+
+    matched = sum(matcher.matched for matcher in matchers)
+    rooms = sum(matcher.rooms_opened + matcher.rooms_filled for matcher in matchers)
+    waits = sorted(wait for matcher in matchers for wait in matcher._waits)
+    print(f"arrivals: {arrived} users at {rate:.0f}/s  matchers: {instances}  tick: {interval * 1000:.0f} ms")
+    print(f"seated:   {matched} users  {matched / elapsed:.0f} users/s  {rooms / elapsed:.0f} room joins/s")
+    p50, p95, p99 = (_wait_at(waits, fraction) * 1000 for fraction in (0.50, 0.95, 0.99))
+    print(f"wait:     p50 {p50:.0f} ms  p95 {p95:.0f} ms  p99 {p99:.0f} ms")
+    print(f"seated twice: {await _seated_twice(client)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=400.0)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--instances", type=int, default=2)
+    parser.add_argument("--interval", type=float, default=0.25)
+    args = parser.parse_args()
+    asyncio.run(_run(args.rate, args.seconds, args.instances, args.interval))
+
+
+if __name__ == "__main__":
+    main()
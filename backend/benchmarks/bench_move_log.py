@@ -0,0 +1,112 @@
+"""Per-turn overhead of the move log: whole ``play_turn``/``pass_turn`` calls against
+fakeredis with MOVE_LOG_ENABLED on and off, the Python-side cost of building the log
+entries, and how many bytes a game appends to its stream.
+
+The XADD runs inside the existing commit script, so the round trip count per turn is
+unchanged; against a real server the difference is the script's extra work only.
+
+Run from ``backend/``: ``python -m benchmarks.bench_move_log``.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import timeit
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from fakeredis import FakeAsyncRedis
+
+import game_service
+import move_log
+import redis_store
+from move_log import encode_entries, move_entries
+from redis_store import room_meta_key, room_moves_key, room_players_key
+from schemas import Player, Room, RoomStatus
+from storage_codec import encode_hand, encode_player, encode_player_fields
+
+CODE = "BENCH2"
+
+
+async def _seed_room(client: FakeAsyncRedis, players: int) -> None:
+    await client.flushall()
+    host = uuid4()
+    room = Room(
+        id=uuid4(),
+        code=CODE,
+        host_id=host,
+        host_user_id=uuid4(),
+        status=RoomStatus.waiting,
+        created_at=datetime.now(timezone.utc),
+    )
+    await client.set(room_meta_key(CODE), json.dumps(room.model_dump(mode="json", exclude={"players"})))
+    for seat in range(players):
+        player = Player(id=host if seat == 0 else uuid4(), user_id=uuid4(), name=f"p{seat}", seat=seat)
+        await client.hset(room_players_key(CODE), str(player.id), encode_player(player))
+        await client.hset(room_players_key(CODE), mapping=encode_player_fields([player]))
+
+
+async def _play_games(client: FakeAsyncRedis, games: int, players: int, seed: int) -> tuple:
+    rng = random.Random(seed)
+    turns = 0
+    elapsed = 0.0
+    log_bytes = 0
+    for _ in range(games):
+        await _seed_room(client, players)
+        state = await game_service.start_game(CODE)
+        while state.winner_id is None:
+            plays, can_pass = await game_service.get_legal_plays(CODE, state.current_turn)
+            started = time.perf_counter()
+            if can_pass and (not plays or rng.random() < 0.3):
+                state = await game_service.pass_turn(CODE, state.current_turn)
+            else:
+                cards = [card.model_dump(mode="json") for card in rng.choice(plays)]
+                state = await game_service.play_turn(CODE, state.current_turn, cards)
+            elapsed += time.perf_counter() - started
+            turns += 1
+        for entry_id, fields in await client.xrange(room_moves_key(CODE)):
+            log_bytes += len(entry_id) + sum(len(key) + len(value) for key, value in fields.items())
+    return turns, elapsed, log_bytes
+
+
+async def _run(games: int, players: int, seed: int) -> None:
+    client = FakeAsyncRedis(decode_responses=True)
+    redis_store._redis = client
+    results = {}
+    for enabled in (False, True):
+        move_log.MOVE_LOG_ENABLED = game_service.MOVE_LOG_ENABLED = enabled
+        await _play_games(client, 2, players, seed)  # warm up scripts and caches
+        results[enabled] = await _play_games(client, games, players, seed)
+
+    off = results[False][1] / results[False][0] * 1e6
+    turns, elapsed, log_bytes = results[True]
+    on = elapsed / turns * 1e6
+    print(f"turn (fakeredis):  log off {off:7.2f} us  on {on:7.2f} us  (+{on - off:.2f} us)")
+
+    state = await game_service.get_game_state(CODE)
+    state.winner_id = None
+    hands = {str(player_id): encode_hand(0x1F << seat) for seat, player_id in enumerate(state.players_order)}
+    player_id = state.players_order[0]
+    for label, move_count in (("plain", 1), ("snapshot", move_log.MOVE_LOG_SNAPSHOT_EVERY)):
+        state.move_count = move_count
+        seconds = min(
+            timeit.repeat(lambda: encode_entries(move_entries(state, player_id, 0x30, hands)), number=2000, repeat=5)
+        )
+        print(f"entry build:       {label:8s} {seconds / 2000 * 1e6:7.2f} us")
+    print(f"snapshot every:    {move_log.MOVE_LOG_SNAPSHOT_EVERY} moves")
+    print(f"log size:          {log_bytes / games:7.0f} bytes per game, {log_bytes / turns:.0f} per turn")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=30)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(_run(args.games, args.players, args.seed))
+
+
+if __name__ == "__main__":
+    main()
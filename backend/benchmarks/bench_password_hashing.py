@@ -0,0 +1,67 @@
+"""Event loop latency seen by other rooms during a burst of joins on protected rooms:
+scrypt checks run inline on the loop vs. on the bounded password thread pool.
+
+A ticker stands in for another room's WebSocket traffic: it asks to wake every few
+milliseconds and records how late each wake-up was. A join burst then verifies
+``--joins`` room passwords, as join_room does.
+
+Run from ``backend/``: ``python -m benchmarks.bench_password_hashing``.
+"""
+
+import argparse
+import asyncio
+import time
+from typing import List
+
+from passwords import hash_password_sync, verify_password, verify_password_sync
+
+TICK_SECONDS = 0.005
+
+
+async def _ticker(lateness: List[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        due = time.perf_counter() + TICK_SECONDS
+        await asyncio.sleep(TICK_SECONDS)
+        lateness.append(time.perf_counter() - due)
+
+
+async def _inline_join(password: str, stored: str) -> None:
+    verify_password_sync(password, stored)
+
+
+async def _pooled_join(password: str, stored: str) -> None:
+    await verify_password(password, stored)
+
+
+def _at(values: List[float], fraction: float) -> float:
+    return values[min(len(values) - 1, int(fraction * len(values)))] * 1000
+
+
+async def _run(joins: int) -> None:
+    stored = hash_password_sync("hunter2")
+    for label, join in (("inline", _inline_join), ("thread pool", _pooled_join)):
+        lateness: List[float] = []
+        stop = asyncio.Event()
+        ticker = asyncio.create_task(_ticker(lateness, stop))
+        await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        await asyncio.gather(*(join("hunter2", stored) for _ in range(joins)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await ticker
+        lateness.sort()
+        print(
+            f"{label:12s} {joins / elapsed:6.1f} joins/s  other rooms' wake-up lateness: "
+            f"p50 {_at(lateness, 0.50):6.1f} ms  p99 {_at(lateness, 0.99):6.1f} ms  max {lateness[-1] * 1000:6.1f} ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--joins", type=int, default=40)
+    args = parser.parse_args()
+    asyncio.run(_run(args.joins))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Room creation throughput with 100k live rooms: the old check-then-set loop (EXISTS
+until a free code turns up, then a write pipeline) vs. ``insert_room`` (a code from
+the pre-checked pool, claimed and written by one SET NX script call).
+
+Runs against fakeredis, so absolute numbers are CPU-bound; ``--rtt-ms`` adds a
+simulated network round trip to every command and pipeline to show what the round
+trip count per room is worth against a real server.
+
+Run from ``backend/``: ``python -m benchmarks.bench_room_codes``.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from fakeredis import FakeAsyncRedis
+from redis.asyncio.client import Pipeline
+
+import redis_store
+from redis_store import ROOM_TTL_SECONDS, ROOMS_ACTIVE_KEY, room_meta_key, room_players_key
+from room_codes import generate_room_code, room_codes
+from room_service import _player_mapping, insert_room
+from schemas import Player, Room
+
+
+class RoundTrips:
+    def __init__(self, client: FakeAsyncRedis, rtt: float) -> None:
+        self.count = 0
+        execute_command = client.execute_command
+        pipeline_execute = Pipeline.execute
+        counter = self
+
+        async def command(*args, **options):
+            counter.count += 1
+            if rtt:
+                await asyncio.sleep(rtt)
+            return await execute_command(*args, **options)
+
+        async def pipeline(self, *args, **kwargs):
+            counter.count += 1
+            if rtt:
+                await asyncio.sleep(rtt)
+            return await pipeline_execute(self, *args, **kwargs)
+
+        client.execute_command = command
+        Pipeline.execute = pipeline
+
+
+def _new_room() -> Room:
+    host = Player(id=uuid4(), user_id=uuid4(), name="Host", seat=0, is_host=True)
+    return Room(
+        id=uuid4(), code="", host_id=host.id, host_user_id=host.user_id, players=[host], created_at=datetime.utcnow()
+    )
+
+
+async def _check_then_set(room: Room) -> Room:
+    # What create_room did before: loop on EXISTS, then write without a claim.
+    client = await redis_store.get_redis()
+    code = generate_room_code()
+    while await client.exists(room_meta_key(code)):
+        code = generate_room_code()
+    room.code = code
+    pipeline = client.pipeline()
+    pipeline.set(room_meta_key(code), json.dumps(room.model_dump(mode="json", exclude={"players"})))
+    pipeline.hset(room_players_key(code), mapping=_player_mapping(room.players[0]))
+    pipeline.sadd(ROOMS_ACTIVE_KEY, code)
+    pipeline.expire(room_meta_key(code), ROOM_TTL_SECONDS)
+    pipeline.expire(room_players_key(code), ROOM_TTL_SECONDS)
+    await pipeline.execute()
+    return room
+
+
+async def _populate(client: FakeAsyncRedis, rooms: int) -> None:
+    for start in range(0, rooms, 5000):
+        pipeline = client.pipeline(transaction=False)
+        for _ in range(min(5000, rooms - start)):
+            pipeline.set(room_meta_key(generate_room_code()), "{}")
+        await pipeline.execute()
+
+
+async def _run(rooms: int, creates: int, rtt_ms: float) -> None:
+    client = FakeAsyncRedis(decode_responses=True)
+    redis_store._redis = client
+    await _populate(client, rooms)
+    trips = RoundTrips(client, rtt_ms / 1000)
+    print(f"live rooms: {await client.dbsize()}  simulated rtt: {rtt_ms} ms")
+
+    await room_codes.refill()
+    await insert_room(_new_room())  # loads the script
+    for label, create in (("check-then-set", _check_then_set), ("pool + SET NX", insert_room)):
+        trips.count = 0
+        started = time.perf_counter()
+        for _ in range(creates):
+            await create(_new_room())
+        elapsed = time.perf_counter() - started
+        print(f"{label:15s} {creates / elapsed:8.0f} rooms/s  {trips.count / creates:.2f} round trips/room")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=100_000)
+    parser.add_argument("--creates", type=int, default=2000)
+    parser.add_argument("--rtt-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(_run(args.rooms, args.creates, args.rtt_ms))
+
+
+if __name__ == "__main__":
+    main()
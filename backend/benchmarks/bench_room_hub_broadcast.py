@@ -0,0 +1,154 @@
+"""Local fan-out cost of RoomHub.broadcast, three ways: the original loop (send_json,
+so one JSON encode per socket, sent one after another), encode once and gather the
+sends, and encode once and queue on per-socket outboxes drained by writer tasks
+(what RoomHub does).
+
+Sockets are in-process stand-ins whose send yields to the loop once, as a real
+socket write does. Throughput counts an event once every socket has it, for a
+4-player table and a table with ``--spectators`` extra sockets. A last run adds one
+socket that stalls on every send and reports how long the broadcasting handler and
+the other sockets wait for an event.
+
+Run from ``backend/``: ``python -m benchmarks.bench_room_hub_broadcast``.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Callable, List
+
+import room_hub
+from room_hub import RoomHub
+
+CODE = "BENCH1"
+# A room:update for a full table: roughly what the server sends most often.
+EVENT = {
+    "type": "room:update",
+    "payload": {
+        "room": {
+            "code": CODE,
+            "status": "playing",
+            "players": [
+                {"id": f"player-{seat}", "name": f"Player {seat}", "seat": seat, "is_ready": True, "score": 0}
+                for seat in range(4)
+            ],
+        }
+    },
+}
+
+
+class BenchWebSocket:
+    def __init__(self) -> None:
+        self.received = 0
+        self.received_at = 0.0
+
+    async def send_json(self, message: dict) -> None:
+        # Starlette's send_json: encode, then send the text.
+        await self.send_text(json.dumps(message, separators=(",", ":"), ensure_ascii=False))
+
+    async def send_text(self, text: str) -> None:
+        await asyncio.sleep(0)
+        self.received += 1
+        self.received_at = time.perf_counter()
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+class StalledWebSocket(BenchWebSocket):
+    async def send_text(self, text: str) -> None:
+        await asyncio.sleep(0.2)
+
+
+def _targets(hub: RoomHub, code: str) -> List[BenchWebSocket]:
+    return [ws for sockets in hub._rooms.get(code, {}).values() for ws in sockets]
+
+
+async def _sequential_broadcast(hub: RoomHub, code: str, event: dict) -> None:
+    # RoomHub._deliver before encode-once.
+    for websocket in _targets(hub, code):
+        try:
+            await websocket.send_json(event)
+        except Exception:
+            await hub.disconnect(websocket, code)
+
+
+async def _gathered_broadcast(hub: RoomHub, code: str, event: dict) -> None:
+    # RoomHub._deliver before outboxes: the handler waits for the slowest socket.
+    text = json.dumps(event, separators=(",", ":"), ensure_ascii=False)
+    sends = [asyncio.ensure_future(websocket.send_text(text)) for websocket in _targets(hub, code)]
+    await asyncio.wait(sends, timeout=room_hub.ROOM_HUB_SEND_TIMEOUT_SECONDS)
+
+
+async def _outbox_broadcast(hub: RoomHub, code: str, event: dict) -> None:
+    await hub.broadcast(code, event)
+
+
+async def _hub(sockets: List[BenchWebSocket]) -> RoomHub:
+    hub = RoomHub(pubsub_enabled=False)
+    for index, websocket in enumerate(sockets):
+        await hub.connect(websocket, CODE, f"player-{index}" if index < 4 else f"spectator-{index}")
+    return hub
+
+
+async def _throughput(broadcast: Callable, size: int, events: int) -> float:
+    sockets = [BenchWebSocket() for _ in range(size)]
+    hub = await _hub(sockets)
+    started = time.perf_counter()
+    for _ in range(events):
+        await broadcast(hub, CODE, EVENT)
+    while any(websocket.received < events for websocket in sockets):
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+    await hub.close()
+    return events / elapsed
+
+
+async def _waits_behind_stall(broadcast: Callable, events: int) -> tuple[float, float]:
+    stalled = StalledWebSocket()
+    healthy = [BenchWebSocket() for _ in range(3)]
+    hub = await _hub([stalled, *healthy])
+    handler_waits, socket_waits = [], []
+    for _ in range(events):
+        started = time.perf_counter()
+        await broadcast(hub, CODE, EVENT)
+        handler_waits.append(time.perf_counter() - started)
+        while any(websocket.received_at < started for websocket in healthy):
+            await asyncio.sleep(0)
+        socket_waits.append(max(websocket.received_at for websocket in healthy) - started)
+    await hub.close()
+    return max(handler_waits) * 1000, max(socket_waits) * 1000
+
+
+async def _run(events: int, spectators: int) -> None:
+    # The broadcasts below never yield, so the outboxes must hold all of them.
+    room_hub.ROOM_HUB_QUEUE_SIZE = events
+    modes = (
+        ("per-socket encode, sequential", _sequential_broadcast),
+        ("encode once, gathered", _gathered_broadcast),
+        ("encode once, outboxes", _outbox_broadcast),
+    )
+    for size, label in ((4, "4 players"), (4 + spectators, f"4 players + {spectators} spectators")):
+        print(label)
+        for name, broadcast in modes:
+            rate = await _throughput(broadcast, size, events)
+            print(f"  {name:31s} {rate:9.0f} broadcasts/s  {rate * size:11.0f} socket sends/s")
+    # Long enough that the stalled socket is never dropped.
+    room_hub.ROOM_HUB_SEND_TIMEOUT_SECONDS = 1.0
+    print("4 players, one socket stalls 200 ms per send; longest wait for an event")
+    for name, broadcast in modes:
+        handler, sockets = await _waits_behind_stall(broadcast, 5)
+        print(f"  {name:31s} handler {handler:7.1f} ms  healthy sockets {sockets:7.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--spectators", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(_run(args.events, args.spectators))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Cross-instance WebSocket delivery: two app instances (separate uvicorn processes)
+share one Redis, player A is connected to the first and player B to the second.
+
+B toggles ready ``--events`` times on instance 2. Each toggle is a room:update
+broadcast that B receives locally and A receives through Redis pub/sub. The script
+checks that every event arrives on both sockets in order and reports the latency of
+each path; the difference is what the pub/sub hop adds.
+
+Needs uvicorn and websockets. Uses fakeredis' TCP server as a stand-in Redis unless
+``--redis-url`` points at a real one; the stand-in has no Lua, so the room is written
+straight into Redis rather than created through the API.
+
+Run from ``backend/``: ``python -m benchmarks.bench_room_hub_pubsub``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List
+from uuid import uuid4
+
+import redis
+import websockets
+
+from redis_store import room_meta_key, room_players_key
+from room_service import _player_mapping
+from schemas import Player, Room
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def _stand_in_redis() -> Iterator[str]:
+    from fakeredis import TcpFakeServer
+
+    server = TcpFakeServer(("127.0.0.1", _free_port()), server_type="redis")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host, port = server.server_address
+        yield f"redis://{host}:{port}/0"
+    finally:
+        server.shutdown()
+
+
+@contextmanager
+def _instances(redis_url: str, count: int) -> Iterator[List[int]]:
+    ports = [_free_port() for _ in range(count)]
+    env = {**os.environ, "REDIS_URL": redis_url, "ARCHIVE_ENABLED": "0"}
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=env,
+        )
+        for port in ports
+    ]
+    try:
+        for port in ports:
+            _wait_until_up(port)
+        yield ports
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+
+def _wait_until_up(port: int) -> None:
+    deadline = time.monotonic() + 15
+    while True:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1)
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def _seed_room(redis_url: str) -> tuple[str, str, str]:
+    players = [Player(id=uuid4(), user_id=uuid4(), name=name, seat=seat) for seat, name in enumerate("AB")]
+    room = Room(
+        id=uuid4(),
+        code="BENCH2",
+        host_id=players[0].id,
+        host_user_id=players[0].user_id,
+        created_at=datetime.utcnow(),
+    )
+    client = redis.Redis.from_url(redis_url, decode_responses=True)
+    client.set(room_meta_key(room.code), json.dumps(room.model_dump(mode="json", exclude={"players"})))
+    for player in players:
+        client.hset(room_players_key(room.code), mapping=_player_mapping(player))
+    client.close()
+    return room.code, str(players[0].id), str(players[1].id)
+
+
+async def _next_update(websocket) -> float:
+    while True:
+        message = json.loads(await websocket.recv())
+        if message["type"] == "room:update":
+            return time.perf_counter()
+
+
+def _at(values: List[float], fraction: float) -> float:
+    return values[min(len(values) - 1, int(fraction * len(values)))] * 1000
+
+
+async def _measure(redis_url: str, ports: List[int], events: int) -> None:
+    first, second = ports
+    code, player_a, player_b = _seed_room(redis_url)
+
+    async with websockets.connect(f"ws://127.0.0.1:{first}/ws") as socket_a, websockets.connect(
+        f"ws://127.0.0.1:{second}/ws"
+    ) as socket_b:
+        await socket_a.send(json.dumps({"type": "room:join", "payload": {"code": code, "player_id": player_a}}))
+        await _next_update(socket_a)
+        await socket_b.send(json.dumps({"type": "room:join", "payload": {"code": code, "player_id": player_b}}))
+        await asyncio.gather(_next_update(socket_a), _next_update(socket_b))
+
+        local, remote = [], []
+        for index in range(events):
+            payload = {"code": code, "player_id": player_b, "is_ready": index % 2 == 0}
+            ready = {"type": "player:ready", "payload": payload}
+            sent = time.perf_counter()
+            await socket_b.send(json.dumps(ready))
+            at_b, at_a = await asyncio.wait_for(asyncio.gather(_next_update(socket_b), _next_update(socket_a)), 5)
+            local.append(at_b - sent)
+            remote.append(at_a - sent)
+
+    local.sort()
+    remote.sort()
+    print(f"{events} room:update events, every one delivered to both instances")
+    for label, values in (("same instance", local), ("other instance", remote)):
+        p50, p95, p99 = (_at(values, fraction) for fraction in (0.50, 0.95, 0.99))
+        print(f"{label:15s} p50 {p50:6.2f} ms  p95 {p95:6.2f} ms  p99 {p99:6.2f} ms")
+    print(f"added by the pub/sub hop: p50 {_at(remote, 0.5) - _at(local, 0.5):.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+    if args.redis_url:
+        with _instances(args.redis_url, 2) as ports:
+            asyncio.run(_measure(args.redis_url, ports, args.events))
+        return
+    with _stand_in_redis() as redis_url, _instances(redis_url, 2) as ports:
+        asyncio.run(_measure(redis_url, ports, args.events))
+
+
+if __name__ == "__main__":
+    main()
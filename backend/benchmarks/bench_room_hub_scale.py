@@ -0,0 +1,221 @@
+"""RoomHub at instance scale: ``--sockets`` sockets spread over ``--rooms`` rooms, with
+pub/sub on. Compares the hub as it was (one lock around every connect, disconnect
+and delivery, holding it across each room's SUBSCRIBE/UNSUBSCRIBE, and disconnect
+without a player scanning the room) with the current lock-free bookkeeping.
+
+Three phases: connect every socket; ``--events`` broadcasts to random rooms from
+``--broadcasters`` concurrent tasks while another task empties and refills a random
+room every ``--refill-every`` events (each refill is an UNSUBSCRIBE and a
+SUBSCRIBE), reporting event throughput and broadcast latency; then disconnect every socket without its player,
+as the WebSocket endpoint does after an error.
+
+Each hub runs in its own process. Uses in-process fakeredis that waits ``--rtt-ms``
+before every command, standing in for the network round trip, unless
+``--redis-url`` points at a real Redis.
+
+Run from ``backend/``: ``python -m benchmarks.bench_room_hub_scale``.
+"""
+
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+import redis.asyncio as redis
+from redis.asyncio.client import PubSub
+
+import redis_store
+from benchmarks.bench_room_hub_pubsub import BACKEND_DIR
+from room_hub import RoomHub, _Outbox
+
+EVENT = {"type": "turn:pass", "payload": {"state": {"current_turn": "player-1", "move_count": 12}}}
+
+Member = Tuple["BenchWebSocket", str]
+
+
+class BenchWebSocket:
+    async def send_text(self, text: str) -> None:
+        pass
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+class GlobalLockHub(RoomHub):
+    # RoomHub's bookkeeping before per-room locking, outboxes unchanged.
+    def __init__(self) -> None:
+        super().__init__(pubsub_enabled=True)
+        self._lock = asyncio.Lock()
+
+    async def connect(self, websocket, room_code: str, player_id: str) -> None:
+        async with self._lock:
+            room = self._rooms.get(room_code)
+            if room is None:
+                room = self._rooms[room_code] = {}
+                await self._subscribe(room_code)
+            room.setdefault(player_id, set()).add(websocket)
+            outbox = self._outboxes.get(websocket)
+            if outbox is None:
+                outbox = self._outboxes[websocket] = _Outbox(websocket)
+                outbox.writer = asyncio.create_task(self._write(outbox))
+            outbox.memberships.add((room_code, player_id))
+
+    async def disconnect(self, websocket, room_code: str, player_id: str | None = None) -> None:
+        async with self._lock:
+            room = self._rooms.get(room_code)
+            if not room:
+                return
+            outbox = self._outboxes.get(websocket)
+            for pid in [player_id] if player_id else list(room.keys()):
+                sockets = room.get(pid)
+                if not sockets:
+                    continue
+                sockets.discard(websocket)
+                if not sockets:
+                    room.pop(pid, None)
+                if outbox is not None:
+                    outbox.memberships.discard((room_code, pid))
+            if outbox is not None and not outbox.memberships:
+                outbox.ready.set()
+            if not room:
+                self._rooms.pop(room_code, None)
+                await self._unsubscribe(room_code)
+
+    async def _deliver(self, room_code: str, player_id: str | None, kind: str | None, text: str) -> None:
+        async with self._lock:
+            room = self._rooms.get(room_code, {})
+            if player_id is None:
+                targets = [ws for sockets in room.values() for ws in sockets]
+            else:
+                targets = list(room.get(player_id, ()))
+            for websocket in targets:
+                self._enqueue(self._outboxes[websocket], kind, text)
+
+
+def _stand_in_redis(rtt: float) -> redis.Redis:
+    from fakeredis import FakeAsyncRedis
+
+    class SlowPubSub(PubSub):
+        async def execute_command(self, *args):
+            await asyncio.sleep(rtt)
+            return await super().execute_command(*args)
+
+    class SlowRedis(FakeAsyncRedis):
+        async def execute_command(self, *args, **options):
+            await asyncio.sleep(rtt)
+            return await super().execute_command(*args, **options)
+
+        def pubsub(self, **kwargs) -> PubSub:
+            return SlowPubSub(self.connection_pool, **kwargs)
+
+    return SlowRedis(decode_responses=True)
+
+
+def _layout(sockets: int, rooms: int) -> List[List[Member]]:
+    layout: List[List[Member]] = [[] for _ in range(rooms)]
+    for index in range(sockets):
+        members = layout[index % rooms]
+        members.append((BenchWebSocket(), f"player-{len(members)}"))
+    return layout
+
+
+def _at(values: List[float], fraction: float) -> float:
+    return values[min(len(values) - 1, int(fraction * len(values)))] * 1000
+
+
+async def _connect_all(hub: RoomHub, layout: List[List[Member]]) -> float:
+    started = time.perf_counter()
+    for index, members in enumerate(layout):
+        for websocket, player_id in members:
+            await hub.connect(websocket, f"R{index}", player_id)
+    return time.perf_counter() - started
+
+
+async def _mixed(hub: RoomHub, layout: List[List[Member]], args: argparse.Namespace) -> tuple:
+    latencies: List[float] = []
+    remaining = [args.events]
+    refills_due = asyncio.Semaphore(0)
+
+    async def broadcast(rng: random.Random) -> None:
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            if remaining[0] % args.refill_every == 0:
+                refills_due.release()
+            code = f"R{rng.randrange(len(layout))}"
+            started = time.perf_counter()
+            await hub.broadcast(code, EVENT)
+            latencies.append(time.perf_counter() - started)
+
+    async def refill(rng: random.Random) -> None:
+        for _ in range(args.events // args.refill_every):
+            await refills_due.acquire()
+            index = rng.randrange(len(layout))
+            for websocket, _ in layout[index]:
+                await hub.disconnect(websocket, f"R{index}")
+            for websocket, player_id in layout[index]:
+                await hub.connect(websocket, f"R{index}", player_id)
+
+    started = time.perf_counter()
+    tasks = [broadcast(random.Random(seed)) for seed in range(args.broadcasters)]
+    await asyncio.gather(*tasks, refill(random.Random(-1)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return args.events / elapsed, _at(latencies, 0.50), _at(latencies, 0.99)
+
+
+async def _disconnect_all(hub: RoomHub, layout: List[List[Member]]) -> float:
+    started = time.perf_counter()
+    for index, members in enumerate(layout):
+        for websocket, _ in members:
+            await hub.disconnect(websocket, f"R{index}")
+    return time.perf_counter() - started
+
+
+HUBS = {"global-lock": GlobalLockHub, "lock-free": RoomHub}
+
+
+async def _run(args: argparse.Namespace) -> None:
+    if args.redis_url:
+        redis_store._redis = redis.from_url(args.redis_url, decode_responses=True)
+    else:
+        redis_store._redis = _stand_in_redis(args.rtt_ms / 1000)
+    hub = HUBS[args.hub]()
+    layout = _layout(args.sockets, args.rooms)
+    connected = await _connect_all(hub, layout)
+    rate, p50, p99 = await _mixed(hub, layout, args)
+    disconnected = await _disconnect_all(hub, layout)
+    await hub.close()
+    await redis_store._redis.aclose()
+    print(
+        f"{args.hub:12s} connect {args.sockets / connected:7.0f}/s  events {rate:7.0f}/s  "
+        f"broadcast p50 {p50:6.2f} ms  p99 {p99:7.2f} ms  "
+        f"disconnect {args.sockets / disconnected:7.0f}/s",
+        flush=True,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sockets", type=int, default=50_000)
+    parser.add_argument("--rooms", type=int, default=12_000)
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--broadcasters", type=int, default=8)
+    parser.add_argument("--refill-every", type=int, default=10)
+    parser.add_argument("--rtt-ms", type=float, default=0.2)
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--hub", choices=sorted(HUBS), default=None)
+    args = parser.parse_args()
+    if args.hub:
+        asyncio.run(_run(args))
+        return
+    print(f"{args.sockets} sockets in {args.rooms} rooms, {args.events} broadcasts from {args.broadcasters} tasks")
+    for hub_name in HUBS:
+        command = [sys.executable, "-m", "benchmarks.bench_room_hub_scale", *sys.argv[1:], "--hub", hub_name]
+        subprocess.run(command, cwd=BACKEND_DIR, check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Per-move validation cost: Card-list adapters vs. the bitmask engine,
+and combo classification with and without the precomputed combo table.
+
+Run from ``backend/``: ``python -m benchmarks.bench_rules``.
+"""
+
+import argparse
+import random
+import timeit
+from datetime import datetime
+from typing import List, Tuple
+from uuid import uuid4
+
+from card_mask import cards_to_mask, mask_to_cards
+from rules import (
+    combo_table_stats,
+    configure_combo_table,
+    evaluate_mask,
+    validate_move,
+    validate_play_mask,
+)
+from schemas import Card, LastPlay, Move, Suit
+
+Scenario = Tuple[List[Card], List[Card], List[Card]]
+
+
+def _cards(*specs: Tuple[int, Suit]) -> List[Card]:
+    return [Card(rank=rank, suit=suit) for rank, suit in specs]
+
+
+def _scenarios(seed: int) -> List[Scenario]:
+    """(hand, last play, candidate) triples covering every combo family."""
+    S, C, D, H = Suit.spades, Suit.clubs, Suit.diamonds, Suit.hearts
+    plays = [
+        (_cards((8, C)), _cards((8, H))),
+        (_cards((7, S), (7, C)), _cards((9, D), (9, H))),
+        (_cards((5, S), (5, C), (5, D)), _cards((12, S), (12, C), (12, H))),
+        (_cards((3, S), (4, C), (5, H), (6, D), (7, S)), _cards((6, S), (7, C), (8, H), (9, D), (10, S))),
+        (_cards((15, S)), _cards((4, S), (4, C), (5, D), (5, H), (6, S), (6, C))),
+        (_cards((15, S), (15, H)), _cards((11, S), (11, C), (11, D), (11, H))),
+    ]
+    rng = random.Random(seed)
+    deck = [Card(rank=rank, suit=suit) for rank in range(3, 16) for suit in Suit]
+    scenarios: List[Scenario] = []
+    for last, candidate in plays:
+        candidate_keys = {(card.rank, card.suit) for card in candidate}
+        filler = [card for card in deck if (card.rank, card.suit) not in candidate_keys]
+        hand = candidate + rng.sample(filler, 13 - len(candidate))
+        rng.shuffle(hand)
+        scenarios.append((hand, last, candidate))
+    return scenarios
+
+
+def _card_path(scenarios: List[Scenario], player_id) -> None:
+    for hand, last, candidate in scenarios:
+        hand_keys = [(card.rank, card.suit) for card in hand]
+        for card in candidate:
+            hand_keys.remove((card.rank, card.suit))
+        move = Move(type="play", cards=candidate, by_player_id=player_id, ts=datetime.utcnow())
+        validate_move(move, LastPlay(type="single", cards=last, by_player_id=player_id))
+
+
+def _mask_path(scenarios: List[Tuple[int, int, int]]) -> None:
+    for hand_mask, last_mask, play_mask in scenarios:
+        if hand_mask & play_mask != play_mask:
+            raise ValueError("Cards not in hand")
+        validate_play_mask(play_mask, last_mask)
+        mask_to_cards(hand_mask & ~play_mask)
+
+
+def _classify(masks: List[int]) -> None:
+    for mask in masks:
+        evaluate_mask(mask)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    scenarios = _scenarios(args.seed)
+    masks = [(cards_to_mask(hand), cards_to_mask(last), cards_to_mask(play)) for hand, last, play in scenarios]
+    player_id = uuid4()
+    moves = args.rounds * len(scenarios)
+
+    card_seconds = timeit.timeit(lambda: _card_path(scenarios, player_id), number=args.rounds)
+    mask_seconds = timeit.timeit(lambda: _mask_path(masks), number=args.rounds)
+    print(f"moves validated:     {moves}")
+    print(f"card-list adapters:  {card_seconds / moves * 1e6:8.2f} us/move")
+    print(f"bitmask engine:      {mask_seconds / moves * 1e6:8.2f} us/move")
+    print(f"speedup:             {card_seconds / mask_seconds:8.1f}x")
+
+    stats = combo_table_stats()
+    print(f"combo table:         {stats['entries']} entries, {stats['bytes'] / 1e6:.1f} MB, "
+          f"built in {stats['build_seconds'] * 1e3:.1f} ms")
+    combo_masks = [mask for _, last_mask, play_mask in masks for mask in (last_mask, play_mask)]
+    lookups = args.rounds * len(combo_masks)
+    table_seconds = timeit.timeit(lambda: _classify(combo_masks), number=args.rounds)
+    configure_combo_table(False)
+    direct_seconds = timeit.timeit(lambda: _classify(combo_masks), number=args.rounds)
+    configure_combo_table(True)
+    print(f"classify (table):    {table_seconds / lookups * 1e9:8.0f} ns/combo")
+    print(f"classify (direct):   {direct_seconds / lookups * 1e9:8.0f} ns/combo")
+
+
+if __name__ == "__main__":
+    main()
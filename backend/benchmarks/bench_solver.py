@@ -0,0 +1,44 @@
+"""Hand decomposition solver throughput, cold memo vs. warm memo.
+
+Run from ``backend/``: ``python -m benchmarks.bench_solver``.
+"""
+
+import argparse
+import random
+import time
+
+from solver import clear_cache, solve_hand, solve_hands
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hands", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    hands = [sum(1 << index for index in rng.sample(range(52), 13)) for _ in range(args.hands)]
+
+    cold_sample = hands[:500]
+    started = time.perf_counter()
+    for hand_mask in cold_sample:
+        clear_cache()
+        solve_hand(hand_mask)
+    cold = (time.perf_counter() - started) / len(cold_sample)
+
+    clear_cache()
+    started = time.perf_counter()
+    solve_hands(hands)
+    batch = (time.perf_counter() - started) / len(hands)
+
+    started = time.perf_counter()
+    solve_hands(hands)
+    warm = (time.perf_counter() - started) / len(hands)
+
+    print(f"cold memo:        {cold * 1e6:8.1f} us/hand")
+    print(f"batch (filling):  {batch * 1e6:8.1f} us/hand over {len(hands)} hands")
+    print(f"batch (warm):     {warm * 1e6:8.1f} us/hand")
+
+
+if __name__ == "__main__":
+    main()
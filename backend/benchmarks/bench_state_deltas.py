@@ -0,0 +1,119 @@
+"""WebSocket bytes per game with turns sent as full state plus room (STATE_DELTAS_ENABLED=0,
+what the server sent before deltas) and as versioned deltas.
+
+Plays a series of ``--games`` games at a 4-player table through ws_service's
+broadcasts, each player picking a random legal play or passing, with one socket per
+player. Counts the text frames every socket receives, by event type; the same seed
+gives both modes the same games.
+
+Uses in-process fakeredis. Run from ``backend/``: ``python -m benchmarks.bench_state_deltas``.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from collections import Counter
+from typing import Dict
+
+from fakeredis import FakeAsyncRedis
+
+import archive_service
+import game_service
+import redis_store
+import ws_service
+from benchmarks.bench_move_log import CODE, _seed_room
+from redis_store import room_meta_key
+from room_hub import RoomHub
+from room_service import get_room
+
+
+class CountingWebSocket:
+    def __init__(self, counts: Counter) -> None:
+        self.counts = counts
+
+    async def send_text(self, text: str) -> None:
+        event_type = json.loads(text)["type"]
+        self.counts[event_type, "frames"] += 1
+        self.counts[event_type, "bytes"] += len(text.encode())
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+async def _play_series(client: FakeAsyncRedis, games: int, players: int, seed: int) -> Counter:
+    rng = random.Random(seed)
+    game_service.new_deal_seed = lambda: rng.getrandbits(64)
+    await _seed_room(client, players)
+    room = await get_room(CODE)
+    room.max_games = games
+    await client.set(room_meta_key(CODE), room.model_dump_json(exclude={"players"}))
+    ws_service._turn_views.clear()
+    ws_service.room_hub = RoomHub(pubsub_enabled=False)
+    counts: Counter = Counter()
+    for player in room.players:
+        await ws_service.room_hub.connect(CountingWebSocket(counts), CODE, str(player.id))
+
+    start = {"code": CODE, "player_id": str(room.host_id)}
+    await ws_service._handle_game_start(CountingWebSocket(counts), start, ws_service.ConnectionState())
+    for _ in range(games):
+        state = await game_service.get_game_state(CODE)
+        while state.status.value == "playing":
+            plays, can_pass = await game_service.get_legal_plays(CODE, state.current_turn)
+            if can_pass and (not plays or rng.random() < 0.3):
+                state = await game_service.pass_turn(CODE, state.current_turn)
+                await ws_service._broadcast_turn_pass(CODE, state)
+            else:
+                cards = [card.model_dump(mode="json") for card in rng.choice(plays)]
+                state = await game_service.play_turn(CODE, state.current_turn, cards)
+                await ws_service._broadcast_turn_play(CODE, state)
+            await _drain()
+    await ws_service.room_hub.close()
+    return counts
+
+
+async def _drain() -> None:
+    # fakeredis never yields to the loop, so the outbox writers only run here.
+    while ws_service.room_hub.snapshot()["queued"]:
+        await asyncio.sleep(0)
+
+
+def _per_game(counts: Counter, games: int, unit: str) -> Dict[str, float]:
+    return {event_type: value / games for (event_type, kind), value in counts.items() if kind == unit}
+
+
+async def _run(games: int, players: int, seed: int) -> None:
+    redis_store._redis = FakeAsyncRedis(decode_responses=True)
+    archive_service.ARCHIVE_ENABLED = False
+    results = {}
+    for label, enabled in (("full state", False), ("deltas", True)):
+        ws_service.STATE_DELTAS_ENABLED = enabled
+        results[label] = await _play_series(redis_store._redis, games, players, seed)
+    await ws_service.turn_timers.stop()
+
+    print(f"{players}-player table, {games} games, bytes received per game by all {players} sockets")
+    event_types = sorted({event_type for counts in results.values() for event_type, _ in counts})
+    print(f"  {'event':12s}" + "".join(f"{label:>24s}" for label in results))
+    for event_type in event_types:
+        cells = []
+        for counts in results.values():
+            frames = _per_game(counts, games, "frames").get(event_type, 0)
+            size = _per_game(counts, games, "bytes").get(event_type, 0)
+            cells.append(f"{size:12.0f} B {frames:6.1f} fr")
+        print(f"  {event_type:12s}" + "".join(f"{cell:>24s}" for cell in cells))
+    totals = [sum(_per_game(counts, games, "bytes").values()) for counts in results.values()]
+    print(f"  {'total':12s}" + "".join(f"{total:12.0f} B{'':10s}" for total in totals))
+    print(f"  deltas send {1 - totals[1] / totals[0]:.0%} fewer bytes")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=12)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(_run(args.games, args.players, args.seed))
+
+
+if __name__ == "__main__":
+    main()
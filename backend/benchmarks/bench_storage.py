@@ -0,0 +1,80 @@
+"""Redis payload size and encode/decode cost: legacy pydantic JSON vs. the
+compact ``h1:``/``s2|`` storage formats.
+
+Run from ``backend/``: ``python -m benchmarks.bench_storage``.
+"""
+
+import argparse
+import json
+import random
+import timeit
+from uuid import uuid4
+
+from card_mask import cards_to_mask, mask_to_cards
+from game_engine import create_deck, deal_hands
+from rules import evaluate_mask
+from schemas import GameState, GameStatus, LastPlay
+from storage_codec import decode_cards_json, decode_hand, decode_state, encode_cards_json, encode_hand, encode_state
+
+
+def _room(seed: int):
+    rng = random.Random(seed)
+    deck = create_deck()
+    rng.shuffle(deck)
+    order = [uuid4() for _ in range(4)]
+    hands = {player_id: cards_to_mask(cards) for player_id, cards in deal_hands(order, deck).items()}
+    last_mask = hands[order[0]] & -hands[order[0]]
+    state = GameState(
+        room_id=uuid4(),
+        status=GameStatus.playing,
+        players_order=order,
+        current_turn=order[1],
+        last_play=LastPlay(type=evaluate_mask(last_mask).type, cards=mask_to_cards(last_mask), by_player_id=order[0]),
+        first_game=True,
+    )
+    return state, hands
+
+
+def _legacy_state(state: GameState) -> str:
+    return json.dumps(state.model_dump(mode="json"))
+
+
+def _per_call_us(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    state, hands = _room(args.seed)
+    hand_mask = next(iter(hands.values()))
+    hand_cards = mask_to_cards(hand_mask)
+    legacy_hand, compact_hand = encode_cards_json(hand_cards), encode_hand(hand_mask)
+    legacy_state, compact_state = _legacy_state(state), encode_state(state)
+
+    legacy_room = len(legacy_state) + sum(len(encode_cards_json(mask_to_cards(mask))) for mask in hands.values())
+    compact_room = len(compact_state) + sum(len(encode_hand(mask)) for mask in hands.values())
+    print(f"hand bytes:       legacy {len(legacy_hand):6d}   compact {len(compact_hand):6d}")
+    print(f"state bytes:      legacy {len(legacy_state):6d}   compact {len(compact_state):6d}")
+    print(f"room bytes (4p):  legacy {legacy_room:6d}   compact {compact_room:6d}")
+
+    rows = [
+        ("hand encode", lambda: encode_cards_json(mask_to_cards(hand_mask)), lambda: encode_hand(hand_mask)),
+        ("hand decode", lambda: cards_to_mask(decode_cards_json(legacy_hand)), lambda: decode_hand(compact_hand)),
+        ("state encode", lambda: _legacy_state(state), lambda: encode_state(state)),
+        ("state decode", lambda: decode_state(legacy_state), lambda: decode_state(compact_state)),
+    ]
+    for label, legacy, compact in rows:
+        legacy_us = _per_call_us(legacy, args.number)
+        compact_us = _per_call_us(compact, args.number)
+        print(
+            f"{label + ':':17s} legacy {legacy_us:6.2f} us  compact {compact_us:6.2f} us  "
+            f"({legacy_us / compact_us:5.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Deque, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from card_mask import cards_to_mask
+from policies import SearchTimeout, TurnView, get_policy
+from schemas import BotLevel, Card, GameState, Player
+
+BOT_POLICIES: Dict[BotLevel, str] = {
+    BotLevel.easy: "random",
+    BotLevel.normal: "lowest",
+    BotLevel.hard: "greedy",
+}
+BOT_MOVE_BUDGET_SECONDS = float(os.getenv("BOT_MOVE_BUDGET_SECONDS", "0.5"))
+BOT_MOVE_GRACE_SECONDS = float(os.getenv("BOT_MOVE_GRACE_SECONDS", "0.25"))
+BOT_MOVE_DELAY_SECONDS = float(os.getenv("BOT_MOVE_DELAY_SECONDS", "0.8"))
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", "2"))
+
+_executor: Optional[Executor] = None
+
+
+class BotMetrics:
+    def __init__(self, window: int = 1000) -> None:
+        self.decisions = 0
+        self.timeouts = 0
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float, timed_out: bool) -> None:
+        self.decisions += 1
+        if timed_out:
+            self.timeouts += 1
+        self._latencies.append(seconds)
+
+    def snapshot(self) -> dict:
+        latencies = sorted(self._latencies)
+        return {
+            "decisions": self.decisions,
+            "timeouts": self.timeouts,
+            "p50_ms": _percentile(latencies, 0.50) * 1000,
+            "p95_ms": _percentile(latencies, 0.95) * 1000,
+            "p99_ms": _percentile(latencies, 0.99) * 1000,
+            "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        }
+
+
+bot_metrics = BotMetrics()
+
+
+def get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=BOT_WORKERS)
+    return _executor
+
+
+def set_executor(executor: Optional[Executor]) -> None:
+    global _executor
+    _executor = executor
+
+
+def build_turn_view(state: GameState, players: List[Player], bot_id: UUID, hand: List[Card]) -> TurnView:
+    hand_counts = {player.id: player.hand_count for player in players}
+    order = state.players_order
+    start = order.index(bot_id)
+    opponents = [order[(start + offset) % len(order)] for offset in range(1, len(order))]
+    return TurnView(
+        hand_mask=cards_to_mask(hand),
+        last_mask=cards_to_mask(state.last_play.cards) if state.last_play is not None else 0,
+        first_turn=state.first_turn_required,
+        opponent_counts=tuple(hand_counts.get(player_id, 0) for player_id in opponents),
+    )
+
+
+def choose_move(level: str, view: TurnView, seed: int, deadline: float) -> Tuple[int, bool]:
+    # Returns the move and whether the search ran out of time. The policy checks the
+    # deadline itself, so a slow search gives its worker back instead of running on.
+    try:
+        return get_policy(BOT_POLICIES[BotLevel(level)])(view, random.Random(seed), deadline), False
+    except SearchTimeout:
+        return fallback_move(view), True
+
+
+def fallback_move(view: TurnView) -> int:
+    # Always legal and O(1): pass a trick, or lead the lowest card (the 3 of spades
+    # on a first turn, since its holder is the one leading).
+    if view.last_mask:
+        return 0
+    return view.hand_mask & -view.hand_mask
+
+
+async def decide_move(level: BotLevel, view: TurnView) -> int:
+    # The search runs in a worker pool so the event loop keeps serving other rooms;
+    # past the budget the bot falls back to a trivial move. The deadline is wall-clock
+    # time so it means the same in a worker process, and also covers time queued there.
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    deadline = time.time() + BOT_MOVE_BUDGET_SECONDS
+    seed = random.getrandbits(32)
+    future = loop.run_in_executor(get_executor(), choose_move, level.value, view, seed, deadline)
+    try:
+        # Only a backstop for a wedged pool: the search itself stops at the deadline.
+        move, timed_out = await asyncio.wait_for(future, BOT_MOVE_BUDGET_SECONDS + BOT_MOVE_GRACE_SECONDS)
+    except asyncio.TimeoutError:
+        move = fallback_move(view)
+        timed_out = True
+    bot_metrics.record(time.perf_counter() - started, timed_out)
+    return move
+
+
+async def bot_metrics_handler(request: Request):
+    """
+    ---
+    summary: Bot decision latency metrics
+    responses:
+      200:
+        description: OK
+    """
+    return JSONResponse({"bots": bot_metrics.snapshot()})
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
@@ -0,0 +1,71 @@
+from typing import Dict, Iterable, List, Tuple
+
+from schemas import Card, Suit
+
+# Card encoding: one bit per card, rank-major, suit order as the low bits.
+# bit index = (rank - 3) * 4 + SUIT_ORDER[suit], so 3S is bit 0 and 2H is bit 51.
+
+SUIT_ORDER: Dict[Suit, int] = {
+    Suit.spades: 0,
+    Suit.clubs: 1,
+    Suit.diamonds: 2,
+    Suit.hearts: 3,
+}
+SUITS: Tuple[Suit, ...] = tuple(sorted(SUIT_ORDER, key=SUIT_ORDER.__getitem__))
+
+MIN_RANK = 3
+MAX_RANK = 15
+RANK_COUNT = MAX_RANK - MIN_RANK + 1
+DECK_SIZE = RANK_COUNT * 4
+FULL_DECK_MASK = (1 << DECK_SIZE) - 1
+
+THREE_OF_SPADES_MASK = 1
+RANK_MASKS: Tuple[int, ...] = tuple(0xF << (index * 4) for index in range(RANK_COUNT))
+TWOS_MASK = RANK_MASKS[MAX_RANK - MIN_RANK]
+
+NIBBLE_COUNT: Tuple[int, ...] = tuple(bin(value).count("1") for value in range(16))
+
+# Cards are never mutated after creation, so decoding shares one instance per card.
+_CARDS_BY_INDEX: Tuple[Card, ...] = tuple(
+    Card.model_construct(rank=MIN_RANK + index // 4, suit=SUITS[index % 4]) for index in range(DECK_SIZE)
+)
+
+
+def card_index(rank: int, suit: Suit) -> int:
+    return (rank - MIN_RANK) * 4 + SUIT_ORDER[suit]
+
+
+def card_bit(card: Card) -> int:
+    return 1 << card_index(card.rank, card.suit)
+
+
+def cards_to_mask(cards: Iterable[Card]) -> int:
+    mask = 0
+    for card in cards:
+        mask |= 1 << ((card.rank - MIN_RANK) * 4 + SUIT_ORDER[card.suit])
+    return mask
+
+
+def mask_to_cards(mask: int) -> List[Card]:
+    cards: List[Card] = []
+    while mask:
+        low = mask & -mask
+        cards.append(_CARDS_BY_INDEX[low.bit_length() - 1])
+        mask ^= low
+    return cards
+
+
+def card_count(mask: int) -> int:
+    return mask.bit_count()
+
+
+def rank_count(mask: int, rank: int) -> int:
+    return NIBBLE_COUNT[(mask >> ((rank - MIN_RANK) * 4)) & 0xF]
+
+
+def rank_counts(mask: int) -> Tuple[int, ...]:
+    return tuple(NIBBLE_COUNT[(mask >> (index * 4)) & 0xF] for index in range(RANK_COUNT))
+
+
+def lowest_card(mask: int) -> int:
+    return mask & -mask
@@ -6,10 +6,12 @@ class EventType(str, Enum):
     room_leave = "room:leave"
     room_sync = "room:sync"
     room_update = "room:update"
+    room_add_bot = "room:add_bot"
     player_ready = "player:ready"
     game_start = "game:start"
     hand_deal = "hand:deal"
     turn_play = "turn:play"
     turn_pass = "turn:pass"
+    turn_hint = "turn:hint"
     game_end = "game:end"
     error = "error"
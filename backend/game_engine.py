@@ -0,0 +1,124 @@
+import random
+import secrets
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple, TypeVar
+
+from card_mask import MAX_RANK, MIN_RANK, THREE_OF_SPADES_MASK, TWOS_MASK
+from rules import Combo, beats, can_beat, evaluate_mask
+from schemas import Card, ComboType, Suit
+
+# Pure game logic shared by game_service (Redis-backed) and the offline simulator.
+
+CARDS_PER_PLAYER = 13
+DEAL_SEED_BITS = 64
+END_GAME_SCORES: Dict[int, Tuple[int, ...]] = {
+    2: (2, -2),
+    3: (2, 1, -1),
+    4: (2, 1, -1, -2),
+}
+
+PlayerKey = TypeVar("PlayerKey", bound=Hashable)
+
+_BLACK_TWOS_MASK = 0x3 << ((MAX_RANK - MIN_RANK) * 4)
+
+
+def create_deck() -> List[Card]:
+    cards: List[Card] = []
+    for rank in range(3, 16):
+        for suit in Suit:
+            cards.append(Card(rank=rank, suit=suit))
+    return cards
+
+
+_DECK = tuple(create_deck())
+
+
+def new_deal_seed() -> int:
+    return secrets.randbits(DEAL_SEED_BITS)
+
+
+def shuffled_deck(seed: int) -> List[Card]:
+    # random.Random(seed).shuffle is stable across CPython releases, so a stored seed
+    # reproduces the same deck on any server.
+    deck = list(_DECK)
+    random.Random(seed).shuffle(deck)
+    return deck
+
+
+def deal_hands(players: Sequence[PlayerKey], deck: Sequence[Card]) -> Dict[PlayerKey, List[Card]]:
+    # Round-robin deal: seat i gets every len(players)-th card starting at i.
+    count = len(players)
+    return {player_id: list(deck[seat::count][:CARDS_PER_PLAYER]) for seat, player_id in enumerate(players)}
+
+
+def deal_from_seed(players: Sequence[PlayerKey], seed: int) -> Dict[PlayerKey, List[Card]]:
+    return deal_hands(players, shuffled_deck(seed))
+
+
+def find_start_player(hands: Dict[PlayerKey, List[Card]]) -> PlayerKey:
+    holder = find_three_of_spades_holder(hands)
+    return holder if holder is not None else next(iter(hands))
+
+
+def find_three_of_spades_holder(hands: Dict[PlayerKey, List[Card]]) -> Optional[PlayerKey]:
+    for player_id, cards in hands.items():
+        if any(card.rank == 3 and card.suit == Suit.spades for card in cards):
+            return player_id
+    return None
+
+
+def next_player(players: Sequence[PlayerKey], current: PlayerKey) -> PlayerKey:
+    idx = players.index(current)
+    return players[(idx + 1) % len(players)]
+
+
+def chop_score_delta(last_combo: Combo, last_mask: int, candidate: Combo) -> int:
+    if last_combo.rank == 15 and last_combo.type in {ComboType.single, ComboType.pair}:
+        if candidate.type in {ComboType.four_kind, ComboType.consecutive_pairs}:
+            # Black 2s (spades, clubs) cost 1 point each, red 2s cost 2.
+            twos = last_mask & TWOS_MASK
+            return twos.bit_count() * 2 - (twos & _BLACK_TWOS_MASK).bit_count()
+    elif last_combo.type == ComboType.consecutive_pairs and last_combo.length == 3:
+        if candidate.type == ComboType.consecutive_pairs and candidate.length == 4:
+            return 2
+    elif last_combo.type == ComboType.four_kind:
+        if candidate.type == ComboType.consecutive_pairs and candidate.length == 4:
+            return 2
+    elif last_combo.type == ComboType.consecutive_pairs and last_combo.length == 4:
+        if candidate.type == ComboType.consecutive_pairs and candidate.length == 4 and can_beat(candidate, last_combo):
+            return 4
+    return 0
+
+
+def play_step(hand_mask: int, play_mask: int, first_turn_required: bool, last_mask: int) -> Tuple[int, Combo, int]:
+    # Validates a play against the hand and the trick (``last_mask`` 0 when leading) and
+    # returns the hand left, the play's combo and the points the play chops off the trick.
+    if not play_mask or hand_mask & play_mask != play_mask:
+        raise ValueError("Cards not in hand")
+    if first_turn_required and not play_mask & THREE_OF_SPADES_MASK:
+        raise ValueError("First play must include 3 of spades")
+    candidate = evaluate_mask(play_mask)
+    delta = 0
+    if last_mask:
+        last_combo = evaluate_mask(last_mask)
+        if not beats(candidate, last_combo):
+            raise ValueError("Move does not beat last play")
+        delta = chop_score_delta(last_combo, last_mask, candidate)
+    return hand_mask & ~play_mask, candidate, delta
+
+
+def pass_step(players: int, pass_count: int, has_trick: bool) -> Tuple[int, bool]:
+    # Returns the new pass count and whether everyone else passed, which hands the
+    # lead back to the trick's winner.
+    if not has_trick:
+        raise ValueError("Cannot pass without a last play")
+    pass_count += 1
+    if pass_count >= players - 1:
+        return 0, True
+    return pass_count, False
+
+
+def end_game_deltas(standings: Sequence[Tuple[PlayerKey, int, int]]) -> Dict[PlayerKey, int]:
+    # standings are (player, cards left, seat): fewer cards ranks higher, seat breaks ties.
+    ordered = sorted(standings, key=lambda standing: (standing[1], standing[2]))
+    score_table = END_GAME_SCORES.get(len(ordered), END_GAME_SCORES[4])
+    return {player_id: score for (player_id, _, _), score in zip(ordered, score_table)}
@@ -1,62 +1,142 @@
 import json
-import random
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 from uuid import UUID
 
-from redis_store import ROOM_TTL_SECONDS, get_redis, room_hands_key, room_meta_key, room_state_key
-from room_service import get_players, get_room, update_player
-from rules import can_beat, evaluate_combo, validate_move
-from schemas import Card, ComboType, GameState, GameStatus, LastPlay, Move, RoomStatus, Suit
-
-CARDS_PER_PLAYER = 13
-
-
-def _serialize_cards(cards: List[Card]) -> str:
-    return json.dumps([card.model_dump(mode="json") for card in cards])
+from card_mask import cards_to_mask, mask_to_cards
+from game_engine import (
+    deal_from_seed,
+    end_game_deltas,
+    find_start_player,
+    find_three_of_spades_holder,
+    new_deal_seed,
+    next_player,
+    pass_step,
+    play_step,
+)
+from lobby_service import index_room
+from move_log import MOVE_LOG_ENABLED, MOVE_LOG_MAXLEN, encode_entries, move_entries, start_entry
+from redis_scripts import run_script
+from redis_store import (
+    ROOMS_PLAYING_KEY,
+    ROOM_TTL_SECONDS,
+    get_redis,
+    room_deal_key,
+    room_hands_key,
+    room_meta_key,
+    room_moves_key,
+    room_players_key,
+    room_state_key,
+)
+from room_service import deserialize_players, get_room
+from rules import legal_plays
+from schemas import Card, GameState, GameStatus, LastPlay, Player, RoomStatus, SpecialHand
+from solver import solve_hands
+from storage_codec import decode_hand, decode_state, encode_hand, encode_player_fields, encode_state
+
+# Optimistic commits: a turn re-reads and re-validates if another write to the same
+# state landed between its read and its commit script.
+COMMIT_ATTEMPTS = 3
+# Time each player gets for a turn before it is played for them; 0 disables the
+# deadlines. The deadline is part of the committed state so it survives restarts.
+TURN_TIMEOUT_SECONDS = float(os.getenv("TURN_TIMEOUT_SECONDS", "30"))
+
+
+# Pure turn resolution, shared by the Redis-backed functions below and the in-memory
+# room actors. Each one validates before it touches ``state`` and raises ValueError
+# without side effects when the move is rejected.
+def _check_turn(state: GameState, player_id: UUID, hand_mask: Optional[int]) -> int:
+    if state.status != GameStatus.playing:
+        raise ValueError("Game already finished")
+    if state.current_turn != player_id:
+        raise ValueError("Not your turn")
+    if hand_mask is None:
+        raise ValueError("Player hand not found")
+    return hand_mask
+
+
+def resolve_play(
+    state: GameState,
+    player_id: UUID,
+    hand_mask: Optional[int],
+    cards: List[Card],
+    play_mask: int,
+) -> Tuple[int, Dict[UUID, int]]:
+    hand_mask = _check_turn(state, player_id, hand_mask)
+    last_mask = cards_to_mask(state.last_play.cards) if state.last_play is not None else 0
+    remaining_mask, candidate, delta = play_step(hand_mask, play_mask, state.first_turn_required, last_mask)
+    score_deltas: Dict[UUID, int] = {}
+    if delta > 0 and state.last_play is not None:
+        score_deltas[player_id] = delta
+        score_deltas[state.last_play.by_player_id] = -delta
+
+    state.last_play = LastPlay(type=candidate.type, cards=cards, by_player_id=player_id)
+    state.pass_count = 0
+    state.first_turn_required = False
+    state.move_count += 1
+    state.version += 1
+    if not remaining_mask:
+        state.status = GameStatus.finished
+        state.winner_id = player_id
+    state.current_turn = next_player(state.players_order, player_id)
+    _start_turn_clock(state)
+    return remaining_mask, score_deltas
 
 
-def _deserialize_cards(raw: str) -> List[Card]:
-    return [Card.model_validate(item) for item in json.loads(raw)]
+def resolve_pass(state: GameState, player_id: UUID) -> None:
+    if state.current_turn != player_id:
+        raise ValueError("Not your turn")
+    state.pass_count, trick_over = pass_step(len(state.players_order), state.pass_count, state.last_play is not None)
+    state.move_count += 1
+    state.version += 1
+    if trick_over:
+        state.current_turn = state.last_play.by_player_id
+        state.last_play = None
+    else:
+        state.current_turn = next_player(state.players_order, player_id)
+    _start_turn_clock(state)
 
 
-def _create_deck() -> List[Card]:
-    cards: List[Card] = []
-    for rank in range(3, 16):
-        for suit in Suit:
-            cards.append(Card(rank=rank, suit=suit))
-    return cards
+def playing_score(state: GameState) -> str:
+    # The room's score in rooms:playing, or "" once its game is over.
+    if state.status != GameStatus.playing:
+        return ""
+    return str(round(state.turn_deadline.timestamp() * 1000)) if state.turn_deadline is not None else "0"
 
 
-def _deal_hands(players: List[UUID], deck: List[Card]) -> Dict[UUID, List[Card]]:
-    hands: Dict[UUID, List[Card]] = {player_id: [] for player_id in players}
-    index = 0
-    for card in deck:
-        hands[players[index]].append(card)
-        index = (index + 1) % len(players)
-        if all(len(hand) >= CARDS_PER_PLAYER for hand in hands.values()):
-            break
-    return hands
+def _start_turn_clock(state: GameState) -> None:
+    if TURN_TIMEOUT_SECONDS > 0 and state.status == GameStatus.playing:
+        # Whole milliseconds, the precision the state record keeps.
+        state.turn_deadline = datetime.fromtimestamp(round(time.time() + TURN_TIMEOUT_SECONDS, 3), tz=timezone.utc)
+    else:
+        state.turn_deadline = None
 
 
-def _find_start_player(hands: Dict[UUID, List[Card]]) -> UUID:
-    for player_id, cards in hands.items():
-        if any(card.rank == 3 and card.suit == Suit.spades for card in cards):
-            return player_id
-    return next(iter(hands))
+def resolve_legal_plays(
+    state: GameState, player_id: UUID, hand_mask: Optional[int]
+) -> Tuple[List[List[Card]], bool]:
+    if state.status == GameStatus.playing and state.current_turn != player_id:
+        # A hint is read-only, so a player waiting for their turn just has no plays yet.
+        return [], False
+    hand_mask = _check_turn(state, player_id, hand_mask)
+    last_mask = cards_to_mask(state.last_play.cards) if state.last_play is not None else 0
+    plays = legal_plays(hand_mask, last_mask, state.first_turn_required)
+    return [mask_to_cards(mask) for mask in plays], state.last_play is not None
 
 
-def _next_player(players: List[UUID], current: UUID) -> UUID:
-    idx = players.index(current)
-    return players[(idx + 1) % len(players)]
+def end_game_score_deltas(players: Iterable[Player], winner_id: UUID) -> Dict[UUID, int]:
+    standings = [(player.id, 0 if player.id == winner_id else player.hand_count, player.seat) for player in players]
+    return end_game_deltas(standings)
 
 
-async def start_game(code: str, max_games: Optional[int] = None) -> GameState:
+async def start_game(code: str, max_games: Optional[int] = None, after_version: int = 0) -> GameState:
     code = code.upper()
     room = await get_room(code)
     if room is None:
         raise ValueError("Room not found")
-    players = await get_players(code)
+    players = room.players
     if len(players) < 2:
         raise ValueError("Not enough players to start")
 
@@ -65,10 +145,15 @@ async def start_game(code: str, max_games: Optional[int] = None) -> GameState:
     room.status = RoomStatus.in_game
 
     players_order = [player.id for player in sorted(players, key=lambda p: p.seat)]
-    deck = _create_deck()
-    random.shuffle(deck)
-    hands = _deal_hands(players_order, deck)
-    current_turn = _find_start_player(hands)
+    deal_seed = new_deal_seed()
+    hands = deal_from_seed(players_order, deal_seed)
+    current_turn = find_start_player(hands)
+    analyses = solve_hands(cards_to_mask(hands[player_id]) for player_id in players_order)
+    special_hands = {
+        str(player_id): analysis.special.value
+        for player_id, analysis in zip(players_order, analyses)
+        if analysis.special is not None
+    }
 
     first_game = room.games_played == 0
     state = GameState(
@@ -81,79 +166,103 @@ async def start_game(code: str, max_games: Optional[int] = None) -> GameState:
         pass_count=0,
         winner_id=None,
         first_game=first_game,
-        first_turn_required=first_game,
+        # With fewer than 4 players the 3 of spades may stay in the undealt stock.
+        first_turn_required=first_game and find_three_of_spades_holder(hands) is not None,
+        # Past the room's last game, so versions never repeat within a room.
+        version=max(room.state_version, after_version) + 1,
     )
+    room.state_version = state.version
+    _start_turn_clock(state)
 
     client = await get_redis()
     pipeline = client.pipeline()
-    pipeline.set(room_state_key(code), json.dumps(state.model_dump(mode="json")))
+    pipeline.set(room_state_key(code), encode_state(state))
+    pipeline.zadd(ROOMS_PLAYING_KEY, {code: playing_score(state)})
+    # Special hands are a fact about hidden cards, so they stay next to the seed.
+    deal = {
+        "seed": deal_seed,
+        "players_order": [str(player_id) for player_id in players_order],
+        "special_hands": special_hands,
+    }
+    pipeline.set(room_deal_key(code), json.dumps(deal), ex=ROOM_TTL_SECONDS)
     room.games_played += 1
     pipeline.set(
         room_meta_key(code),
         json.dumps(room.model_dump(mode="json", exclude={"players"})),
     )
-    for player_id, cards in hands.items():
-        pipeline.hset(room_hands_key(code), str(player_id), _serialize_cards(cards))
+    index_room(pipeline, room)
+    hands_raw = {str(player_id): encode_hand(cards_to_mask(cards)) for player_id, cards in hands.items()}
+    pipeline.hset(room_hands_key(code), mapping=hands_raw)
+    pipeline.delete(room_moves_key(code))
+    if MOVE_LOG_ENABLED:
+        entry_id, fields = start_entry(state, hands_raw, deal_seed)
+        pipeline.xadd(room_moves_key(code), fields, id=entry_id, maxlen=MOVE_LOG_MAXLEN, approximate=True)
+        pipeline.expire(room_moves_key(code), ROOM_TTL_SECONDS)
+    for player in players:
+        player.hand_count = len(hands[player.id])
+    pipeline.hset(room_players_key(code), mapping=encode_player_fields(players, ("hand_count",)))
     pipeline.expire(room_state_key(code), ROOM_TTL_SECONDS)
     pipeline.expire(room_hands_key(code), ROOM_TTL_SECONDS)
     await pipeline.execute()
-
-    for player in players:
-        player.hand_count = len(hands[player.id])
-        await update_player(code, player)
-
     return state
 
 
 async def play_turn(code: str, player_id: UUID, cards_payload: List[dict]) -> GameState:
     code = code.upper()
-    client = await get_redis()
-    raw_state = await client.get(room_state_key(code))
-    if raw_state is None:
-        raise ValueError("Game not started")
-
-    state = GameState.model_validate(json.loads(raw_state))
-    if state.status != GameStatus.playing:
-        raise ValueError("Game already finished")
-    if state.current_turn != player_id:
-        raise ValueError("Not your turn")
-
-    raw_hand = await client.hget(room_hands_key(code), str(player_id))
-    if raw_hand is None:
-        raise ValueError("Player hand not found")
-    hand_cards = _deserialize_cards(raw_hand)
     cards = [Card.model_validate(payload) for payload in cards_payload]
-
-    if not _hand_contains(hand_cards, cards):
+    play_mask = cards_to_mask(cards)
+    if play_mask.bit_count() != len(cards):
         raise ValueError("Cards not in hand")
 
-    if state.first_turn_required:
-        has_three_spades = any(card.rank == 3 and card.suit == Suit.spades for card in cards)
-        if not has_three_spades:
-            raise ValueError("First play must include 3 of spades")
-
-    move = Move(type="play", cards=cards, by_player_id=player_id, ts=datetime.utcnow())
-    last_play = validate_move(move, state.last_play)
-    if state.last_play is not None:
-        await _apply_chop_scoring(code, state.last_play, move)
-
-    remaining_hand = _remove_cards(hand_cards, cards)
-    await client.hset(room_hands_key(code), str(player_id), _serialize_cards(remaining_hand))
-
-    state.last_play = last_play
-    state.pass_count = 0
-    if state.first_turn_required:
-        state.first_turn_required = False
-    if not remaining_hand:
-        state.status = GameStatus.finished
-        state.winner_id = player_id
-    state.current_turn = _next_player(state.players_order, player_id)
-    await client.set(room_state_key(code), json.dumps(state.model_dump(mode="json")), ex=ROOM_TTL_SECONDS)
+    client = await get_redis()
+    for _ in range(COMMIT_ATTEMPTS):
+        pipeline = client.pipeline(transaction=False)
+        pipeline.get(room_state_key(code))
+        pipeline.hgetall(room_hands_key(code))
+        pipeline.hgetall(room_players_key(code))
+        raw_state, hands_raw, players_raw = await pipeline.execute()
+        if raw_state is None:
+            raise ValueError("Game not started")
+
+        state = decode_state(raw_state)
+        raw_hand = hands_raw.get(str(player_id))
+        hand_mask = decode_hand(raw_hand) if raw_hand is not None else None
+        remaining_mask, score_deltas = resolve_play(state, player_id, hand_mask, cards, play_mask)
+        if state.status == GameStatus.finished:
+            players = deserialize_players(players_raw)
+            for scored_id, delta in end_game_score_deltas(players, player_id).items():
+                score_deltas[scored_id] = score_deltas.get(scored_id, 0) + delta
+
+        new_hand = encode_hand(remaining_mask)
+        entries = []
+        if MOVE_LOG_ENABLED:
+            entries = move_entries(state, player_id, play_mask, {**hands_raw, str(player_id): new_hand})
+        args: List[Union[str, int]] = [
+            raw_state,
+            str(player_id),
+            raw_hand,
+            encode_state(state),
+            new_hand,
+            remaining_mask.bit_count(),
+            ROOM_TTL_SECONDS,
+            encode_entries(entries),
+            MOVE_LOG_MAXLEN,
+            code,
+            playing_score(state),
+        ]
+        for scored_id, delta in score_deltas.items():
+            args.extend((str(scored_id), delta))
+        keys = [
+            room_state_key(code),
+            room_hands_key(code),
+            room_players_key(code),
+            room_moves_key(code),
+            ROOMS_PLAYING_KEY,
+        ]
+        if await run_script("play_turn", keys, args):
+            return state
+    raise ValueError("Game state changed, please retry")
 
-    await _sync_hand_count(code, player_id, len(remaining_hand))
-    if state.status == GameStatus.finished:
-        await _apply_end_game_scoring(code)
-    return state
 
 # Get the player's current hand of cards
 # This is used to display the player's hand in the UI and to validate their moves.
@@ -163,7 +272,22 @@ async def get_hand(code: str, player_id: UUID) -> List[Card]:
     raw_hand = await client.hget(room_hands_key(code), str(player_id))
     if raw_hand is None:
         raise ValueError("Player hand not found")
-    return _deserialize_cards(raw_hand)
+    return mask_to_cards(decode_hand(raw_hand))
+
+
+async def get_legal_plays(code: str, player_id: UUID) -> Tuple[List[List[Card]], bool]:
+    code = code.upper()
+    client = await get_redis()
+    pipeline = client.pipeline()
+    pipeline.get(room_state_key(code))
+    pipeline.hget(room_hands_key(code), str(player_id))
+    raw_state, raw_hand = await pipeline.execute()
+    if raw_state is None:
+        raise ValueError("Game not started")
+
+    state = decode_state(raw_state)
+    hand_mask = decode_hand(raw_hand) if raw_hand is not None else None
+    return resolve_legal_plays(state, player_id, hand_mask)
 
 
 async def maybe_start_next_game(code: str) -> Tuple[Optional[GameState], bool]:
@@ -175,47 +299,78 @@ async def maybe_start_next_game(code: str) -> Tuple[Optional[GameState], bool]:
     raw_state = await client.get(room_state_key(code))
     if raw_state is None:
         return None, False
-    state = GameState.model_validate(json.loads(raw_state))
+    state = decode_state(raw_state)
     if state.status != GameStatus.finished:
         return None, False
     if room.games_played >= room.max_games:
         room.status = RoomStatus.waiting
         room.games_played = 0
-        await _reset_ready_status(code)
+        room.state_version = state.version
+        # Bots stay ready: nobody can ready them again for the next series.
+        for player in room.players:
+            player.is_ready = player.is_bot
         pipeline = client.pipeline()
-        pipeline.delete(room_state_key(code))
-        pipeline.delete(room_hands_key(code))
+        if room.players:
+            pipeline.hset(room_players_key(code), mapping=encode_player_fields(room.players, ("is_ready",)))
+        pipeline.delete(room_state_key(code), room_hands_key(code), room_deal_key(code), room_moves_key(code))
+        pipeline.zrem(ROOMS_PLAYING_KEY, code)
         pipeline.set(room_meta_key(code), json.dumps(room.model_dump(mode="json", exclude={"players"})))
         pipeline.expire(room_meta_key(code), ROOM_TTL_SECONDS)
+        index_room(pipeline, room)
         await pipeline.execute()
         return None, True
-    next_state = await start_game(code)
+    next_state = await start_game(code, after_version=state.version)
     return next_state, False
 
 
 async def pass_turn(code: str, player_id: UUID) -> GameState:
     code = code.upper()
     client = await get_redis()
-    raw_state = await client.get(room_state_key(code))
-    if raw_state is None:
-        raise ValueError("Game not started")
-
-    state = GameState.model_validate(json.loads(raw_state))
-    if state.current_turn != player_id:
-        raise ValueError("Not your turn")
-    if state.last_play is None:
-        raise ValueError("Cannot pass without a last play")
+    for _ in range(COMMIT_ATTEMPTS):
+        # Hands only change together with the state, so they are not compared; they
+        # are read in the same round trip in case this move needs a log snapshot.
+        pipeline = client.pipeline(transaction=False)
+        pipeline.get(room_state_key(code))
+        pipeline.hgetall(room_hands_key(code))
+        raw_state, hands_raw = await pipeline.execute()
+        if raw_state is None:
+            raise ValueError("Game not started")
+
+        state = decode_state(raw_state)
+        resolve_pass(state, player_id)
+        entries = move_entries(state, player_id, None, hands_raw) if MOVE_LOG_ENABLED else []
+        args = [
+            raw_state,
+            encode_state(state),
+            ROOM_TTL_SECONDS,
+            encode_entries(entries),
+            MOVE_LOG_MAXLEN,
+            code,
+            playing_score(state),
+        ]
+        if await run_script("pass_turn", [room_state_key(code), room_moves_key(code), ROOMS_PLAYING_KEY], args):
+            return state
+    raise ValueError("Game state changed, please retry")
+
+
+async def get_deal(code: str) -> Optional[Tuple[int, List[UUID]]]:
+    code = code.upper()
+    client = await get_redis()
+    raw_deal = await client.get(room_deal_key(code))
+    if raw_deal is None:
+        return None
+    deal = json.loads(raw_deal)
+    return deal["seed"], [UUID(player_id) for player_id in deal["players_order"]]
 
-    state.pass_count += 1
-    if state.pass_count >= len(state.players_order) - 1:
-        state.pass_count = 0
-        state.current_turn = state.last_play.by_player_id
-        state.last_play = None
-    else:
-        state.current_turn = _next_player(state.players_order, player_id)
 
-    await client.set(room_state_key(code), json.dumps(state.model_dump(mode="json")), ex=ROOM_TTL_SECONDS)
-    return state
+async def get_special_hands(code: str) -> Dict[UUID, SpecialHand]:
+    code = code.upper()
+    client = await get_redis()
+    raw_deal = await client.get(room_deal_key(code))
+    if raw_deal is None:
+        return {}
+    special_hands = json.loads(raw_deal).get("special_hands", {})
+    return {UUID(player_id): SpecialHand(value) for player_id, value in special_hands.items()}
 
 
 async def get_game_state(code: str) -> Optional[GameState]:
@@ -224,118 +379,27 @@ async def get_game_state(code: str) -> Optional[GameState]:
     raw_state = await client.get(room_state_key(code))
     if raw_state is None:
         return None
-    return GameState.model_validate(json.loads(raw_state))
-
-
-def _hand_contains(hand: List[Card], desired: List[Card]) -> bool:
-    hand_counts: Dict[tuple[int, str], int] = {}
-    for card in hand:
-        key = (card.rank, card.suit.value)
-        hand_counts[key] = hand_counts.get(key, 0) + 1
-    for card in desired:
-        key = (card.rank, card.suit.value)
-        if hand_counts.get(key, 0) == 0:
-            return False
-        hand_counts[key] -= 1
-    return True
-
-
-def _remove_cards(hand: List[Card], to_remove: List[Card]) -> List[Card]:
-    remove_counts: Dict[tuple[int, str], int] = {}
-    for card in to_remove:
-        key = (card.rank, card.suit.value)
-        remove_counts[key] = remove_counts.get(key, 0) + 1
-    remaining: List[Card] = []
-    for card in hand:
-        key = (card.rank, card.suit.value)
-        if remove_counts.get(key, 0) > 0:
-            remove_counts[key] -= 1
-        else:
-            remaining.append(card)
-    return remaining
-
-
-async def _sync_hand_count(code: str, player_id: UUID, count: int) -> None:
-    players = await get_players(code)
-    for player in players:
-        if player.id == player_id:
-            player.hand_count = count
-            await update_player(code, player)
-            return
-
-
-async def _apply_chop_scoring(code: str, last_play: LastPlay, move: Move) -> None:
-    last_combo = evaluate_combo(last_play.cards)
-    candidate = evaluate_combo(move.cards)
-    delta = 0
-
-    if last_combo.rank == 15 and last_combo.type in {ComboType.single, ComboType.pair}:
-        if candidate.type in {ComboType.four_kind, ComboType.consecutive_pairs}:
-            delta = sum(_two_penalty(card.suit) for card in last_play.cards)
-    elif last_combo.type == ComboType.consecutive_pairs and last_combo.length == 3:
-        if candidate.type == ComboType.consecutive_pairs and candidate.length == 4:
-            delta = 2
-    elif last_combo.type == ComboType.four_kind:
-        if candidate.type == ComboType.consecutive_pairs and candidate.length == 4:
-            delta = 2
-    elif last_combo.type == ComboType.consecutive_pairs and last_combo.length == 4:
-        if candidate.type == ComboType.consecutive_pairs and candidate.length == 4 and can_beat(candidate, last_combo):
-            delta = 4
-
-    if delta > 0:
-        await _apply_score_delta(code, move.by_player_id, last_play.by_player_id, delta)
-
-
-async def _apply_end_game_scoring(code: str) -> None:
-    players = await get_players(code)
-    if not players:
-        return
-    client = await get_redis()
-    hands_raw = await client.hgetall(room_hands_key(code))
-    hand_counts: Dict[UUID, int] = {}
-    for player in players:
-        raw_hand = hands_raw.get(str(player.id))
-        hand_counts[player.id] = len(_deserialize_cards(raw_hand)) if raw_hand else 0
-    seat_map = {player.id: player.seat for player in players}
-    ordered = sorted(players, key=lambda p: (hand_counts.get(p.id, 0), seat_map.get(p.id, 0)))
-
-    if len(players) == 2:
-        score_table = [2, -2]
-    elif len(players) == 3:
-        score_table = [2, 1, -1]
-    else:
-        score_table = [2, 1, -1, -2]
+    return decode_state(raw_state)
 
-    for index, player in enumerate(ordered[: len(score_table)]):
-        player.score += score_table[index]
-        await update_player(code, player)
 
-
-async def _apply_score_delta(code: str, winner_id: UUID, loser_id: UUID, delta: int) -> None:
-    players = await get_players(code)
-    updated = False
-    for player in players:
-        if player.id == winner_id:
-            player.score += delta
-            await update_player(code, player)
-            updated = True
-        elif player.id == loser_id:
-            player.score -= delta
-            await update_player(code, player)
-            updated = True
-    if not updated:
-        return
-
-
-def _two_penalty(suit: Suit) -> int:
-    if suit in {Suit.spades, Suit.clubs}:
-        return 1
-    return 2
-
-
-async def _reset_ready_status(code: str) -> None:
-    players = await get_players(code)
-    for player in players:
-        if player.is_ready:
-            player.is_ready = False
-            await update_player(code, player)
+async def get_playing_states(batch_size: int = 500) -> List[Tuple[str, GameState]]:
+    # Every room with a game in progress, for rescheduling turn deadlines at startup.
+    # Rooms whose state expired or ended without a turn commit are dropped on the way.
+    client = await get_redis()
+    playing = []
+    codes = [code async for code, _ in client.zscan_iter(ROOMS_PLAYING_KEY, count=batch_size)]
+    for start in range(0, len(codes), batch_size):
+        batch = codes[start:start + batch_size]
+        pipeline = client.pipeline(transaction=False)
+        for code in batch:
+            pipeline.get(room_state_key(code))
+        ended = []
+        for code, raw_state in zip(batch, await pipeline.execute()):
+            state = decode_state(raw_state) if raw_state is not None else None
+            if state is not None and state.status == GameStatus.playing:
+                playing.append((code, state))
+            else:
+                ended.append(code)
+        if ended:
+            await client.zrem(ROOMS_PLAYING_KEY, *ended)
+    return playing
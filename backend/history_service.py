@@ -0,0 +1,121 @@
+import json
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from card_mask import mask_to_cards
+from game_service import resolve_pass, resolve_play
+from move_log import MOVE_LOG_SNAPSHOT_EVERY, LogEntry, entry_move_index
+from redis_store import get_redis, room_moves_key
+from schemas import GameState, Move
+from storage_codec import decode_hand, decode_state
+
+
+async def get_moves(code: str) -> List[Move]:
+    code = code.upper()
+    client = await get_redis()
+    moves = []
+    for _, fields in await client.xrange(room_moves_key(code)):
+        cards = mask_to_cards(int(fields["cards"], 16)) if "cards" in fields else None
+        moves.append(
+            Move(
+                type=fields["type"],
+                cards=cards,
+                by_player_id=UUID(fields["player"]),
+                ts=datetime.fromtimestamp(int(fields["ts"]) / 1000, tz=timezone.utc),
+            )
+        )
+    return moves
+
+
+async def get_state_at(code: str, move_index: Optional[int] = None) -> GameState:
+    # Rebuild the state after ``move_index`` plays and passes (default: the latest)
+    # from the nearest snapshot at or below it, re-validating every move on the way.
+    code = code.upper()
+    client = await get_redis()
+    if move_index is None:
+        last = await client.xrevrange(room_moves_key(code), count=1)
+        if not last:
+            raise ValueError("No moves recorded")
+        move_index = entry_move_index(last[0][0])
+    if move_index < 0:
+        raise ValueError("Move index must not be negative")
+
+    base = move_index - move_index % MOVE_LOG_SNAPSHOT_EVERY
+    entries = await client.xrange(room_moves_key(code), min=str(base), max=str(move_index))
+    state, _, _ = replay_entries(entries)
+    if state.move_count != move_index:
+        raise ValueError("Move not recorded")
+    # Deadlines belong to the live game, not to its history.
+    state.turn_deadline = None
+    return state
+
+
+def replay_entries(entries: List[LogEntry]) -> Tuple[GameState, Dict[UUID, int], Dict[UUID, int]]:
+    # Applies the moves after the first entry, which must carry a snapshot, and returns
+    # the resulting state, hands and the score deltas from chops along the way.
+    if not entries or "state" not in entries[0][1]:
+        raise ValueError("Move not recorded")
+    state = decode_state(entries[0][1]["state"])
+    hands: Dict[UUID, int] = {UUID(pid): decode_hand(raw) for pid, raw in json.loads(entries[0][1]["hands"]).items()}
+    score_deltas: Dict[UUID, int] = {}
+    for _, fields in entries[1:]:
+        if fields["type"] == "play":
+            player_id = UUID(fields["player"])
+            play_mask = int(fields["cards"], 16)
+            cards = mask_to_cards(play_mask)
+            hands[player_id], deltas = resolve_play(state, player_id, hands.get(player_id), cards, play_mask)
+            for scored_id, delta in deltas.items():
+                score_deltas[scored_id] = score_deltas.get(scored_id, 0) + delta
+        elif fields["type"] == "pass":
+            resolve_pass(state, UUID(fields["player"]))
+    return state, hands, score_deltas
+
+
+async def get_moves_handler(request: Request):
+    """
+    ---
+    summary: Move log of the current game
+    parameters:
+      - in: path
+        name: code
+        required: true
+        schema:
+          type: string
+    responses:
+      200:
+        description: OK
+    """
+    moves = await get_moves(request.path_params["code"])
+    return JSONResponse({"moves": [move.model_dump(mode="json") for move in moves]})
+
+
+async def get_state_at_handler(request: Request):
+    """
+    ---
+    summary: Game state rebuilt from the move log after a given number of moves
+    parameters:
+      - in: path
+        name: code
+        required: true
+        schema:
+          type: string
+      - in: path
+        name: index
+        required: true
+        schema:
+          type: integer
+    responses:
+      200:
+        description: OK
+      404:
+        description: Move not recorded
+    """
+    try:
+        state = await get_state_at(request.path_params["code"], request.path_params["index"])
+    except ValueError as exc:
+        return JSONResponse({"error": str(exc)}, status_code=404)
+    return JSONResponse({"state": state.model_dump(mode="json")})
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import time
+from datetime import timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from redis.asyncio.client import Pipeline
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from redis_store import ROOM_TTL_SECONDS, get_redis, lobby_index_key, lobby_room_key
+from schemas import Room, RoomStatus
+
+# Lobby index: one sorted set per (room status, free seats) holding room codes scored
+# by creation time in microseconds, plus a small summary per room under its own key
+# with the room's TTL. Every write that changes a room's status or players updates
+# both in the same pipeline, so a page is a few ZREVRANGEBYSCOREs and one MGET
+# whatever the number of rooms, without reading any room meta. Rooms with nobody in
+# them are left out.
+LOBBY_CACHE_SECONDS = float(os.getenv("LOBBY_CACHE_SECONDS", "1"))
+LOBBY_PAGE_LIMIT = 50
+LOBBY_MAX_SEATS = 4
+LOBBY_DEFAULT_STATUSES = (RoomStatus.waiting.value, RoomStatus.ready.value)
+_LOBBY_CACHE_ENTRIES = 1024
+
+_STATUSES = [status.value for status in RoomStatus]
+
+# Rendered pages by query, shared by every poller of this process for LOBBY_CACHE_SECONDS.
+_page_cache: Dict[str, Tuple[float, str, bytes]] = {}
+
+
+def lobby_entry(room: Room) -> Tuple[str, float, str]:
+    # Index key, score and summary for a room that has players.
+    free_seats = max(0, room.max_players - len(room.players))
+    host = next((player for player in room.players if player.id == room.host_id), None)
+    summary = {
+        "code": room.code,
+        "status": room.status.value,
+        "players": len(room.players),
+        "max_players": room.max_players,
+        "free_seats": free_seats,
+        "host_name": host.name if host is not None else None,
+        "has_password": room.password_hash is not None,
+        "created_at": room.created_at.isoformat(),
+    }
+    created_at = room.created_at
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    score = float(round(created_at.timestamp() * 1_000_000))
+    return lobby_index_key(room.status.value, free_seats), score, json.dumps(summary, separators=(",", ":"))
+
+
+def index_room(pipeline: Pipeline, room: Room) -> None:
+    # Queue the index update for ``room`` on a pipeline that is writing the room anyway.
+    target = None
+    if room.players:
+        target, score, summary = lobby_entry(room)
+        pipeline.zadd(target, {room.code: score})
+        pipeline.set(lobby_room_key(room.code), summary, ex=ROOM_TTL_SECONDS)
+    else:
+        pipeline.delete(lobby_room_key(room.code))
+    for key in _all_index_keys():
+        if key != target:
+            pipeline.zrem(key, room.code)
+
+
+def _all_index_keys() -> List[str]:
+    return [lobby_index_key(status, seats) for status in _STATUSES for seats in range(LOBBY_MAX_SEATS)]
+
+
+async def list_rooms(
+    statuses: Sequence[str], min_free_seats: int, limit: int, before: Optional[float] = None
+) -> Tuple[List[dict], Optional[float]]:
+    # Newest first. ``before`` is the exclusive score cursor returned by the previous page.
+    keys = [lobby_index_key(status, seats) for status in statuses for seats in range(min_free_seats, LOBBY_MAX_SEATS)]
+    if not keys:
+        return [], None
+    client = await get_redis()
+    pipeline = client.pipeline(transaction=False)
+    upper = f"({before!r}" if before is not None else "+inf"
+    for key in keys:
+        pipeline.zrevrangebyscore(key, upper, "-inf", start=0, num=limit, withscores=True)
+    pages = await pipeline.execute()
+    newest = sorted((entry for page in pages for entry in page), key=lambda entry: entry[1], reverse=True)[:limit]
+    if not newest:
+        return [], None
+
+    summaries = await client.mget([lobby_room_key(code) for code, _ in newest])
+    rooms = [json.loads(raw) for raw in summaries if raw is not None]
+    expired = [code for (code, _), raw in zip(newest, summaries) if raw is None]
+    if expired:
+        # The room's keys expired without a write that would have unindexed it.
+        pipeline = client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.zrem(key, *expired)
+        await pipeline.execute()
+    return rooms, newest[-1][1] if len(newest) == limit else None
+
+
+async def list_rooms_handler(request: Request):
+    """
+    ---
+    summary: List rooms for the lobby, newest first
+    parameters:
+      - in: query
+        name: status
+        required: false
+        description: Comma-separated room statuses (default waiting,ready)
+        schema:
+          type: string
+      - in: query
+        name: min_free_seats
+        required: false
+        schema:
+          type: integer
+          default: 1
+      - in: query
+        name: limit
+        required: false
+        schema:
+          type: integer
+          default: 20
+      - in: query
+        name: cursor
+        required: false
+        description: next_cursor from the previous page
+        schema:
+          type: string
+    responses:
+      200:
+        description: OK
+      304:
+        description: Not modified since the ETag sent in If-None-Match
+      400:
+        description: Validation error
+    """
+    params = request.query_params
+    try:
+        statuses = params["status"].split(",") if params.get("status") else list(LOBBY_DEFAULT_STATUSES)
+        min_free_seats = int(params.get("min_free_seats", 1))
+        limit = int(params.get("limit", 20))
+        before = float(params["cursor"]) if params.get("cursor") else None
+    except ValueError:
+        return JSONResponse({"error": "Invalid min_free_seats, limit or cursor"}, status_code=400)
+    if any(status not in _STATUSES for status in statuses):
+        return JSONResponse({"error": "Invalid status"}, status_code=400)
+    if not 0 <= min_free_seats < LOBBY_MAX_SEATS or not 1 <= limit <= LOBBY_PAGE_LIMIT:
+        return JSONResponse({"error": "Invalid min_free_seats, limit or cursor"}, status_code=400)
+
+    cache_key = f"{','.join(sorted(set(statuses)))}|{min_free_seats}|{limit}|{before!r}"
+    now = time.monotonic()
+    cached = _page_cache.get(cache_key)
+    if cached is None or cached[0] <= now:
+        rooms, next_before = await list_rooms(statuses, min_free_seats, limit, before)
+        body = json.dumps(
+            {"rooms": rooms, "next_cursor": repr(next_before) if next_before is not None else None},
+            separators=(",", ":"),
+        ).encode("utf-8")
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if len(_page_cache) >= _LOBBY_CACHE_ENTRIES:
+            _page_cache.clear()
+        cached = _page_cache[cache_key] = (now + LOBBY_CACHE_SECONDS, etag, body)
+
+    _, etag, body = cached
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={int(LOBBY_CACHE_SECONDS)}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
@@ -0,0 +1,308 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from pydantic import BaseModel, Field, ValidationError
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from lobby_service import LOBBY_DEFAULT_STATUSES, LOBBY_PAGE_LIMIT, list_rooms
+from redis_scripts import run_script
+from redis_store import get_redis, matchmaking_queue_key, matchmaking_ticket_key
+from room_service import open_room, seat_players
+from user_service import User, get_user, get_users, touch_users_on_join
+
+# Quick join: a user's ticket goes into one sorted set per table size, scored by the
+# time they queued. Each matcher tick pops a batch per size with ZPOPMIN, which hands
+# every queued user to exactly one matcher however many instances run one, then seats
+# the batch: first into open public rooms of that size from the lobby index (fullest
+# first, committed under WATCH), then into new rooms of full groups. A short group is
+# opened as a room once its oldest user has waited MATCHMAKING_MAX_WAIT_SECONDS, and is
+# otherwise put back with its original queue times. Clients poll their ticket, since
+# the match may be made by another instance than the one serving them.
+MATCHMAKING_INTERVAL_SECONDS = float(os.getenv("MATCHMAKING_INTERVAL_SECONDS", "0.5"))
+MATCHMAKING_BATCH = int(os.getenv("MATCHMAKING_BATCH", "64"))
+MATCHMAKING_MAX_WAIT_SECONDS = float(os.getenv("MATCHMAKING_MAX_WAIT_SECONDS", "15"))
+MATCHMAKING_TICKET_TTL_SECONDS = 10 * 60
+TABLE_SIZES = (2, 3, 4)
+
+logger = logging.getLogger(__name__)
+
+
+class MatchmakingRequest(BaseModel):
+    user_id: UUID
+    max_players: int = Field(default=4, ge=2, le=4)
+
+
+# (user id, queued at in ms, raw ticket) for each user a matcher claimed.
+Claim = Tuple[str, int, str]
+
+
+class Matchmaker:
+    def __init__(self, interval: float = MATCHMAKING_INTERVAL_SECONDS, batch: int = MATCHMAKING_BATCH) -> None:
+        self.interval = interval
+        self.batch = batch
+        self.matched = 0
+        self.rooms_opened = 0
+        self.rooms_filled = 0
+        self._waits: Deque[float] = deque(maxlen=1000)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.match_once()
+            except Exception:
+                logger.exception("Matchmaking tick failed")
+            await asyncio.sleep(self.interval)
+
+    async def match_once(self) -> int:
+        matched = 0
+        for max_players in TABLE_SIZES:
+            matched += await self._match(max_players)
+        return matched
+
+    async def _match(self, max_players: int) -> int:
+        client = await get_redis()
+        popped = await client.zpopmin(matchmaking_queue_key(max_players), self.batch)
+        if not popped:
+            return 0
+        user_ids = [user_id for user_id, _ in popped]
+        tickets = await client.mget([matchmaking_ticket_key(user_id) for user_id in user_ids])
+        users = await get_users(user_ids)
+        # Users who cancelled or queued again since the pop are dropped from this batch.
+        claims: List[Claim] = [
+            (user_id, int(score), ticket)
+            for (user_id, score), ticket in zip(popped, tickets)
+            if user_id in users and _queued_for(ticket, max_players)
+        ]
+        seated: Dict[str, Tuple[str, UUID]] = {}
+        try:
+            await self._seat(max_players, claims, users, seated)
+        finally:
+            # Every claim not seated goes back, also when seating failed partway: the
+            # pop took it out of the queue while its ticket still says queued.
+            waiting = [claim for claim in claims if claim[0] not in seated]
+            if waiting:
+                keys = [matchmaking_queue_key(max_players)]
+                keys += [matchmaking_ticket_key(user_id) for user_id, _, _ in waiting]
+                await run_script("requeue", keys, [item for claim in waiting for item in claim])
+            await self._record_matches(claims, seated, users)
+        return len(seated)
+
+    async def _seat(
+        self, max_players: int, claims: List[Claim], users: Dict[str, User], seated: Dict[str, Tuple[str, UUID]]
+    ) -> None:
+        # Records each seated user in ``seated`` as soon as their room is committed.
+        waiting = list(claims)
+        for summary in await _open_rooms(max_players):
+            if not waiting:
+                break
+            group = waiting[: summary["free_seats"]]
+            result = await seat_players(summary["code"], [users[user_id] for user_id, _, _ in group])
+            if result is None:
+                continue
+            room, players = result
+            seated.update((str(player.user_id), (room.code, player.id)) for player in players)
+            waiting = waiting[len(group) :]
+            self.rooms_filled += 1
+
+        oldest_allowed = int((time.time() - MATCHMAKING_MAX_WAIT_SECONDS) * 1000)
+        while len(waiting) >= max_players or (len(waiting) >= 2 and waiting[0][1] <= oldest_allowed):
+            group, waiting = waiting[:max_players], waiting[max_players:]
+            room = await open_room([users[user_id] for user_id, _, _ in group], max_players)
+            seated.update((str(player.user_id), (room.code, player.id)) for player in room.players)
+            self.rooms_opened += 1
+
+    async def _record_matches(
+        self, claims: List[Claim], seated: Dict[str, Tuple[str, UUID]], users: Dict[str, User]
+    ) -> None:
+        if not seated:
+            return
+        now_ms = int(time.time() * 1000)
+        client = await get_redis()
+        pipeline = client.pipeline(transaction=False)
+        for user_id, queued_at, ticket in claims:
+            if user_id not in seated:
+                continue
+            code, player_id = seated[user_id]
+            matched = {**json.loads(ticket), "status": "matched", "room_code": code, "player_id": str(player_id)}
+            pipeline.set(matchmaking_ticket_key(user_id), json.dumps(matched), ex=MATCHMAKING_TICKET_TTL_SECONDS)
+            self._waits.append(max(0, now_ms - queued_at) / 1000)
+        await pipeline.execute()
+        await touch_users_on_join([users[user_id] for user_id in seated])
+        self.matched += len(seated)
+
+    def snapshot(self) -> dict:
+        waits = sorted(self._waits)
+        return {
+            "matched": self.matched,
+            "rooms_opened": self.rooms_opened,
+            "rooms_filled": self.rooms_filled,
+            "wait_p50_ms": _wait_at(waits, 0.50) * 1000,
+            "wait_p95_ms": _wait_at(waits, 0.95) * 1000,
+            "wait_p99_ms": _wait_at(waits, 0.99) * 1000,
+        }
+
+
+matchmaker = Matchmaker()
+
+
+def _wait_at(sorted_waits: List[float], fraction: float) -> float:
+    if not sorted_waits:
+        return 0.0
+    return sorted_waits[min(len(sorted_waits) - 1, int(fraction * len(sorted_waits)))]
+
+
+def _queued_for(ticket: Optional[str], max_players: int) -> bool:
+    if ticket is None:
+        return False
+    ticket_fields = json.loads(ticket)
+    return ticket_fields["status"] == "queued" and ticket_fields["max_players"] == max_players
+
+
+async def _open_rooms(max_players: int) -> List[dict]:
+    # Public rooms of this size with a free seat, fullest first. The lobby index is not
+    # split by table size, so page through all of it: one page can be other sizes only.
+    candidates: List[dict] = []
+    before: Optional[float] = None
+    while True:
+        rooms, before = await list_rooms(LOBBY_DEFAULT_STATUSES, 1, LOBBY_PAGE_LIMIT, before)
+        candidates += [room for room in rooms if room["max_players"] == max_players and not room["has_password"]]
+        if before is None:
+            return sorted(candidates, key=lambda room: room["free_seats"])
+
+
+async def enqueue(user_id: str, max_players: int) -> dict:
+    ticket = {"status": "queued", "max_players": max_players, "queued_at": int(time.time() * 1000)}
+    client = await get_redis()
+    pipeline = client.pipeline()
+    for size in TABLE_SIZES:
+        pipeline.zrem(matchmaking_queue_key(size), user_id)
+    pipeline.zadd(matchmaking_queue_key(max_players), {user_id: ticket["queued_at"]})
+    pipeline.set(matchmaking_ticket_key(user_id), json.dumps(ticket), ex=MATCHMAKING_TICKET_TTL_SECONDS)
+    await pipeline.execute()
+    return ticket
+
+
+async def get_ticket(user_id: str) -> Optional[dict]:
+    client = await get_redis()
+    raw = await client.get(matchmaking_ticket_key(user_id))
+    return json.loads(raw) if raw is not None else None
+
+
+async def cancel(user_id: str) -> None:
+    client = await get_redis()
+    pipeline = client.pipeline()
+    for size in TABLE_SIZES:
+        pipeline.zrem(matchmaking_queue_key(size), user_id)
+    pipeline.delete(matchmaking_ticket_key(user_id))
+    await pipeline.execute()
+
+
+async def enqueue_handler(request: Request):
+    """
+    ---
+    summary: Queue a user for quick join
+    requestBody:
+      required: true
+      content:
+        application/json:
+          schema:
+            type: object
+            required:
+              - user_id
+            properties:
+              user_id:
+                type: string
+                format: uuid
+              max_players:
+                type: integer
+                minimum: 2
+                maximum: 4
+    responses:
+      200:
+        description: OK
+      400:
+        description: Validation error
+      404:
+        description: User not found
+    """
+    try:
+        payload = MatchmakingRequest.model_validate(await request.json())
+    except ValidationError as exc:
+        return JSONResponse({"error": exc.errors()}, status_code=400)
+    if await get_user(str(payload.user_id)) is None:
+        return JSONResponse({"error": "User not found"}, status_code=404)
+    ticket = await enqueue(str(payload.user_id), payload.max_players)
+    return JSONResponse({"ticket": ticket})
+
+
+async def get_ticket_handler(request: Request):
+    """
+    ---
+    summary: Get a user's quick join ticket; room_code and player_id are set once matched
+    parameters:
+      - in: path
+        name: user_id
+        required: true
+        schema:
+          type: string
+    responses:
+      200:
+        description: OK
+      404:
+        description: Not queued
+    """
+    ticket = await get_ticket(request.path_params["user_id"])
+    if ticket is None:
+        return JSONResponse({"error": "Not queued"}, status_code=404)
+    return JSONResponse({"ticket": ticket})
+
+
+async def cancel_handler(request: Request):
+    """
+    ---
+    summary: Leave the quick join queue
+    parameters:
+      - in: path
+        name: user_id
+        required: true
+        schema:
+          type: string
+    responses:
+      200:
+        description: OK
+    """
+    await cancel(request.path_params["user_id"])
+    return JSONResponse({"status": "cancelled"})
+
+
+async def matchmaking_metrics_handler(request: Request):
+    """
+    ---
+    summary: Quick join metrics of this instance's matcher
+    responses:
+      200:
+        description: OK
+    """
+    return JSONResponse({"matchmaking": matchmaker.snapshot()})
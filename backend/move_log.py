@@ -0,0 +1,63 @@
+import json
+import os
+import time
+from typing import Dict, List, Mapping, Optional, Tuple
+from uuid import UUID
+
+from schemas import GameState
+from storage_codec import encode_state
+
+# Every start, play, pass and end of a game is appended to room:{code}:moves, a Redis
+# Stream that start_game resets. Entry ids are chosen by the server, not by Redis:
+#   "0-1"  start of the game (deal seed, state and hands snapshot)
+#   "n-0"  the n-th play or pass, i.e. the one that leaves state.move_count == n
+#   "n-1"  end of the game, right after the winning move n
+# so the entries for moves a..b are one XRANGE a b. Every MOVE_LOG_SNAPSHOT_EVERY
+# moves the entry also carries the resulting state and all hands, and rebuilding
+# move n replays at most that many moves from the snapshot below it.
+MOVE_LOG_ENABLED = os.getenv("MOVE_LOG_ENABLED", "1") != "0"
+MOVE_LOG_MAXLEN = int(os.getenv("MOVE_LOG_MAXLEN", "1000"))
+MOVE_LOG_SNAPSHOT_EVERY = int(os.getenv("MOVE_LOG_SNAPSHOT_EVERY", "16"))
+
+START_ENTRY_ID = "0-1"
+
+LogEntry = Tuple[str, Dict[str, str]]
+
+
+def _now_ms() -> str:
+    return str(int(time.time() * 1000))
+
+
+def _snapshot(state: GameState, hands: Mapping[str, str]) -> Dict[str, str]:
+    return {"state": encode_state(state), "hands": json.dumps(dict(hands), separators=(",", ":"))}
+
+
+def start_entry(state: GameState, hands: Mapping[str, str], deal_seed: int) -> LogEntry:
+    fields = {"type": "start", "player": str(state.current_turn), "seed": str(deal_seed), "ts": _now_ms()}
+    fields.update(_snapshot(state, hands))
+    return START_ENTRY_ID, fields
+
+
+def move_entries(
+    state: GameState, player_id: UUID, play_mask: Optional[int], hands: Mapping[str, str]
+) -> List[LogEntry]:
+    # ``state`` and ``hands`` are the result of the move; play_mask is None for a pass.
+    ts = _now_ms()
+    fields = {"type": "pass" if play_mask is None else "play", "player": str(player_id), "ts": ts}
+    if play_mask is not None:
+        fields["cards"] = f"{play_mask:x}"
+    if state.move_count % MOVE_LOG_SNAPSHOT_EVERY == 0:
+        fields.update(_snapshot(state, hands))
+    entries = [(f"{state.move_count}-0", fields)]
+    if state.winner_id is not None:
+        entries.append((f"{state.move_count}-1", {"type": "end", "player": str(state.winner_id), "ts": ts}))
+    return entries
+
+
+def encode_entries(entries: List[LogEntry]) -> str:
+    # Script argument: [[id, [field, value, ...]], ...] for XADD inside the commit.
+    return json.dumps([[entry_id, [item for pair in fields.items() for item in pair]] for entry_id, fields in entries])
+
+
+def entry_move_index(entry_id: str) -> int:
+    return int(entry_id.split("-", 1)[0])
@@ -0,0 +1,82 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Optional, Tuple, TypeVar
+
+# Room passwords are stored as "scrypt$<n>$<r>$<p>$<salt>$<hash>". A KDF costs tens of
+# milliseconds of CPU, so it runs on a small thread pool (hashlib releases the GIL for
+# scrypt) and the event loop only awaits it. At most PASSWORD_HASH_MAX_PENDING checks
+# may be running or queued; past that callers get a ValueError instead of a growing
+# backlog. Hashes from before this format (bare SHA-256 hex) still verify, and the
+# caller is handed an scrypt hash to store in their place.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+SCRYPT_N = 2**14
+SCRYPT_R = 8
+SCRYPT_P = 1
+_SALT_BYTES = 16
+
+T = TypeVar("T")
+
+_executor: Optional[Executor] = None
+_pending = 0
+
+
+def get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+    return _executor
+
+
+async def _run(func: Callable[..., T], *args) -> T:
+    global _pending
+    if _pending >= PASSWORD_HASH_MAX_PENDING:
+        raise ValueError("Too many password checks in progress")
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_executor(), func, *args)
+    finally:
+        _pending -= 1
+
+
+def _b64(raw: bytes) -> str:
+    return base64.b64encode(raw).decode("ascii")
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=2 * 128 * n * r * p, dklen=32)
+
+
+def hash_password_sync(password: str) -> str:
+    salt = secrets.token_bytes(_SALT_BYTES)
+    derived = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(derived)}"
+
+
+def verify_password_sync(password: str, stored: str) -> Tuple[bool, Optional[str]]:
+    # (matches, hash to store instead of ``stored`` or None).
+    if not stored.startswith("scrypt$"):
+        legacy = hashlib.sha256(password.encode("utf-8")).hexdigest()
+        if not hmac.compare_digest(legacy, stored):
+            return False, None
+        return True, hash_password_sync(password)
+    _, n, r, p, salt, expected = stored.split("$")
+    derived = _scrypt(password, base64.b64decode(salt), int(n), int(r), int(p))
+    if not hmac.compare_digest(_b64(derived), expected):
+        return False, None
+    if (int(n), int(r), int(p)) != (SCRYPT_N, SCRYPT_R, SCRYPT_P):
+        return True, hash_password_sync(password)
+    return True, None
+
+
+async def hash_password(password: str) -> str:
+    return await _run(hash_password_sync, password)
+
+
+async def verify_password(password: str, stored: str) -> Tuple[bool, Optional[str]]:
+    return await _run(verify_password_sync, password, stored)
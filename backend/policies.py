@@ -0,0 +1,75 @@
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Tuple
+
+from rules import evaluate_mask, legal_plays
+from solver import min_combo_count
+
+# A policy picks a card mask to play for the seat whose turn it is, or 0 to pass.
+# Every policy takes a wall-clock ``deadline``; the searching ones raise SearchTimeout past it.
+
+
+@dataclass(frozen=True)
+class TurnView:
+    hand_mask: int
+    last_mask: int = 0
+    first_turn: bool = False
+    opponent_counts: Tuple[int, ...] = ()
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+Policy = Callable[..., int]
+
+
+def random_policy(view: TurnView, rng: random.Random, deadline: float = math.inf) -> int:
+    plays = legal_plays(view.hand_mask, view.last_mask, view.first_turn)
+    if view.last_mask:
+        return rng.choice(plays + (0,))
+    return rng.choice(plays)
+
+
+def lowest_policy(view: TurnView, rng: random.Random, deadline: float = math.inf) -> int:
+    plays = legal_plays(view.hand_mask, view.last_mask, view.first_turn)
+    if not plays:
+        return 0
+    if view.last_mask:
+        return min(plays, key=lambda mask: (evaluate_mask(mask).rank, mask))
+    # Lead with the lowest card, shedding as many cards with it as possible.
+    return min(plays, key=lambda mask: (mask & -mask, -mask.bit_count(), mask))
+
+
+def greedy_policy(view: TurnView, rng: random.Random, deadline: float = math.inf) -> int:
+    plays = legal_plays(view.hand_mask, view.last_mask, view.first_turn)
+    if not plays:
+        return 0
+
+    def score(mask: int) -> tuple:
+        if time.time() > deadline:
+            raise SearchTimeout
+        return min_combo_count(view.hand_mask & ~mask), evaluate_mask(mask).rank, mask
+
+    best = min(plays, key=score)
+    if view.last_mask and min(view.opponent_counts, default=13) > 3:
+        # Hold back when following would only break up a combo and nobody is close to out.
+        if min_combo_count(view.hand_mask & ~best) >= min_combo_count(view.hand_mask):
+            return 0
+    return best
+
+
+POLICIES: Dict[str, Policy] = {
+    "random": random_policy,
+    "lowest": lowest_policy,
+    "greedy": greedy_policy,
+}
+
+
+def get_policy(name: str) -> Policy:
+    policy = POLICIES.get(name)
+    if policy is None:
+        raise ValueError(f"Unknown policy: {name}")
+    return policy
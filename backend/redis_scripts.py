@@ -0,0 +1,129 @@
+from typing import Dict, List, Sequence, Union
+
+from redis.commands.core import AsyncScript
+
+from redis_store import get_redis
+
+# Server-side scripts that commit a turn in one round trip. Python validates the move
+# against a snapshot it read; the script only commits if the state blob and the
+# mover's hand are still exactly that snapshot, which makes the turn-ownership and
+# hand-containment checks atomic with the write. The move log entries are appended
+# by the same script, so the log never disagrees with the committed state.
+
+APPEND_MOVES = """
+local function append_moves(key, entries, maxlen, ttl)
+  local appended = false
+  for _, entry in ipairs(cjson.decode(entries)) do
+    redis.call('XADD', key, 'MAXLEN', '~', maxlen, entry[1], unpack(entry[2]))
+    appended = true
+  end
+  if appended then
+    redis.call('EXPIRE', key, tonumber(ttl))
+  end
+end
+"""
+
+TRACK_PLAYING = """
+local function track_playing(key, code, deadline)
+  if deadline == '' then
+    redis.call('ZREM', key, code)
+  else
+    redis.call('ZADD', key, deadline, code)
+  end
+end
+"""
+
+PLAY_TURN_SCRIPT = APPEND_MOVES + TRACK_PLAYING + """
+-- KEYS: state, hands, players, moves, playing rooms
+-- ARGV: expected state, player id, expected hand, new state, new hand, hand count, ttl,
+--       move log entries, move log max length, code, turn deadline ('' once finished),
+--       then (player id, score delta) pairs
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+  return 0
+end
+if redis.call('HGET', KEYS[2], ARGV[2]) ~= ARGV[3] then
+  return 0
+end
+redis.call('SET', KEYS[1], ARGV[4], 'EX', tonumber(ARGV[7]))
+redis.call('HSET', KEYS[2], ARGV[2], ARGV[5])
+if redis.call('HEXISTS', KEYS[3], ARGV[2]) == 1 then
+  redis.call('HSET', KEYS[3], ARGV[2] .. ':hand_count', ARGV[6])
+end
+append_moves(KEYS[4], ARGV[8], ARGV[9], ARGV[7])
+track_playing(KEYS[5], ARGV[10], ARGV[11])
+
+for index = 12, #ARGV, 2 do
+  local raw = redis.call('HGET', KEYS[3], ARGV[index])
+  if raw then
+    local score_field = ARGV[index] .. ':score'
+    if redis.call('HEXISTS', KEYS[3], score_field) == 0 then
+      -- Records written before scores had their own field still carry the score.
+      redis.call('HSET', KEYS[3], score_field, cjson.decode(raw)['score'] or 0)
+    end
+    redis.call('HINCRBY', KEYS[3], score_field, ARGV[index + 1])
+  end
+end
+return 1
+"""
+
+PASS_TURN_SCRIPT = APPEND_MOVES + TRACK_PLAYING + """
+-- KEYS: state, moves, playing rooms
+-- ARGV: expected state, new state, ttl, move log entries, move log max length, code,
+--       turn deadline
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+  return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', tonumber(ARGV[3]))
+append_moves(KEYS[2], ARGV[4], ARGV[5], ARGV[3])
+track_playing(KEYS[3], ARGV[6], ARGV[7])
+return 1
+"""
+
+CREATE_ROOM_SCRIPT = """
+-- KEYS: meta, players, active rooms, lobby index, lobby summary
+-- ARGV: meta, ttl, code, lobby score, lobby summary, then player hash (field, value) pairs
+-- Claims the code with SET NX, so two rooms can never share one.
+if not redis.call('SET', KEYS[1], ARGV[1], 'NX', 'EX', tonumber(ARGV[2])) then
+  return 0
+end
+redis.call('HSET', KEYS[2], unpack(ARGV, 6))
+redis.call('EXPIRE', KEYS[2], tonumber(ARGV[2]))
+redis.call('SADD', KEYS[3], ARGV[3])
+redis.call('ZADD', KEYS[4], ARGV[4], ARGV[3])
+redis.call('SET', KEYS[5], ARGV[5], 'EX', tonumber(ARGV[2]))
+return 1
+"""
+
+REQUEUE_SCRIPT = """
+-- KEYS: queue, then one ticket key per user
+-- ARGV: (user id, queued at, ticket) triples in KEYS order
+-- Puts users a matcher claimed but could not seat back in the queue, unless their
+-- ticket changed meanwhile (cancelled, or queued again for another table size).
+local requeued = 0
+for index = 2, #KEYS do
+  local base = (index - 2) * 3
+  if redis.call('GET', KEYS[index]) == ARGV[base + 3] then
+    redis.call('ZADD', KEYS[1], 'NX', ARGV[base + 2], ARGV[base + 1])
+    requeued = requeued + 1
+  end
+end
+return requeued
+"""
+
+_SCRIPTS = {
+    "play_turn": PLAY_TURN_SCRIPT,
+    "pass_turn": PASS_TURN_SCRIPT,
+    "create_room": CREATE_ROOM_SCRIPT,
+    "requeue": REQUEUE_SCRIPT,
+}
+_registered: Dict[str, AsyncScript] = {}
+
+
+async def run_script(name: str, keys: Sequence[str], args: List[Union[str, int]]) -> int:
+    # register_script sends EVALSHA and only falls back to SCRIPT LOAD when the
+    # server has not seen the script yet.
+    client = await get_redis()
+    script = _registered.get(name)
+    if script is None or script.registered_client is not client:
+        script = _registered[name] = client.register_script(_SCRIPTS[name])
+    return int(await script(keys=list(keys), args=args))
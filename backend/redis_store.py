@@ -5,8 +5,14 @@ import redis.asyncio as redis
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 ROOMS_ACTIVE_KEY = "rooms:active"
+# Rooms with a game in progress, scored by the current turn deadline in epoch
+# milliseconds (0 without one); what a restarting process reschedules.
+ROOMS_PLAYING_KEY = "rooms:playing"
 ROOM_TTL_SECONDS = 24 * 60 * 60
 USER_TTL_SECONDS = 7 * 24 * 60 * 60
+# Player fields kept as their own entries in the players hash ("<player id>:<field>")
+# so they can be changed with HSET/HINCRBY without rewriting the player record.
+PLAYER_COUNTER_FIELDS = ("score", "hand_count", "is_ready")
 
 _redis: Optional[redis.Redis] = None
 
@@ -19,6 +25,10 @@ def room_players_key(code: str) -> str:
     return f"room:{code}:players"
 
 
+def player_field(player_id: str, field: str) -> str:
+    return f"{player_id}:{field}"
+
+
 def room_state_key(code: str) -> str:
     return f"room:{code}:state"
 
@@ -27,6 +37,36 @@ def room_hands_key(code: str) -> str:
     return f"room:{code}:hands"
 
 
+def room_deal_key(code: str) -> str:
+    # Deal seed of the current game. Kept out of the broadcast GameState: with it,
+    # anyone could rebuild every hand.
+    return f"room:{code}:deal"
+
+
+def room_moves_key(code: str) -> str:
+    return f"room:{code}:moves"
+
+
+def room_channel(code: str) -> str:
+    return f"pubsub:room:{code}"
+
+
+def lobby_index_key(status: str, free_seats: int) -> str:
+    return f"lobby:{status}:{free_seats}"
+
+
+def lobby_room_key(code: str) -> str:
+    return f"lobby:room:{code}"
+
+
+def matchmaking_queue_key(max_players: int) -> str:
+    return f"matchmaking:queue:{max_players}"
+
+
+def matchmaking_ticket_key(user_id: str) -> str:
+    return f"matchmaking:ticket:{user_id}"
+
+
 def user_key(user_id: str) -> str:
     return f"user:{user_id}"
 
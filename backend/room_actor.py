@@ -0,0 +1,353 @@
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, TypeVar
+from uuid import UUID
+
+import archive_service
+import game_service
+import room_service
+from card_mask import cards_to_mask, mask_to_cards
+from move_log import MOVE_LOG_ENABLED, MOVE_LOG_MAXLEN, LogEntry, move_entries
+from redis_store import (
+    ROOMS_PLAYING_KEY,
+    ROOM_TTL_SECONDS,
+    get_redis,
+    room_hands_key,
+    room_moves_key,
+    room_players_key,
+    room_state_key,
+)
+from schemas import BotLevel, Card, GameState, Player, Room
+from storage_codec import decode_hand, decode_state, encode_hand, encode_player_fields, encode_state
+
+# Optional single-owner mode: every active room gets one asyncio task that applies its
+# commands in arrival order against in-memory state and writes the result back to the
+# usual room:{code}:* keys at most ROOM_WRITE_BEHIND_SECONDS later. Operations that
+# still go straight to Redis (start game, ready, leave, ...) run inside the actor
+# after a flush, and the actor reloads afterwards. It assumes all of a room's
+# WebSockets are served by this process.
+ROOM_ACTORS_ENABLED = os.getenv("ROOM_ACTORS_ENABLED", "0") == "1"
+ROOM_WRITE_BEHIND_SECONDS = float(os.getenv("ROOM_WRITE_BEHIND_SECONDS", "0.05"))
+ROOM_ACTOR_IDLE_SECONDS = float(os.getenv("ROOM_ACTOR_IDLE_SECONDS", "300"))
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+Command = Callable[["RoomActor"], Awaitable[Any]]
+
+_actors: Dict[str, "RoomActor"] = {}
+
+
+class RoomActor:
+    def __init__(self, code: str) -> None:
+        self.code = code
+        self.state: Optional[GameState] = None
+        self.hands: Dict[UUID, int] = {}
+        self.players: Dict[UUID, Player] = {}
+        self._loaded = False
+        self._inbox: asyncio.Queue[Tuple[Command, asyncio.Future]] = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._dirty_state = False
+        self._dirty_hands: Set[UUID] = set()
+        self._dirty_players: Set[UUID] = set()
+        self._pending_moves: List[LogEntry] = []
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def call(self, command: Command) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._inbox.put_nowait((command, future))
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                command, future = await asyncio.wait_for(self._inbox.get(), ROOM_ACTOR_IDLE_SECONDS)
+            except asyncio.TimeoutError:
+                try:
+                    await self.flush()
+                except Exception:
+                    logger.exception("Room actor %s could not flush before going idle", self.code)
+                    continue
+                # No await between this check and the pop, so nothing can be queued
+                # onto an actor that is no longer registered.
+                if self._inbox.empty():
+                    _actors.pop(self.code, None)
+                    return
+                continue
+            try:
+                result = await command(self)
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+    async def load(self) -> None:
+        if self._loaded:
+            return
+        client = await get_redis()
+        pipeline = client.pipeline(transaction=False)
+        pipeline.get(room_state_key(self.code))
+        pipeline.hgetall(room_hands_key(self.code))
+        pipeline.hgetall(room_players_key(self.code))
+        raw_state, hands_raw, players_raw = await pipeline.execute()
+        self.state = decode_state(raw_state) if raw_state is not None else None
+        self.hands = {UUID(pid): decode_hand(raw) for pid, raw in hands_raw.items()}
+        self.players = {player.id: player for player in room_service.deserialize_players(players_raw)}
+        self._loaded = True
+
+    async def game_state(self) -> GameState:
+        await self.load()
+        if self.state is None:
+            raise ValueError("Game not started")
+        return self.state
+
+    async def play(self, player_id: UUID, cards_payload: List[dict]) -> GameState:
+        cards = [Card.model_validate(payload) for payload in cards_payload]
+        play_mask = cards_to_mask(cards)
+        if play_mask.bit_count() != len(cards):
+            raise ValueError("Cards not in hand")
+        state = await self.game_state()
+        remaining_mask, score_deltas = game_service.resolve_play(
+            state, player_id, self.hands.get(player_id), cards, play_mask
+        )
+        self.hands[player_id] = remaining_mask
+        self._dirty_hands.add(player_id)
+        player = self.players.get(player_id)
+        if player is not None:
+            player.hand_count = remaining_mask.bit_count()
+            self._dirty_players.add(player_id)
+        if state.winner_id == player_id:
+            for scored_id, delta in game_service.end_game_score_deltas(self.players.values(), player_id).items():
+                score_deltas[scored_id] = score_deltas.get(scored_id, 0) + delta
+        for scored_id, delta in score_deltas.items():
+            if scored_id in self.players:
+                self.players[scored_id].score += delta
+                self._dirty_players.add(scored_id)
+        self._log_move(player_id, play_mask)
+        self._mark_state_dirty()
+        return state.model_copy(deep=True)
+
+    async def pass_turn(self, player_id: UUID) -> GameState:
+        state = await self.game_state()
+        game_service.resolve_pass(state, player_id)
+        self._log_move(player_id, None)
+        self._mark_state_dirty()
+        return state.model_copy(deep=True)
+
+    async def legal_plays(self, player_id: UUID) -> Tuple[List[List[Card]], bool]:
+        state = await self.game_state()
+        return game_service.resolve_legal_plays(state, player_id, self.hands.get(player_id))
+
+    async def hand(self, player_id: UUID) -> List[Card]:
+        await self.load()
+        hand_mask = self.hands.get(player_id)
+        if hand_mask is None:
+            raise ValueError("Player hand not found")
+        return mask_to_cards(hand_mask)
+
+    def overlay(self, players: List[Player]) -> List[Player]:
+        # Scores and hand counts may not have reached Redis yet.
+        if self._loaded:
+            for player in players:
+                cached = self.players.get(player.id)
+                if cached is not None:
+                    player.score = cached.score
+                    player.hand_count = cached.hand_count
+        return players
+
+    async def exclusive(self, operation: Callable[[], Awaitable[T]]) -> T:
+        await self.flush()
+        try:
+            return await operation()
+        finally:
+            self._loaded = False
+
+    def _log_move(self, player_id: UUID, play_mask: Optional[int]) -> None:
+        if MOVE_LOG_ENABLED:
+            hands = {str(pid): encode_hand(hand_mask) for pid, hand_mask in self.hands.items()}
+            self._pending_moves.extend(move_entries(self.state, player_id, play_mask, hands))
+
+    def _mark_state_dirty(self) -> None:
+        self._dirty_state = True
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(ROOM_WRITE_BEHIND_SECONDS)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Write-behind for room %s failed, retrying", self.code)
+            self._mark_state_dirty()
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self._dirty_state and not self._dirty_hands and not self._dirty_players:
+                return
+            # Serialize before the first await so the write is one consistent snapshot;
+            # commands that land while it is in flight just mark things dirty again.
+            dirty = (self._dirty_state, self._dirty_hands, self._dirty_players)
+            moves = self._pending_moves
+            state_raw = encode_state(self.state) if self.state is not None else None
+            playing = game_service.playing_score(self.state) if self.state is not None else ""
+            hands = {str(pid): encode_hand(self.hands[pid]) for pid in self._dirty_hands if pid in self.hands}
+            player_fields = encode_player_fields(
+                [self.players[pid] for pid in self._dirty_players], ("hand_count", "score")
+            )
+            self._dirty_state, self._dirty_hands, self._dirty_players = False, set(), set()
+            self._pending_moves = []
+
+            try:
+                client = await get_redis()
+                pipeline = client.pipeline()
+                if dirty[0] and state_raw is not None:
+                    pipeline.set(room_state_key(self.code), state_raw, ex=ROOM_TTL_SECONDS)
+                    if playing:
+                        pipeline.zadd(ROOMS_PLAYING_KEY, {self.code: playing})
+                    else:
+                        pipeline.zrem(ROOMS_PLAYING_KEY, self.code)
+                if hands:
+                    pipeline.hset(room_hands_key(self.code), mapping=hands)
+                if player_fields:
+                    pipeline.hset(room_players_key(self.code), mapping=player_fields)
+                for entry_id, fields in moves:
+                    pipeline.xadd(
+                        room_moves_key(self.code), fields, id=entry_id, maxlen=MOVE_LOG_MAXLEN, approximate=True
+                    )
+                if moves:
+                    pipeline.expire(room_moves_key(self.code), ROOM_TTL_SECONDS)
+                await pipeline.execute()
+            except BaseException:
+                self._dirty_state = self._dirty_state or dirty[0]
+                self._dirty_hands |= dirty[1]
+                self._dirty_players |= dirty[2]
+                self._pending_moves = moves + self._pending_moves
+                raise
+
+    async def stop(self) -> None:
+        await self.flush()
+        for task in (self._task, self._flush_task):
+            if task is not None:
+                task.cancel()
+
+
+def _get_actor(code: str) -> RoomActor:
+    code = code.upper()
+    actor = _actors.get(code)
+    if actor is None:
+        actor = _actors[code] = RoomActor(code)
+        actor.start()
+    return actor
+
+
+async def shutdown_room_actors() -> None:
+    actors = list(_actors.values())
+    _actors.clear()
+    for actor in actors:
+        try:
+            await actor.stop()
+        except Exception:
+            logger.exception("Room actor %s could not flush on shutdown", actor.code)
+
+
+async def _exclusive(code: str, operation: Callable[[], Awaitable[T]]) -> T:
+    if not ROOM_ACTORS_ENABLED:
+        return await operation()
+    return await _get_actor(code).call(lambda actor: actor.exclusive(operation))
+
+
+# The functions below mirror game_service / room_service so ws_service can use
+# either mode through one import.
+async def play_turn(code: str, player_id: UUID, cards_payload: List[dict]) -> GameState:
+    if not ROOM_ACTORS_ENABLED:
+        return await game_service.play_turn(code, player_id, cards_payload)
+    return await _get_actor(code).call(lambda actor: actor.play(player_id, cards_payload))
+
+
+async def pass_turn(code: str, player_id: UUID) -> GameState:
+    if not ROOM_ACTORS_ENABLED:
+        return await game_service.pass_turn(code, player_id)
+    return await _get_actor(code).call(lambda actor: actor.pass_turn(player_id))
+
+
+async def get_legal_plays(code: str, player_id: UUID) -> Tuple[List[List[Card]], bool]:
+    if not ROOM_ACTORS_ENABLED:
+        return await game_service.get_legal_plays(code, player_id)
+    return await _get_actor(code).call(lambda actor: actor.legal_plays(player_id))
+
+
+async def get_hand(code: str, player_id: UUID) -> List[Card]:
+    if not ROOM_ACTORS_ENABLED:
+        return await game_service.get_hand(code, player_id)
+    return await _get_actor(code).call(lambda actor: actor.hand(player_id))
+
+
+async def get_game_state(code: str) -> Optional[GameState]:
+    if not ROOM_ACTORS_ENABLED:
+        return await game_service.get_game_state(code)
+
+    async def command(actor: RoomActor) -> Optional[GameState]:
+        await actor.load()
+        return actor.state.model_copy(deep=True) if actor.state is not None else None
+
+    return await _get_actor(code).call(command)
+
+
+async def get_room(code: str) -> Optional[Room]:
+    if not ROOM_ACTORS_ENABLED:
+        return await room_service.get_room(code)
+
+    async def command(actor: RoomActor) -> Optional[Room]:
+        room = await room_service.get_room(code)
+        if room is not None:
+            actor.overlay(room.players)
+        return room
+
+    return await _get_actor(code).call(command)
+
+
+async def get_players(code: str) -> List[Player]:
+    if not ROOM_ACTORS_ENABLED:
+        return await room_service.get_players(code)
+
+    async def command(actor: RoomActor) -> List[Player]:
+        return actor.overlay(await room_service.get_players(code))
+
+    return await _get_actor(code).call(command)
+
+
+async def start_game(code: str, max_games: Optional[int] = None, after_version: int = 0) -> GameState:
+    return await _exclusive(code, lambda: game_service.start_game(code, max_games, after_version))
+
+
+async def archive_finished_game(code: str, state: GameState) -> None:
+    # After a flush, so the archive sees the winning move in the move log.
+    await _exclusive(code, lambda: archive_service.archive_finished_game(code, state))
+
+
+async def maybe_start_next_game(code: str) -> Tuple[Optional[GameState], bool]:
+    return await _exclusive(code, lambda: game_service.maybe_start_next_game(code))
+
+
+async def add_bot(code: str, level: BotLevel) -> Room:
+    return await _exclusive(code, lambda: room_service.add_bot(code, level))
+
+
+async def remove_player(code: str, player_id: UUID) -> Optional[Room]:
+    return await _exclusive(code, lambda: room_service.remove_player(code, player_id))
+
+
+async def set_player_ready(code: str, player_id: UUID, is_ready: bool) -> Optional[Room]:
+    return await _exclusive(code, lambda: room_service.set_player_ready(code, player_id, is_ready))
+
+
+async def set_player_status(code: str, player_id: UUID, status: str) -> Optional[Room]:
+    return await _exclusive(code, lambda: room_service.set_player_status(code, player_id, status))
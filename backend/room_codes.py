@@ -0,0 +1,62 @@
+import asyncio
+import logging
+import os
+import secrets
+from collections import deque
+from typing import Deque, Optional
+
+from redis_store import get_redis, room_meta_key
+
+# Codes handed to create_room come from a per-process pool of random codes that were
+# checked free in one pipelined EXISTS batch, refilled in the background when it runs
+# low. The check is only a hint; the create_room script claims the code with SET NX,
+# and a code lost to a concurrent claim is simply replaced by the next one.
+ROOM_CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+ROOM_CODE_LENGTH = 6
+ROOM_CODE_POOL_SIZE = int(os.getenv("ROOM_CODE_POOL_SIZE", "256"))
+
+logger = logging.getLogger(__name__)
+
+
+def generate_room_code() -> str:
+    return "".join(secrets.choice(ROOM_CODE_ALPHABET) for _ in range(ROOM_CODE_LENGTH))
+
+
+class RoomCodePool:
+    def __init__(self, size: int = ROOM_CODE_POOL_SIZE) -> None:
+        self.size = size
+        self._codes: Deque[str] = deque()
+        self._refill_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def take(self) -> str:
+        if len(self._codes) <= self.size // 4 and (self._refill_task is None or self._refill_task.done()):
+            self._refill_task = asyncio.create_task(self._refill_in_background())
+        if self._codes:
+            return self._codes.popleft()
+        # Empty pool (first request, or a burst): an unchecked code is still safe.
+        return generate_room_code()
+
+    async def _refill_in_background(self) -> None:
+        try:
+            await self.refill()
+        except Exception:
+            logger.exception("Could not refill the room code pool")
+        finally:
+            self._refill_task = None
+
+    async def refill(self) -> None:
+        candidates = list({generate_room_code() for _ in range(self.size - len(self._codes))})
+        if not candidates:
+            return
+        client = await get_redis()
+        pipeline = client.pipeline(transaction=False)
+        for code in candidates:
+            pipeline.exists(room_meta_key(code))
+        taken = await pipeline.execute()
+        self._codes.extend(code for code, exists in zip(candidates, taken) if not exists)
+
+
+room_codes = RoomCodePool()
@@ -1,51 +1,322 @@
 import asyncio
-from typing import Dict, Set
+import json
+import logging
+import os
+import uuid
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
 
+import redis.asyncio as redis
+from redis.asyncio.client import PubSub
 from starlette.websockets import WebSocket
 
+from events import EventType
+from redis_store import get_redis, room_channel
+
+# Events reach every backend instance through one Redis channel per room. Sockets on
+# this instance get an event directly; the copy published for the other instances
+# carries this instance's id, so the subscriber here skips it. Each instance holds
+# a single PubSub connection, subscribed to the channels of the rooms it has sockets
+# in (subscribed with a room's first local socket, unsubscribed with its last), and
+# one task delivering what arrives on it.
+ROOM_HUB_PUBSUB_ENABLED = os.getenv("ROOM_HUB_PUBSUB_ENABLED", "1") != "0"
+# An event is encoded once and queued on the outbox of every socket it is for; each
+# socket's own writer task sends its outbox in order, so a slow client holds up
+# neither the handler nor the rest of the room. A send that fails or takes longer
+# than ROOM_HUB_SEND_TIMEOUT_SECONDS drops the socket. An outbox holds at most
+# ROOM_HUB_QUEUE_SIZE events: when full, queued snapshots superseded by a newer one
+# of the same kind are dropped, and if that frees nothing the client is too slow to
+# keep up and is disconnected.
+ROOM_HUB_SEND_TIMEOUT_SECONDS = float(os.getenv("ROOM_HUB_SEND_TIMEOUT_SECONDS", "5"))
+ROOM_HUB_QUEUE_SIZE = int(os.getenv("ROOM_HUB_QUEUE_SIZE", "64"))
+# Room bookkeeping is plain dict updates with no await between them, so on one event
+# loop it needs no lock; each outbox records its socket's (room, player) memberships,
+# so dropping a socket only touches its own rooms. The awaits are the (un)subscribes
+# a room's first and last socket cause, serialized per room on one of these locks.
+ROOM_HUB_LOCK_SHARDS = int(os.getenv("ROOM_HUB_LOCK_SHARDS", "64"))
+
+# Events carrying a full snapshot, by what they are a snapshot of. Plays and passes
+# are deltas on top of the previous version, so none of them is coalesced away.
+_SNAPSHOTS = {
+    EventType.room_update.value: "room",
+    EventType.game_start.value: "state",
+    EventType.game_end.value: "state",
+}
+# "Try Again Later": the client reconnects and syncs.
+_EVICTED_CLOSE_CODE = 1013
+
+logger = logging.getLogger(__name__)
+
+
+class _Outbox:
+    def __init__(self, websocket: WebSocket) -> None:
+        self.websocket = websocket
+        self.memberships: Set[Tuple[str, str]] = set()
+        self.queue: Deque[Tuple[Optional[str], str]] = deque()
+        self.ready = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+
 
 class RoomHub:
-    def __init__(self) -> None:
-        self._lock = asyncio.Lock()
+    def __init__(self, pubsub_enabled: bool = ROOM_HUB_PUBSUB_ENABLED) -> None:
+        self._locks = [asyncio.Lock() for _ in range(ROOM_HUB_LOCK_SHARDS)]
         self._rooms: Dict[str, Dict[str, Set[WebSocket]]] = {}
+        self._subscribed: Set[str] = set()
+        self._outboxes: Dict[WebSocket, _Outbox] = {}
+        self._closers: Set[asyncio.Task] = set()
+        self.instance_id = uuid.uuid4().hex
+        self.pubsub_enabled = pubsub_enabled
+        self._client: Optional[redis.Redis] = None
+        self._pubsub: Optional[PubSub] = None
+        self._listener: Optional[asyncio.Task] = None
+        self.coalesced = 0
+        self.slow_disconnects = 0
+        self.send_failures = 0
 
     async def connect(self, websocket: WebSocket, room_code: str, player_id: str) -> None:
-        async with self._lock:
-            room = self._rooms.setdefault(room_code, {})
-            room.setdefault(player_id, set()).add(websocket)
+        self._rooms.setdefault(room_code, {}).setdefault(player_id, set()).add(websocket)
+        outbox = self._outboxes.get(websocket)
+        if outbox is None:
+            outbox = self._outboxes[websocket] = _Outbox(websocket)
+            outbox.writer = asyncio.create_task(self._write(outbox))
+        outbox.memberships.add((room_code, player_id))
+        await self._sync_subscription(room_code)
 
     async def disconnect(self, websocket: WebSocket, room_code: str, player_id: str | None = None) -> None:
-        async with self._lock:
-            room = self._rooms.get(room_code)
-            if not room:
-                return
-            player_ids = [player_id] if player_id else list(room.keys())
-            for pid in player_ids:
-                sockets = room.get(pid)
-                if not sockets:
+        outbox = self._outboxes.get(websocket)
+        if outbox is None:
+            return
+        memberships = [
+            (code, pid) for code, pid in outbox.memberships if code == room_code and player_id in (None, pid)
+        ]
+        emptied = self._leave(outbox, memberships)
+        if not outbox.memberships:
+            # The writer sends what is still queued, then exits.
+            outbox.ready.set()
+        for code in emptied:
+            await self._sync_subscription(code)
+
+    def has_sockets(self, room_code: str) -> bool:
+        return room_code in self._rooms
+
+    async def broadcast(self, room_code: str, event: dict) -> None:
+        kind, text = event.get("type"), _encode(event)
+        await self._deliver(room_code, None, kind, text)
+        await self._publish(room_code, None, kind, text)
+
+    async def send_to_player(self, room_code: str, player_id: str, event: dict) -> None:
+        kind, text = event.get("type"), _encode(event)
+        await self._deliver(room_code, player_id, kind, text)
+        await self._publish(room_code, player_id, kind, text)
+
+    async def send(self, websocket: WebSocket, event: dict) -> None:
+        # Replies to a socket in a room queue behind its broadcasts and keep their order.
+        outbox = self._outboxes.get(websocket)
+        if outbox is None:
+            await websocket.send_json(event)
+            return
+        if not self._enqueue(outbox, event.get("type"), _encode(event)):
+            self.slow_disconnects += 1
+            await self._evict([outbox])
+
+    async def flush(self, websocket: WebSocket) -> None:
+        # Waits for a socket that has left all its rooms to send what is still queued,
+        # e.g. a last error before the endpoint closes it.
+        outbox = self._outboxes.get(websocket)
+        if outbox is not None and not outbox.memberships and outbox.writer is not None:
+            await asyncio.wait([outbox.writer], timeout=ROOM_HUB_SEND_TIMEOUT_SECONDS)
+
+    def snapshot(self) -> dict:
+        depths = [len(outbox.queue) for outbox in self._outboxes.values()]
+        return {
+            "connections": len(depths),
+            "queued": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "queue_size": ROOM_HUB_QUEUE_SIZE,
+            "coalesced": self.coalesced,
+            "slow_disconnects": self.slow_disconnects,
+            "send_failures": self.send_failures,
+        }
+
+    async def _deliver(self, room_code: str, player_id: str | None, kind: str | None, text: str) -> None:
+        room = self._rooms.get(room_code, {})
+        if player_id is None:
+            targets = [ws for sockets in room.values() for ws in sockets]
+        else:
+            targets = list(room.get(player_id, ()))
+        overflowed = []
+        for websocket in targets:
+            outbox = self._outboxes[websocket]
+            if not self._enqueue(outbox, kind, text):
+                overflowed.append(outbox)
+        if overflowed:
+            self.slow_disconnects += len(overflowed)
+            await self._evict(overflowed)
+
+    def _enqueue(self, outbox: _Outbox, kind: str | None, text: str) -> bool:
+        if len(outbox.queue) >= ROOM_HUB_QUEUE_SIZE:
+            self._coalesce(outbox, kind)
+            if len(outbox.queue) >= ROOM_HUB_QUEUE_SIZE:
+                return False
+        outbox.queue.append((kind, text))
+        outbox.ready.set()
+        return True
+
+    def _coalesce(self, outbox: _Outbox, incoming: str | None) -> None:
+        # Keep only the newest snapshot of each kind, the incoming event included.
+        superseded = {_SNAPSHOTS[incoming]} if incoming in _SNAPSHOTS else set()
+        kept: Deque[Tuple[Optional[str], str]] = deque()
+        for kind, text in reversed(outbox.queue):
+            snapshot = _SNAPSHOTS.get(kind)
+            if snapshot in superseded:
+                self.coalesced += 1
+                continue
+            if snapshot is not None:
+                superseded.add(snapshot)
+            kept.appendleft((kind, text))
+        outbox.queue = kept
+
+    async def _write(self, outbox: _Outbox) -> None:
+        websocket = outbox.websocket
+        try:
+            while True:
+                if not outbox.queue:
+                    if not outbox.memberships:
+                        return
+                    outbox.ready.clear()
+                    await outbox.ready.wait()
                     continue
+                _, text = outbox.queue.popleft()
+                try:
+                    async with asyncio.timeout(ROOM_HUB_SEND_TIMEOUT_SECONDS):
+                        await websocket.send_text(text)
+                except Exception:
+                    self.send_failures += 1
+                    await self._evict([outbox])
+                    return
+        finally:
+            if self._outboxes.get(websocket) is outbox:
+                del self._outboxes[websocket]
+
+    def _leave(self, outbox: _Outbox, memberships: List[Tuple[str, str]]) -> Set[str]:
+        # Rooms left without sockets.
+        emptied = set()
+        websocket = outbox.websocket
+        for room_code, player_id in memberships:
+            outbox.memberships.discard((room_code, player_id))
+            room = self._rooms.get(room_code)
+            if room is None:
+                continue
+            sockets = room.get(player_id)
+            if sockets is not None:
                 sockets.discard(websocket)
                 if not sockets:
-                    room.pop(pid, None)
+                    del room[player_id]
             if not room:
-                self._rooms.pop(room_code, None)
+                del self._rooms[room_code]
+                emptied.add(room_code)
+        return emptied
 
-    async def broadcast(self, room_code: str, event: dict) -> None:
-        async with self._lock:
-            room = self._rooms.get(room_code, {})
-            targets = [ws for sockets in room.values() for ws in sockets]
-        for websocket in targets:
+    async def _evict(self, outboxes: List[_Outbox]) -> None:
+        emptied: Set[str] = set()
+        for outbox in outboxes:
+            websocket = outbox.websocket
+            if self._outboxes.get(websocket) is not outbox:
+                continue
+            del self._outboxes[websocket]
+            emptied |= self._leave(outbox, list(outbox.memberships))
+            outbox.queue.clear()
+            if outbox.writer is not asyncio.current_task():
+                outbox.writer.cancel()
+            closer = asyncio.create_task(_close(websocket))
+            self._closers.add(closer)
+            closer.add_done_callback(self._closers.discard)
+        for room_code in emptied:
+            await self._sync_subscription(room_code)
+
+    async def _publish(self, room_code: str, player_id: str | None, kind: str | None, text: str) -> None:
+        if not self.pubsub_enabled:
+            return
+        # The event rides along already encoded, so no instance encodes it again.
+        message = {"origin": self.instance_id, "room": room_code, "player_id": player_id, "type": kind, "event": text}
+        client = await get_redis()
+        await client.publish(room_channel(room_code), json.dumps(message, separators=(",", ":")))
+
+    async def _sync_subscription(self, room_code: str) -> None:
+        # Subscribed is marked after SUBSCRIBE returns and unmarked before UNSUBSCRIBE
+        # is sent, so a room whose state matches has no (un)subscribe in flight that
+        # could still undo it.
+        if not self.pubsub_enabled or (room_code in self._rooms) == (room_code in self._subscribed):
+            return
+        async with self._locks[hash(room_code) % len(self._locks)]:
+            if room_code in self._rooms and room_code not in self._subscribed:
+                await self._subscribe(room_code)
+                self._subscribed.add(room_code)
+            elif room_code not in self._rooms and room_code in self._subscribed:
+                self._subscribed.discard(room_code)
+                await self._unsubscribe(room_code)
+
+    async def _subscribe(self, room_code: str) -> None:
+        client = await get_redis()
+        if self._pubsub is None or self._client is not client:
+            await self._close_pubsub()
+            self._client = client
+            self._pubsub = client.pubsub()
+            self._subscribed.clear()
+        await self._pubsub.subscribe(room_channel(room_code))
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen(self._pubsub))
+
+    async def _unsubscribe(self, room_code: str) -> None:
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(room_channel(room_code))
+
+    async def _listen(self, pubsub: PubSub) -> None:
+        # A cancel landing inside redis-py's own wait_for can be swallowed on 3.11, so
+        # the task's cancelling() count is checked instead of trusting CancelledError.
+        while not asyncio.current_task().cancelling():
             try:
-                await websocket.send_json(event)
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    continue
+                envelope = json.loads(message["data"])
+                if envelope["origin"] == self.instance_id:
+                    continue
+                await self._deliver(envelope["room"], envelope["player_id"], envelope["type"], envelope["event"])
+            except asyncio.CancelledError:
+                raise
             except Exception:
-                await self.disconnect(websocket, room_code)
+                logger.exception("Room hub subscriber failed")
+                await asyncio.sleep(1)
 
-    async def send_to_player(self, room_code: str, player_id: str, event: dict) -> None:
-        async with self._lock:
-            room = self._rooms.get(room_code, {})
-            targets = list(room.get(player_id, set()))
-        for websocket in targets:
+    async def _close_pubsub(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
             try:
-                await websocket.send_json(event)
-            except Exception:
-                await self.disconnect(websocket, room_code, player_id)
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+    async def close(self) -> None:
+        writers = [outbox.writer for outbox in self._outboxes.values()]
+        for writer in writers:
+            writer.cancel()
+        await asyncio.gather(*writers, *self._closers, return_exceptions=True)
+        await self._close_pubsub()
+
+
+def _encode(event: dict) -> str:
+    # What WebSocket.send_json would send.
+    return json.dumps(event, separators=(",", ":"), ensure_ascii=False)
+
+
+async def _close(websocket: WebSocket) -> None:
+    try:
+        async with asyncio.timeout(ROOM_HUB_SEND_TIMEOUT_SECONDS):
+            await websocket.close(code=_EVICTED_CLOSE_CODE)
+    except Exception:
+        pass
@@ -1,25 +1,33 @@
-import hashlib
 import json
-import secrets
 from datetime import datetime
 from typing import Optional
 from uuid import UUID, uuid4
 
 from pydantic import BaseModel, Field, ValidationError
+from redis.exceptions import WatchError
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
+from lobby_service import index_room, lobby_entry
+from passwords import hash_password, verify_password
+from redis_scripts import run_script
 from redis_store import (
     ROOMS_ACTIVE_KEY,
+    ROOMS_PLAYING_KEY,
     ROOM_TTL_SECONDS,
     get_redis,
+    lobby_room_key,
+    room_deal_key,
     room_hands_key,
     room_meta_key,
+    room_moves_key,
     room_players_key,
     room_state_key,
 )
-from schemas import Player, Room, RoomStatus
-from user_service import get_user, touch_user_on_join
+from room_codes import room_codes
+from schemas import BotLevel, Player, Room, RoomStatus
+from storage_codec import decode_players, decode_room, encode_player, encode_player_fields, player_hash_keys
+from user_service import User, get_user, touch_user, touch_users_on_join
 
 
 class CreateRoomRequest(BaseModel):
@@ -37,31 +45,44 @@ class LeaveRoomRequest(BaseModel):
     player_id: UUID
 
 
-def _hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode("utf-8")).hexdigest()
+def _room_payload(room: Room) -> dict:
+    return room.model_dump(mode="json", exclude={"password_hash"})
 
 
-def _generate_room_code() -> str:
-    alphabet = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
-    return "".join(secrets.choice(alphabet) for _ in range(6))
+def deserialize_players(players_raw: dict) -> list[Player]:
+    return decode_players(players_raw)
 
 
-def _room_payload(room: Room) -> dict:
-    return room.model_dump(mode="json", exclude={"password_hash"})
+def _player_mapping(player: Player) -> dict:
+    return {str(player.id): encode_player(player), **encode_player_fields([player])}
 
 
-def _serialize_model(model: BaseModel) -> str:
-    return json.dumps(model.model_dump(mode="json"))
+def _new_player(user: User, seat: int, is_host: bool = False) -> Player:
+    return Player(
+        id=uuid4(),
+        user_id=user.id,
+        name=user.name,
+        seat=seat,
+        is_host=is_host,
+        is_ready=False,
+        hand_count=0,
+        score=0,
+        status="active",
+    )
 
 
-def _deserialize_player(raw: str) -> Player:
-    return Player.model_validate(json.loads(raw))
+def _deserialize_room(meta_raw: str, players: list[Player]) -> Room:
+    return decode_room(json.loads(meta_raw), players)
 
 
-def _deserialize_room(meta_raw: str, players: list[Player]) -> Room:
-    meta = json.loads(meta_raw)
-    meta["players"] = players
-    return Room.model_validate(meta)
+async def _read_room(code: str) -> tuple[Optional[str], list[Player]]:
+    # Meta and players in one round trip.
+    client = await get_redis()
+    pipeline = client.pipeline(transaction=False)
+    pipeline.get(room_meta_key(code))
+    pipeline.hgetall(room_players_key(code))
+    meta_raw, players_raw = await pipeline.execute()
+    return meta_raw, deserialize_players(players_raw)
 
 
 async def create_room(request: Request):
@@ -93,40 +114,28 @@ async def create_room(request: Request):
         description: Validation error
       404:
         description: User not found
+      503:
+        description: Too many password checks in progress
     """
     try:
         payload = CreateRoomRequest.model_validate(await request.json())
     except ValidationError as exc:
         return JSONResponse({"error": exc.errors()}, status_code=400)
 
-    client = await get_redis()
-    code = _generate_room_code()
-    while await client.exists(room_meta_key(code)):
-        code = _generate_room_code()
-
     user = await get_user(str(payload.user_id))
     if user is None:
         return JSONResponse({"error": "User not found"}, status_code=404)
 
-    host_id = uuid4()
-    host = Player(
-        id=host_id,
-        user_id=payload.user_id,
-        name=user.name,
-        seat=0,
-        is_host=True,
-        is_ready=False,
-        hand_count=0,
-        score=0,
-        status="active",
-    )
-
-    password_hash = _hash_password(payload.password) if payload.password else None
+    host = _new_player(user, 0, is_host=True)
+    try:
+        password_hash = await hash_password(payload.password) if payload.password else None
+    except ValueError as exc:
+        return JSONResponse({"error": str(exc)}, status_code=503)
     room = Room(
         id=uuid4(),
-        code=code,
+        code="",
         password_hash=password_hash,
-        host_id=host_id,
+        host_id=host.id,
         host_user_id=payload.user_id,
         status=RoomStatus.waiting,
         max_players=payload.max_players,
@@ -135,17 +144,83 @@ async def create_room(request: Request):
         created_at=datetime.utcnow(),
     )
 
-    room_meta = room.model_dump(mode="json", exclude={"players"})
-    pipeline = client.pipeline()
-    pipeline.set(room_meta_key(code), json.dumps(room_meta))
-    pipeline.hset(room_players_key(code), str(host_id), _serialize_model(host))
-    pipeline.sadd(ROOMS_ACTIVE_KEY, code)
-    pipeline.expire(room_meta_key(code), ROOM_TTL_SECONDS)
-    pipeline.expire(room_players_key(code), ROOM_TTL_SECONDS)
-    await pipeline.execute()
+    await insert_room(room)
+    await touch_users_on_join([user])
+    return JSONResponse({"room": _room_payload(room), "player_id": str(host.id)})
+
+
+async def insert_room(room: Room) -> Room:
+    # Picks the room's code and writes the room in the same script call; only a code
+    # claimed concurrently since the pool checked it costs another attempt.
+    player_fields = [item for player in room.players for pair in _player_mapping(player).items() for item in pair]
+    while True:
+        room.code = room_codes.take()
+        meta = json.dumps(room.model_dump(mode="json", exclude={"players"}))
+        index_key, score, summary = lobby_entry(room)
+        keys = [
+            room_meta_key(room.code),
+            room_players_key(room.code),
+            ROOMS_ACTIVE_KEY,
+            index_key,
+            lobby_room_key(room.code),
+        ]
+        args = [meta, ROOM_TTL_SECONDS, room.code, score, summary, *player_fields]
+        if await run_script("create_room", keys, args):
+            return room
+
+
+async def open_room(users: list[User], max_players: int) -> Room:
+    # A public room for a matched group; the first user hosts.
+    players = [_new_player(user, seat, is_host=seat == 0) for seat, user in enumerate(users)]
+    room = Room(
+        id=uuid4(),
+        code="",
+        host_id=players[0].id,
+        host_user_id=users[0].id,
+        status=RoomStatus.waiting,
+        max_players=max_players,
+        players=players,
+        created_at=datetime.utcnow(),
+    )
+    return await insert_room(room)
+
 
-    await touch_user_on_join(str(payload.user_id))
-    return JSONResponse({"room": _room_payload(room), "player_id": str(host_id)})
+async def seat_players(code: str, users: list[User]) -> Optional[tuple[Room, list[Player]]]:
+    # Seats all of ``users`` in an open public room or none of them. The write only
+    # commits if the room's meta and players are unchanged since they were read
+    # (WATCH), so matchers on other instances cannot hand out the same seats.
+    client = await get_redis()
+    async with client.pipeline() as pipeline:
+        try:
+            await pipeline.watch(room_meta_key(code), room_players_key(code))
+            meta_raw = await pipeline.get(room_meta_key(code))
+            if meta_raw is None:
+                return None
+            meta = json.loads(meta_raw)
+            if meta.get("status") not in {RoomStatus.waiting.value, RoomStatus.ready.value}:
+                return None
+            if meta.get("password_hash"):
+                return None
+            players = deserialize_players(await pipeline.hgetall(room_players_key(code)))
+            occupied_seats = {player.seat for player in players}
+            free_seats = [seat for seat in range(meta["max_players"]) if seat not in occupied_seats]
+            if len(free_seats) < len(users):
+                return None
+
+            seated = [_new_player(user, seat) for user, seat in zip(users, free_seats)]
+            meta["status"] = RoomStatus.waiting.value
+            room = _deserialize_room(json.dumps(meta), players + seated)
+            pipeline.multi()
+            for player in seated:
+                pipeline.hset(room_players_key(code), mapping=_player_mapping(player))
+            pipeline.set(room_meta_key(code), json.dumps(meta))
+            index_room(pipeline, room)
+            pipeline.expire(room_meta_key(code), ROOM_TTL_SECONDS)
+            pipeline.expire(room_players_key(code), ROOM_TTL_SECONDS)
+            await pipeline.execute()
+        except WatchError:
+            return None
+    return room, seated
 
 
 async def join_room(request: Request):
@@ -183,10 +258,11 @@ async def join_room(request: Request):
         description: Room or user not found
       409:
         description: Room is full
+      503:
+        description: Too many password checks in progress
     """
     code = request.path_params["code"].upper()
-    client = await get_redis()
-    meta_raw = await client.get(room_meta_key(code))
+    meta_raw, players = await _read_room(code)
     if meta_raw is None:
         return JSONResponse({"error": "Room not found"}, status_code=404)
 
@@ -201,15 +277,23 @@ async def join_room(request: Request):
 
     meta = json.loads(meta_raw)
     password_hash = meta.get("password_hash")
+    upgraded_hash = None
     if password_hash:
-        if not payload.password or _hash_password(payload.password) != password_hash:
+        if not payload.password:
+            return JSONResponse({"error": "Invalid password"}, status_code=403)
+        try:
+            matches, upgraded_hash = await verify_password(payload.password, password_hash)
+        except ValueError as exc:
+            return JSONResponse({"error": str(exc)}, status_code=503)
+        if not matches:
             return JSONResponse({"error": "Invalid password"}, status_code=403)
+        if upgraded_hash is not None:
+            meta["password_hash"] = upgraded_hash
 
-    players_raw = await client.hgetall(room_players_key(code))
-    players = [_deserialize_player(raw) for raw in players_raw.values()]
+    client = await get_redis()
     existing_player = next((player for player in players if player.user_id == payload.user_id), None)
     if existing_player is not None:
-        updated = False
+        updated = upgraded_hash is not None
         if existing_player.name != user.name:
             existing_player.name = user.name
             updated = True
@@ -221,16 +305,16 @@ async def join_room(request: Request):
                 existing_player.is_host = True
                 meta["host_id"] = str(existing_player.id)
                 updated = True
+        room = _deserialize_room(json.dumps(meta), players)
         pipeline = client.pipeline()
         if updated:
-            pipeline.hset(room_players_key(code), str(existing_player.id), _serialize_model(existing_player))
+            pipeline.hset(room_players_key(code), str(existing_player.id), encode_player(existing_player))
             pipeline.set(room_meta_key(code), json.dumps(meta))
+            index_room(pipeline, room)
         pipeline.expire(room_meta_key(code), ROOM_TTL_SECONDS)
         pipeline.expire(room_players_key(code), ROOM_TTL_SECONDS)
+        touch_user(pipeline, user)
         await pipeline.execute()
-
-        room = _deserialize_room(json.dumps(meta), players)
-        await touch_user_on_join(str(payload.user_id))
         return JSONResponse({"room": _room_payload(room), "player_id": str(existing_player.id)})
 
     if len(players) >= meta["max_players"]:
@@ -259,15 +343,15 @@ async def join_room(request: Request):
         score=0,
         status="active",
     )
+    room = _deserialize_room(json.dumps(meta), players + [player])
     pipeline = client.pipeline()
-    pipeline.hset(room_players_key(code), str(player_id), _serialize_model(player))
+    pipeline.hset(room_players_key(code), mapping=_player_mapping(player))
     pipeline.set(room_meta_key(code), json.dumps(meta))
+    index_room(pipeline, room)
     pipeline.expire(room_meta_key(code), ROOM_TTL_SECONDS)
     pipeline.expire(room_players_key(code), ROOM_TTL_SECONDS)
+    touch_user(pipeline, user)
     await pipeline.execute()
-
-    room = _deserialize_room(json.dumps(meta), players + [player])
-    await touch_user_on_join(str(payload.user_id))
     return JSONResponse({"room": _room_payload(room), "player_id": str(player_id)})
 
 
@@ -302,8 +386,7 @@ async def leave_room(request: Request):
         description: Room or player not found
     """
     code = request.path_params["code"].upper()
-    client = await get_redis()
-    meta_raw = await client.get(room_meta_key(code))
+    meta_raw, players = await _read_room(code)
     if meta_raw is None:
         return JSONResponse({"error": "Room not found"}, status_code=404)
 
@@ -312,8 +395,7 @@ async def leave_room(request: Request):
     except ValidationError as exc:
         return JSONResponse({"error": exc.errors()}, status_code=400)
 
-    players_raw = await client.hgetall(room_players_key(code))
-    players = [_deserialize_player(raw) for raw in players_raw.values()]
+    client = await get_redis()
     player = next((p for p in players if p.id == payload.player_id), None)
     if player is None:
         return JSONResponse({"error": "Player not found"}, status_code=404)
@@ -324,30 +406,30 @@ async def leave_room(request: Request):
         meta["status"] = RoomStatus.waiting.value
         pipeline = client.pipeline()
         pipeline.delete(room_players_key(code))
-        pipeline.delete(room_state_key(code))
-        pipeline.delete(room_hands_key(code))
+        pipeline.delete(room_state_key(code), room_hands_key(code), room_deal_key(code), room_moves_key(code))
+        pipeline.zrem(ROOMS_PLAYING_KEY, code)
         pipeline.set(room_meta_key(code), json.dumps(meta))
         pipeline.expire(room_meta_key(code), ROOM_TTL_SECONDS)
-        await pipeline.execute()
         room = _deserialize_room(json.dumps(meta), [])
+        index_room(pipeline, room)
+        await pipeline.execute()
         return JSONResponse({"room": _room_payload(room)})
 
-    meta = json.loads(meta_raw)
-    await client.hdel(room_players_key(code), str(payload.player_id))
-
-    room = _deserialize_room(json.dumps(meta), remaining_players)
+    room = _deserialize_room(meta_raw, remaining_players)
+    pipeline = client.pipeline()
+    pipeline.hdel(room_players_key(code), *player_hash_keys(str(payload.player_id)))
+    index_room(pipeline, room)
+    await pipeline.execute()
     return JSONResponse({"room": _room_payload(room)})
 
 
 async def remove_player(code: str, player_id: UUID) -> Optional[Room]:
     code = code.upper()
-    client = await get_redis()
-    meta_raw = await client.get(room_meta_key(code))
+    meta_raw, players = await _read_room(code)
     if meta_raw is None:
         return None
 
-    players_raw = await client.hgetall(room_players_key(code))
-    players = [_deserialize_player(raw) for raw in players_raw.values()]
+    client = await get_redis()
     player = next((p for p in players if p.id == player_id), None)
     if player is None:
         return _deserialize_room(meta_raw, players)
@@ -358,27 +440,71 @@ async def remove_player(code: str, player_id: UUID) -> Optional[Room]:
         meta["status"] = RoomStatus.waiting.value
         pipeline = client.pipeline()
         pipeline.delete(room_players_key(code))
-        pipeline.delete(room_state_key(code))
-        pipeline.delete(room_hands_key(code))
+        pipeline.delete(room_state_key(code), room_hands_key(code), room_deal_key(code), room_moves_key(code))
+        pipeline.zrem(ROOMS_PLAYING_KEY, code)
         pipeline.set(room_meta_key(code), json.dumps(meta))
         pipeline.expire(room_meta_key(code), ROOM_TTL_SECONDS)
+        room = _deserialize_room(json.dumps(meta), [])
+        index_room(pipeline, room)
         await pipeline.execute()
-        return _deserialize_room(json.dumps(meta), [])
+        return room
 
+    room = _deserialize_room(meta_raw, remaining_players)
+    pipeline = client.pipeline()
+    pipeline.hdel(room_players_key(code), *player_hash_keys(str(player_id)))
+    index_room(pipeline, room)
+    await pipeline.execute()
+    return room
+
+
+async def add_bot(code: str, level: BotLevel) -> Room:
+    code = code.upper()
+    meta_raw, players = await _read_room(code)
+    if meta_raw is None:
+        raise ValueError("Room not found")
     meta = json.loads(meta_raw)
-    await client.hdel(room_players_key(code), str(player_id))
+    if meta.get("status") not in {RoomStatus.waiting.value, RoomStatus.ready.value}:
+        raise ValueError("Game already started")
+
+    if len(players) >= meta["max_players"]:
+        raise ValueError("Room is full")
 
-    return _deserialize_room(json.dumps(meta), remaining_players)
+    occupied_seats = {player.seat for player in players}
+    seat = next(index for index in range(meta["max_players"]) if index not in occupied_seats)
+    bot = Player(
+        id=uuid4(),
+        user_id=uuid4(),
+        name=f"Bot {seat + 1}",
+        seat=seat,
+        is_host=False,
+        is_ready=True,
+        hand_count=0,
+        score=0,
+        status="active",
+        is_bot=True,
+        bot_level=level,
+    )
+    players.append(bot)
+    all_ready = len(players) >= 2 and all(p.is_ready or p.is_host for p in players)
+    meta["status"] = RoomStatus.ready.value if all_ready else RoomStatus.waiting.value
+
+    room = _deserialize_room(json.dumps(meta), players)
+    client = await get_redis()
+    pipeline = client.pipeline()
+    pipeline.hset(room_players_key(code), mapping=_player_mapping(bot))
+    pipeline.set(room_meta_key(code), json.dumps(meta))
+    index_room(pipeline, room)
+    pipeline.expire(room_meta_key(code), ROOM_TTL_SECONDS)
+    pipeline.expire(room_players_key(code), ROOM_TTL_SECONDS)
+    await pipeline.execute()
+    return room
 
 
 async def get_room(code: str) -> Optional[Room]:
     code = code.upper()
-    client = await get_redis()
-    meta_raw = await client.get(room_meta_key(code))
+    meta_raw, players = await _read_room(code)
     if meta_raw is None:
         return None
-    players_raw = await client.hgetall(room_players_key(code))
-    players = [_deserialize_player(raw) for raw in players_raw.values()]
     return _deserialize_room(meta_raw, players)
 
 
@@ -386,34 +512,44 @@ async def get_players(code: str) -> list[Player]:
     code = code.upper()
     client = await get_redis()
     players_raw = await client.hgetall(room_players_key(code))
-    return [_deserialize_player(raw) for raw in players_raw.values()]
+    return deserialize_players(players_raw)
 
 
 async def update_player(code: str, player: Player) -> None:
+    await update_players(code, [player])
+
+
+async def update_players(code: str, players: list[Player], fields: Optional[tuple[str, ...]] = None) -> None:
+    # One HSET for any number of players. With ``fields`` only those counter entries are
+    # written and the player records are left alone.
+    if not players:
+        return
+    if fields is None:
+        mapping = {key: value for player in players for key, value in _player_mapping(player).items()}
+    else:
+        mapping = encode_player_fields(players, fields)
     client = await get_redis()
-    await client.hset(room_players_key(code.upper()), str(player.id), _serialize_model(player))
+    await client.hset(room_players_key(code.upper()), mapping=mapping)
 
 
 async def set_player_status(code: str, player_id: UUID, status: str) -> Optional[Room]:
     code = code.upper()
-    players = await get_players(code)
+    meta_raw, players = await _read_room(code)
+    if meta_raw is None:
+        return None
     player = next((p for p in players if p.id == player_id), None)
-    if player is None:
-        return await get_room(code)
-    if player.status != status:
+    if player is not None and player.status != status:
         player.status = status
-        await update_player(code, player)
-    return await get_room(code)
+        client = await get_redis()
+        await client.hset(room_players_key(code), str(player.id), encode_player(player))
+    return _deserialize_room(meta_raw, players)
 
 
 async def set_player_ready(code: str, player_id: UUID, is_ready: bool) -> Optional[Room]:
     code = code.upper()
-    client = await get_redis()
-    meta_raw = await client.get(room_meta_key(code))
+    meta_raw, players = await _read_room(code)
     if meta_raw is None:
         return None
-    players_raw = await client.hgetall(room_players_key(code))
-    players = [_deserialize_player(raw) for raw in players_raw.values()]
     player = next((p for p in players if p.id == player_id), None)
     if player is None:
         return _deserialize_room(meta_raw, players)
@@ -433,14 +569,17 @@ async def set_player_ready(code: str, player_id: UUID, is_ready: bool) -> Option
             meta["status"] = next_status
             status_updated = True
 
+    room = _deserialize_room(json.dumps(meta), players)
     if updated_player or status_updated:
+        client = await get_redis()
         pipeline = client.pipeline()
         if updated_player:
-            pipeline.hset(room_players_key(code), str(player.id), _serialize_model(player))
+            pipeline.hset(room_players_key(code), mapping=encode_player_fields([player], ("is_ready",)))
         if status_updated:
             pipeline.set(room_meta_key(code), json.dumps(meta))
+            index_room(pipeline, room)
         pipeline.expire(room_meta_key(code), ROOM_TTL_SECONDS)
         pipeline.expire(room_players_key(code), ROOM_TTL_SECONDS)
         await pipeline.execute()
 
-    return _deserialize_room(json.dumps(meta), players)
+    return room
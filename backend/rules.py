@@ -1,16 +1,39 @@
 from __future__ import annotations
 
+import os
+import sys
+import time
 from dataclasses import dataclass
-from typing import Dict, List, Optional
-
+from functools import lru_cache
+from itertools import combinations, product
+from typing import Dict, List, Optional, Tuple
+
+from card_mask import (
+    MAX_RANK,
+    MIN_RANK,
+    NIBBLE_COUNT,
+    RANK_COUNT,
+    SUIT_ORDER,
+    SUITS,
+    THREE_OF_SPADES_MASK,
+    cards_to_mask,
+)
 from schemas import Card, ComboType, LastPlay, Move, Suit
 
-SUIT_ORDER: Dict[Suit, int] = {
-    Suit.spades: 0,
-    Suit.clubs: 1,
-    Suit.diamonds: 2,
-    Suit.hearts: 3,
-}
+_TWO_RANK_INDEX = MAX_RANK - MIN_RANK
+
+# Startup-built index from card mask to Combo. Long straights/pair runs are rare and
+# their counts explode (4^L, 6^L), so they fall back to direct classification.
+COMBO_TABLE_ENABLED = os.getenv("COMBO_TABLE_ENABLED", "1") != "0"
+COMBO_TABLE_MAX_STRAIGHT = 6
+COMBO_TABLE_MAX_PAIR_RUN = 4
+
+# legal_plays results are keyed by (hand, trick, first turn), so any state change
+# naturally misses the cache.
+LEGAL_PLAYS_CACHE_SIZE = 4096
+_RANK_BITS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(1 << (rank_index * 4 + suit_index) for suit_index in range(4)) for rank_index in range(RANK_COUNT)
+)
 
 
 @dataclass(frozen=True)
@@ -21,36 +44,62 @@ class Combo:
     suit: Optional[Suit] = None
 
 
+_SAME_RANK_TYPES: Dict[int, ComboType] = {
+    2: ComboType.pair,
+    3: ComboType.triple,
+    4: ComboType.four_kind,
+}
+
+_combo_table: Dict[int, Combo] = {}
+_combo_table_build_seconds = 0.0
+
+
 def evaluate_combo(cards: List[Card]) -> Combo:
     if not cards:
         raise ValueError("No cards provided")
+    mask = cards_to_mask(cards)
+    if mask.bit_count() != len(cards):
+        raise ValueError("Invalid combo")
+    return evaluate_mask(mask)
 
-    if len(cards) == 1:
-        card = cards[0]
-        return Combo(type=ComboType.single, rank=card.rank, length=1, suit=card.suit)
 
-    counts = _rank_counts(cards)
-    unique_ranks = sorted(counts.keys())
+def evaluate_mask(mask: int) -> Combo:
+    combo = _combo_table.get(mask)
+    if combo is not None:
+        return combo
+    return _classify_mask(mask)
 
-    if len(cards) == 2 and len(counts) == 1:
-        return Combo(type=ComboType.pair, rank=unique_ranks[0], length=2)
 
-    if len(cards) == 3 and len(counts) == 1:
-        return Combo(type=ComboType.triple, rank=unique_ranks[0], length=3)
-
-    if len(cards) == 4 and len(counts) == 1:
-        return Combo(type=ComboType.four_kind, rank=unique_ranks[0], length=4)
+def _classify_mask(mask: int) -> Combo:
+    if not mask:
+        raise ValueError("No cards provided")
 
-    if _is_consecutive_pairs(cards, counts):
-        high_rank = max(unique_ranks)
+    total = mask.bit_count()
+    low_index = (mask & -mask).bit_length() - 1
+    if total == 1:
         return Combo(
-            type=ComboType.consecutive_pairs,
-            rank=high_rank,
-            length=len(cards) // 2,
+            type=ComboType.single,
+            rank=MIN_RANK + (low_index >> 2),
+            length=1,
+            suit=SUITS[low_index & 3],
         )
 
-    if _is_straight(unique_ranks, len(cards)):
-        return Combo(type=ComboType.straight, rank=max(unique_ranks), length=len(cards))
+    low_rank = low_index >> 2
+    high_rank = (mask.bit_length() - 1) >> 2
+    span = high_rank - low_rank + 1
+
+    if span == 1:
+        combo_type = _SAME_RANK_TYPES.get(total)
+        if combo_type is not None:
+            return Combo(type=combo_type, rank=MIN_RANK + high_rank, length=total)
+        raise ValueError("Invalid combo")
+
+    # Runs never include 2s, and every rank in the span must hold the same count.
+    if span >= 3 and high_rank < _TWO_RANK_INDEX:
+        if total == span and _uniform_ranks(mask >> (low_rank * 4), span, 1):
+            return Combo(type=ComboType.straight, rank=MIN_RANK + high_rank, length=span)
+        if total == span * 2 and _uniform_ranks(mask >> (low_rank * 4), span, 2):
+            return Combo(type=ComboType.consecutive_pairs, rank=MIN_RANK + high_rank, length=span)
 
     raise ValueError("Invalid combo")
 
@@ -72,6 +121,19 @@ def can_beat(candidate: Combo, last: Combo) -> bool:
     return False
 
 
+def beats(candidate: Combo, last: Combo) -> bool:
+    if candidate.type != last.type:
+        return _can_special_beat(candidate, last)
+    return can_beat(candidate, last) or _can_special_upgrade(candidate, last)
+
+
+def validate_play_mask(mask: int, last_mask: int = 0) -> Combo:
+    candidate = evaluate_mask(mask)
+    if last_mask and not beats(candidate, evaluate_mask(last_mask)):
+        raise ValueError("Move does not beat last play")
+    return candidate
+
+
 def validate_move(move: Move, last_play: Optional[LastPlay]) -> Optional[LastPlay]:
     if move.type == "pass":
         if last_play is None:
@@ -85,46 +147,125 @@ def validate_move(move: Move, last_play: Optional[LastPlay]) -> Optional[LastPla
         raise ValueError("Play requires cards")
 
     candidate = evaluate_combo(move.cards)
-    if last_play is not None:
-        last_combo = evaluate_combo(last_play.cards)
-        if candidate.type != last_combo.type:
-            if not _can_special_beat(candidate, last_combo):
-                raise ValueError("Move does not beat last play")
-        else:
-            if not can_beat(candidate, last_combo) and not _can_special_upgrade(candidate, last_combo):
-                raise ValueError("Move does not beat last play")
+    if last_play is not None and not beats(candidate, evaluate_combo(last_play.cards)):
+        raise ValueError("Move does not beat last play")
 
     return LastPlay(type=candidate.type, cards=move.cards, by_player_id=move.by_player_id)
 
 
-def detect_win(remaining_cards: int) -> bool:
-    return remaining_cards == 0
-
-
-def _rank_counts(cards: List[Card]) -> Dict[int, int]:
-    counts: Dict[int, int] = {}
-    for card in cards:
-        counts[card.rank] = counts.get(card.rank, 0) + 1
-    return counts
+@lru_cache(maxsize=LEGAL_PLAYS_CACHE_SIZE)
+def hand_combos(hand_mask: int) -> Tuple[int, ...]:
+    combos: List[int] = []
+    singles_by_rank: List[List[int]] = []
+    pairs_by_rank: List[List[int]] = []
+    for rank_index in range(RANK_COUNT):
+        bits = [bit for bit in _RANK_BITS[rank_index] if hand_mask & bit]
+        pairs = [first | second for first, second in combinations(bits, 2)]
+        singles_by_rank.append(bits)
+        pairs_by_rank.append(pairs)
+        combos.extend(bits)
+        combos.extend(pairs)
+        combos.extend(sum(chosen) for chosen in combinations(bits, 3))
+        if len(bits) == 4:
+            combos.append(sum(bits))
+    combos.extend(_runs(singles_by_rank))
+    combos.extend(_runs(pairs_by_rank))
+    return tuple(combos)
+
+
+@lru_cache(maxsize=LEGAL_PLAYS_CACHE_SIZE)
+def legal_plays(hand_mask: int, last_mask: int = 0, first_turn: bool = False) -> Tuple[int, ...]:
+    combos = hand_combos(hand_mask)
+    if first_turn:
+        combos = tuple(mask for mask in combos if mask & THREE_OF_SPADES_MASK)
+    if not last_mask:
+        return combos
+
+    last = evaluate_mask(last_mask)
+    last_size = last_mask.bit_count()
+    plays: List[int] = []
+    for mask in combos:
+        size = mask.bit_count()
+        # Only four of a kind and pair runs can beat a trick of a different size.
+        if size != last_size and size < 4:
+            continue
+        if beats(evaluate_mask(mask), last):
+            plays.append(mask)
+    return tuple(plays)
 
 
-def _is_straight(unique_ranks: List[int], total_cards: int) -> bool:
-    if total_cards < 3 or len(unique_ranks) != total_cards:
-        return False
-    if 15 in unique_ranks:
-        return False
-    return all(b - a == 1 for a, b in zip(unique_ranks, unique_ranks[1:]))
+def detect_win(remaining_cards: int) -> bool:
+    return remaining_cards == 0
 
 
-def _is_consecutive_pairs(cards: List[Card], counts: Dict[int, int]) -> bool:
-    if len(cards) < 6 or len(cards) % 2 != 0:
-        return False
-    if any(count != 2 for count in counts.values()):
-        return False
-    unique_ranks = sorted(counts.keys())
-    if 15 in unique_ranks:
-        return False
-    return all(b - a == 1 for a, b in zip(unique_ranks, unique_ranks[1:]))
+def build_combo_table(
+    max_straight: int = COMBO_TABLE_MAX_STRAIGHT,
+    max_pair_run: int = COMBO_TABLE_MAX_PAIR_RUN,
+) -> Dict[int, Combo]:
+    table: Dict[int, Combo] = {}
+    for rank_index in range(RANK_COUNT):
+        rank = MIN_RANK + rank_index
+        suit_bits = [1 << (rank_index * 4 + suit_index) for suit_index in range(4)]
+        for suit_index, bit in enumerate(suit_bits):
+            table[bit] = Combo(type=ComboType.single, rank=rank, length=1, suit=SUITS[suit_index])
+        for size, combo_type in _SAME_RANK_TYPES.items():
+            combo = Combo(type=combo_type, rank=rank, length=size)
+            for chosen in combinations(suit_bits, size):
+                table[sum(chosen)] = combo
+    _add_runs(table, ComboType.straight, 1, max_straight)
+    _add_runs(table, ComboType.consecutive_pairs, 2, max_pair_run)
+    return table
+
+
+def configure_combo_table(enabled: bool) -> None:
+    global _combo_table, _combo_table_build_seconds
+    started = time.perf_counter()
+    _combo_table = build_combo_table() if enabled else {}
+    _combo_table_build_seconds = time.perf_counter() - started
+
+
+def combo_table_stats() -> Dict[str, float]:
+    distinct_combos = {id(combo): combo for combo in _combo_table.values()}
+    size_bytes = sys.getsizeof(_combo_table)
+    size_bytes += sum(sys.getsizeof(mask) for mask in _combo_table)
+    size_bytes += sum(sys.getsizeof(combo) + sys.getsizeof(combo.__dict__) for combo in distinct_combos.values())
+    return {
+        "entries": len(_combo_table),
+        "distinct_combos": len(distinct_combos),
+        "bytes": size_bytes,
+        "build_seconds": _combo_table_build_seconds,
+    }
+
+
+def _add_runs(table: Dict[int, Combo], combo_type: ComboType, per_rank: int, max_length: int) -> None:
+    rank_choices = [
+        [sum(1 << (rank_index * 4 + suit) for suit in chosen) for chosen in combinations(range(4), per_rank)]
+        for rank_index in range(_TWO_RANK_INDEX)
+    ]
+    for length in range(3, max_length + 1):
+        for low in range(_TWO_RANK_INDEX - length + 1):
+            combo = Combo(type=combo_type, rank=MIN_RANK + low + length - 1, length=length)
+            for parts in product(*rank_choices[low : low + length]):
+                table[sum(parts)] = combo
+
+
+def _runs(options_by_rank: List[List[int]]) -> List[int]:
+    runs: List[int] = []
+    for low in range(_TWO_RANK_INDEX - 2):
+        high = low
+        while high < _TWO_RANK_INDEX and options_by_rank[high]:
+            high += 1
+        for end in range(low + 3, high + 1):
+            runs.extend(sum(parts) for parts in product(*options_by_rank[low:end]))
+    return runs
+
+
+def _uniform_ranks(shifted: int, span: int, count: int) -> bool:
+    for _ in range(span):
+        if NIBBLE_COUNT[shifted & 0xF] != count:
+            return False
+        shifted >>= 4
+    return True
 
 
 def _can_special_beat(candidate: Combo, last: Combo) -> bool:
@@ -146,3 +287,6 @@ def _can_special_upgrade(candidate: Combo, last: Combo) -> bool:
     if candidate.type == ComboType.consecutive_pairs and last.type == ComboType.consecutive_pairs:
         return candidate.length == 4 and last.length == 3 and candidate.rank > last.rank
     return False
+
+
+configure_combo_table(COMBO_TABLE_ENABLED)
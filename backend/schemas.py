@@ -24,6 +24,19 @@ class ComboType(str, Enum):
     four_kind = "four_kind"
 
 
+class SpecialHand(str, Enum):
+    four_twos = "four_twos"
+    dragon_straight = "dragon_straight"
+    five_consecutive_pairs = "five_consecutive_pairs"
+    six_pairs = "six_pairs"
+
+
+class BotLevel(str, Enum):
+    easy = "easy"
+    normal = "normal"
+    hard = "hard"
+
+
 class RoomStatus(str, Enum):
     waiting = "waiting"
     ready = "ready"
@@ -56,6 +69,8 @@ class Player(BaseModel):
     hand_count: int = 0
     score: int = 0
     status: str = "active"
+    is_bot: bool = False
+    bot_level: Optional[BotLevel] = None
 
 
 class Room(BaseModel):
@@ -70,6 +85,8 @@ class Room(BaseModel):
     players: List[Player] = []
     created_at: datetime
     games_played: int = 0
+    # Game state version the room's next game continues from.
+    state_version: int = 0
 
 
 class LastPlay(BaseModel):
@@ -79,7 +96,7 @@ class LastPlay(BaseModel):
 
 
 class Move(BaseModel):
-    type: str = Field(description="play|pass")
+    type: str = Field(description="start|play|pass|end")
     cards: Optional[List[Card]] = None
     by_player_id: UUID
     ts: datetime
@@ -96,3 +113,7 @@ class GameState(BaseModel):
     winner_id: Optional[UUID] = None
     first_game: bool = False
     first_turn_required: bool = False
+    move_count: int = 0
+    turn_deadline: Optional[datetime] = None
+    # Bumped by every change clients see; keeps increasing across the room's games.
+    version: int = 0
@@ -0,0 +1,261 @@
+import argparse
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from card_mask import cards_to_mask, mask_to_cards
+from game_engine import (
+    deal_from_seed,
+    end_game_deltas,
+    find_start_player,
+    find_three_of_spades_holder,
+    pass_step,
+    play_step,
+)
+from policies import POLICIES, TurnView, get_policy
+from solver import detect_special_hand
+
+# Headless Tien Len: the same rules and scoring as game_service, with seats as
+# plain ints and hands as card masks, so games run without Redis or WebSockets.
+
+MAX_MOVES_PER_GAME = 2000
+
+
+@dataclass
+class SimulatedGame:
+    hands: List[int]
+    current: int
+    first_turn_required: bool
+    scores: List[int]
+    last_mask: int = 0
+    last_seat: Optional[int] = None
+    pass_count: int = 0
+    winner: Optional[int] = None
+    moves: int = 0
+    chops: int = 0
+
+    @classmethod
+    def deal(cls, players: int, deal_seed: int, first_game: bool = True) -> "SimulatedGame":
+        # Same deal as game_service.start_game for the same seed and seat order.
+        seats = list(range(players))
+        hands = deal_from_seed(seats, deal_seed)
+        return cls(
+            hands=[cards_to_mask(hands[seat]) for seat in seats],
+            current=find_start_player(hands),
+            first_turn_required=first_game and find_three_of_spades_holder(hands) is not None,
+            scores=[0] * players,
+        )
+
+    def view(self) -> TurnView:
+        players = len(self.hands)
+        return TurnView(
+            hand_mask=self.hands[self.current],
+            last_mask=self.last_mask,
+            first_turn=self.first_turn_required,
+            opponent_counts=tuple(
+                self.hands[(self.current + offset) % players].bit_count() for offset in range(1, players)
+            ),
+        )
+
+    def play(self, mask: int) -> None:
+        if self.winner is not None:
+            raise ValueError("Game already finished")
+        remaining, _, delta = play_step(self.hands[self.current], mask, self.first_turn_required, self.last_mask)
+        if delta > 0 and self.last_seat is not None:
+            self.scores[self.current] += delta
+            self.scores[self.last_seat] -= delta
+            self.chops += 1
+
+        self.hands[self.current] = remaining
+        self.last_mask = mask
+        self.last_seat = self.current
+        self.pass_count = 0
+        self.first_turn_required = False
+        self.moves += 1
+        if not self.hands[self.current]:
+            self.winner = self.current
+            standings = [(seat, hand.bit_count(), seat) for seat, hand in enumerate(self.hands)]
+            for seat, delta in end_game_deltas(standings).items():
+                self.scores[seat] += delta
+        self.current = (self.current + 1) % len(self.hands)
+
+    def pass_turn(self) -> None:
+        self.pass_count, trick_over = pass_step(len(self.hands), self.pass_count, self.last_seat is not None)
+        self.moves += 1
+        if trick_over:
+            self.current = self.last_seat
+            self.last_mask = 0
+            self.last_seat = None
+        else:
+            self.current = (self.current + 1) % len(self.hands)
+
+
+@dataclass
+class GameResult:
+    seed: int
+    winner: int
+    scores: Tuple[int, ...]
+    moves: int
+    chops: int
+    special_hands: int
+
+
+@dataclass
+class SimulationSummary:
+    games: int = 0
+    moves: int = 0
+    chops: int = 0
+    special_hands: int = 0
+    wins_by_seat: Counter = field(default_factory=Counter)
+    wins_by_policy: Counter = field(default_factory=Counter)
+    scores_by_seat: Counter = field(default_factory=Counter)
+    scores_by_policy: Counter = field(default_factory=Counter)
+
+    def add(self, result: GameResult, policy_names: Sequence[str]) -> None:
+        self.games += 1
+        self.moves += result.moves
+        self.chops += result.chops
+        self.special_hands += result.special_hands
+        self.wins_by_seat[result.winner] += 1
+        self.wins_by_policy[policy_names[result.winner]] += 1
+        for seat, score in enumerate(result.scores):
+            self.scores_by_seat[seat] += score
+            self.scores_by_policy[policy_names[seat]] += score
+
+    def merge(self, other: "SimulationSummary") -> None:
+        self.games += other.games
+        self.moves += other.moves
+        self.chops += other.chops
+        self.special_hands += other.special_hands
+        self.wins_by_seat.update(other.wins_by_seat)
+        self.wins_by_policy.update(other.wins_by_policy)
+        self.scores_by_seat.update(other.scores_by_seat)
+        self.scores_by_policy.update(other.scores_by_policy)
+
+
+def replay_game(deal_seed: int, players: int, moves: Iterable[int], first_game: bool = True) -> SimulatedGame:
+    # Re-runs a recorded game (0 = pass) from its deal seed; raises ValueError on the
+    # first move the current rules reject.
+    game = SimulatedGame.deal(players, deal_seed, first_game)
+    for mask in moves:
+        if mask:
+            game.play(mask)
+        else:
+            game.pass_turn()
+    return game
+
+
+def play_game(seed: int, policy_names: Sequence[str], trace: bool = False) -> GameResult:
+    rng = random.Random(seed)
+    game = SimulatedGame.deal(len(policy_names), seed)
+    policies = [get_policy(name) for name in policy_names]
+    special_hands = sum(1 for hand in game.hands if detect_special_hand(hand) is not None)
+    while game.winner is None:
+        if game.moves >= MAX_MOVES_PER_GAME:
+            raise RuntimeError(f"Game {seed} did not finish in {MAX_MOVES_PER_GAME} moves")
+        seat = game.current
+        mask = policies[seat](game.view(), rng)
+        if trace:
+            cards = " ".join(f"{card.rank}{card.suit.value}" for card in mask_to_cards(mask)) or "pass"
+            print(f"{game.moves:4d} seat {seat}: {cards}")
+        if mask:
+            game.play(mask)
+        else:
+            game.pass_turn()
+    return GameResult(
+        seed=seed,
+        winner=game.winner,
+        scores=tuple(game.scores),
+        moves=game.moves,
+        chops=game.chops,
+        special_hands=special_hands,
+    )
+
+
+def run_batch(first_seed: int, count: int, policy_names: Sequence[str]) -> SimulationSummary:
+    summary = SimulationSummary()
+    for seed in range(first_seed, first_seed + count):
+        summary.add(play_game(seed, policy_names), policy_names)
+    return summary
+
+
+def simulate(
+    games: int,
+    policy_names: Sequence[str],
+    seed: int = 0,
+    workers: int = 1,
+    chunk_size: int = 500,
+) -> SimulationSummary:
+    # Game i always uses seed + i, so any single game can be replayed regardless of
+    # how the run was split across workers.
+    chunks = [(seed + start, min(chunk_size, games - start)) for start in range(0, games, chunk_size)]
+    summary = SimulationSummary()
+    if workers <= 1:
+        for first_seed, count in chunks:
+            summary.merge(run_batch(first_seed, count, policy_names))
+        return summary
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_batch, first_seed, count, policy_names) for first_seed, count in chunks]
+        for future in futures:
+            summary.merge(future.result())
+    return summary
+
+
+def _print_summary(summary: SimulationSummary, policy_names: Sequence[str], elapsed: float) -> None:
+    games = max(summary.games, 1)
+    print(f"games:           {summary.games}")
+    print(f"elapsed:         {elapsed:.2f}s ({summary.games / elapsed:,.0f} games/sec)")
+    print(f"moves per game:  {summary.moves / games:.1f}")
+    print(f"chops per game:  {summary.chops / games:.3f}")
+    print(f"special hands:   {summary.special_hands}")
+    for seat, name in enumerate(policy_names):
+        wins = summary.wins_by_seat[seat]
+        print(
+            f"seat {seat} ({name:>6}): wins {wins:>8} ({wins / games:6.1%}), "
+            f"score total {summary.scores_by_seat[seat]:>+9}"
+        )
+    if len(set(policy_names)) > 1:
+        for name in sorted(set(policy_names)):
+            seats = policy_names.count(name)
+            print(
+                f"policy {name:>6}: win rate per seat {summary.wins_by_policy[name] / games / seats:6.1%}, "
+                f"score total {summary.scores_by_policy[name]:>+9}"
+            )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run headless Tien Len self-play games.")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument(
+        "--policies",
+        default="greedy,lowest,random,lowest",
+        help=f"comma-separated policy per seat (2-4 seats); choices: {', '.join(POLICIES)}",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="game i uses seed + i")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--replay", type=int, help="play the single game with this seed and print every move")
+    args = parser.parse_args(argv)
+
+    policy_names = [name.strip() for name in args.policies.split(",") if name.strip()]
+    if not 2 <= len(policy_names) <= 4:
+        parser.error("--policies needs between 2 and 4 seats")
+    for name in policy_names:
+        get_policy(name)
+
+    if args.replay is not None:
+        result = play_game(args.replay, policy_names, trace=True)
+        print(f"winner: seat {result.winner}, scores: {list(result.scores)}")
+        return
+
+    started = time.perf_counter()
+    summary = simulate(args.games, policy_names, args.seed, args.workers, args.chunk_size)
+    _print_summary(summary, policy_names, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from card_mask import MAX_RANK, MIN_RANK, NIBBLE_COUNT, RANK_COUNT, RANK_MASKS, TWOS_MASK
+from schemas import ComboType, SpecialHand
+
+_TWO_RANK_INDEX = MAX_RANK - MIN_RANK
+_COUNT_BITS = 3
+_COUNT_FIELD = (1 << _COUNT_BITS) - 1
+_SAME_RANK_TYPES = {
+    1: ComboType.single,
+    2: ComboType.pair,
+    3: ComboType.triple,
+    4: ComboType.four_kind,
+}
+
+# A plan step is (combo type, lowest rank index, number of ranks, cards per rank).
+PlanStep = Tuple[ComboType, int, int, int]
+Plan = Tuple[PlanStep, ...]
+
+# Solutions only depend on the rank-count vector, never on suits, and there are far
+# fewer distinct vectors than hands, so the memo is shared by every solve. It is
+# dropped wholesale once it grows past MEMO_LIMIT entries.
+MEMO_LIMIT = 500_000
+_memo: Dict[int, Plan] = {0: ()}
+
+
+@dataclass(frozen=True)
+class HandAnalysis:
+    hand_mask: int
+    combos: Tuple[int, ...]
+    four_kind_ranks: Tuple[int, ...]
+    longest_pair_run: int
+    special: Optional[SpecialHand] = None
+
+    @property
+    def combo_count(self) -> int:
+        return len(self.combos)
+
+
+def solve_hand(hand_mask: int) -> HandAnalysis:
+    if len(_memo) > MEMO_LIMIT:
+        clear_cache()
+    counts = _pack_counts(hand_mask)
+    plan = _solve(counts)
+    return HandAnalysis(
+        hand_mask=hand_mask,
+        combos=_assign_cards(hand_mask, plan),
+        four_kind_ranks=tuple(
+            MIN_RANK + index for index, rank_mask in enumerate(RANK_MASKS) if hand_mask & rank_mask == rank_mask
+        ),
+        longest_pair_run=_longest_run(counts, 2),
+        special=detect_special_hand(hand_mask),
+    )
+
+
+def solve_hands(hand_masks: Iterable[int]) -> List[HandAnalysis]:
+    solved: Dict[int, HandAnalysis] = {}
+    results: List[HandAnalysis] = []
+    for hand_mask in hand_masks:
+        analysis = solved.get(hand_mask)
+        if analysis is None:
+            analysis = solved[hand_mask] = solve_hand(hand_mask)
+        results.append(analysis)
+    return results
+
+
+def min_combo_count(hand_mask: int) -> int:
+    if len(_memo) > MEMO_LIMIT:
+        clear_cache()
+    return len(_solve(_pack_counts(hand_mask)))
+
+
+def detect_special_hand(hand_mask: int) -> Optional[SpecialHand]:
+    if hand_mask & TWOS_MASK == TWOS_MASK:
+        return SpecialHand.four_twos
+    counts = _pack_counts(hand_mask)
+    if _longest_run(counts, 1) >= _TWO_RANK_INDEX:
+        return SpecialHand.dragon_straight
+    if _longest_run(counts, 2) >= 5:
+        return SpecialHand.five_consecutive_pairs
+    if sum(NIBBLE_COUNT[(hand_mask >> (index * 4)) & 0xF] // 2 for index in range(RANK_COUNT)) >= 6:
+        return SpecialHand.six_pairs
+    return None
+
+
+def clear_cache() -> None:
+    _memo.clear()
+    _memo[0] = ()
+
+
+def _pack_counts(hand_mask: int) -> int:
+    counts = 0
+    for index in range(RANK_COUNT):
+        counts |= NIBBLE_COUNT[(hand_mask >> (index * 4)) & 0xF] << (index * _COUNT_BITS)
+    return counts
+
+
+def _count_at(counts: int, index: int) -> int:
+    return (counts >> (index * _COUNT_BITS)) & _COUNT_FIELD
+
+
+def _solve(counts: int) -> Plan:
+    plan = _memo.get(counts)
+    if plan is not None:
+        return plan
+
+    # The lowest remaining card must open some combo, and no combo can reach below it,
+    # so only combos starting at that rank need to be tried.
+    low = 0
+    while not _count_at(counts, low):
+        low += 1
+    shift = low * _COUNT_BITS
+    available = _count_at(counts, low)
+
+    best: Optional[Plan] = None
+    for size in range(available, 0, -1):
+        rest = _solve(counts - (size << shift))
+        if best is None or len(rest) + 1 < len(best):
+            best = ((_SAME_RANK_TYPES[size], low, 1, size),) + rest
+
+    for per_rank, combo_type in ((2, ComboType.consecutive_pairs), (1, ComboType.straight)):
+        remaining = counts
+        length = 0
+        while low + length < _TWO_RANK_INDEX and _count_at(counts, low + length) >= per_rank:
+            remaining -= per_rank << ((low + length) * _COUNT_BITS)
+            length += 1
+            if length >= 3:
+                rest = _solve(remaining)
+                if len(rest) + 1 < len(best):
+                    best = ((combo_type, low, length, per_rank),) + rest
+
+    _memo[counts] = best
+    return best
+
+
+def _longest_run(counts: int, per_rank: int) -> int:
+    longest = current = 0
+    for index in range(_TWO_RANK_INDEX):
+        current = current + 1 if _count_at(counts, index) >= per_rank else 0
+        longest = max(longest, current)
+    return longest
+
+
+def _assign_cards(hand_mask: int, plan: Plan) -> Tuple[int, ...]:
+    remaining = hand_mask
+    combos: List[int] = []
+    for _, low, length, per_rank in plan:
+        combo = 0
+        for index in range(low, low + length):
+            rank_bits = remaining & RANK_MASKS[index]
+            for _ in range(per_rank):
+                bit = rank_bits & -rank_bits
+                combo |= bit
+                rank_bits ^= bit
+        remaining &= ~combo
+        combos.append(combo)
+    return tuple(combos)
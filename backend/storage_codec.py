@@ -0,0 +1,234 @@
+import json
+import os
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Type, TypeVar
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from card_mask import cards_to_mask, mask_to_cards
+from redis_store import PLAYER_COUNTER_FIELDS, player_field
+from schemas import (
+    BotLevel,
+    Card,
+    ComboType,
+    GameState,
+    GameStatus,
+    LastPlay,
+    Player,
+    Room,
+    RoomStatus,
+)
+
+# Versioned compact encodings for room:{code}:hands and room:{code}:state. The Redis
+# client decodes responses as text, so every format stays ASCII:
+#   hand  "h1:<hex card mask>"  (at most 13 hex digits for the 52-bit deck)
+#   state "s4|room|status|order|turn|last play|pass count|winner|flags||moves|deadline|version"
+# with UUIDs as 32-digit hex, every player reference as an index into the order and
+# the turn deadline in epoch milliseconds. Readers accept the old pydantic JSON too,
+# so rooms written before the switch keep working; "s1|" to "s3|" records lack the
+# trailing fields, which read as move 0, no deadline and the move count as the
+# version. COMPACT_STORAGE_ENABLED=0 keeps writing JSON during a mixed rollout.
+# Everything read back here was written by this server from validated models, so
+# decoding skips pydantic validation; client payloads are still validated.
+COMPACT_STORAGE_ENABLED = os.getenv("COMPACT_STORAGE_ENABLED", "1") != "0"
+UUID_CACHE_SIZE = 65536
+
+HAND_PREFIX = "h1:"
+STATE_PREFIX = "s4|"
+_STATE_VERSIONS = ("s1", "s2", "s3", "s4")
+# Values for the fields added after s1, in order: move count, turn deadline, version
+# (empty: the move count). s1 has 10 fields.
+_STATE_ADDED_DEFAULTS = ("0", "", "")
+
+_STATUSES = list(GameStatus)
+_COMBO_TYPES = list(ComboType)
+_FIRST_GAME = 1
+_FIRST_TURN_REQUIRED = 2
+
+M = TypeVar("M", bound=BaseModel)
+_new_object = object.__new__
+_set_attribute = object.__setattr__
+
+
+def encode_cards_json(cards: List[Card]) -> str:
+    return json.dumps([card.model_dump(mode="json") for card in cards])
+
+
+def decode_cards_json(raw: str) -> List[Card]:
+    return [Card.model_validate(item) for item in json.loads(raw)]
+
+
+def encode_hand(hand_mask: int) -> str:
+    if not COMPACT_STORAGE_ENABLED:
+        return encode_cards_json(mask_to_cards(hand_mask))
+    return f"{HAND_PREFIX}{hand_mask:x}"
+
+
+def decode_hand(raw: str) -> int:
+    if raw.startswith(HAND_PREFIX):
+        return int(raw[len(HAND_PREFIX):], 16)
+    return cards_to_mask(decode_cards_json(raw))
+
+
+def encode_state(state: GameState) -> str:
+    if not COMPACT_STORAGE_ENABLED:
+        return json.dumps(state.model_dump(mode="json"))
+    order = state.players_order
+    seat = {player_id: index for index, player_id in enumerate(order)}
+    last_play = ""
+    if state.last_play is not None:
+        play = state.last_play
+        last_play = f"{_COMBO_TYPES.index(play.type)}.{cards_to_mask(play.cards):x}.{seat[play.by_player_id]}"
+    flags = (_FIRST_GAME if state.first_game else 0) | (_FIRST_TURN_REQUIRED if state.first_turn_required else 0)
+    return "|".join(
+        (
+            STATE_PREFIX[:-1],
+            state.room_id.hex,
+            str(_STATUSES.index(state.status)),
+            ",".join(player_id.hex for player_id in order),
+            str(seat[state.current_turn]),
+            last_play,
+            str(state.pass_count),
+            str(seat[state.winner_id]) if state.winner_id is not None else "",
+            str(flags),
+            # Once the special hands, now kept with the deal; left empty for the layout.
+            "",
+            str(state.move_count),
+            str(round(state.turn_deadline.timestamp() * 1000)) if state.turn_deadline is not None else "",
+            str(state.version),
+        )
+    )
+
+
+def decode_state(raw: str) -> GameState:
+    if raw[:2] not in _STATE_VERSIONS or raw[2:3] != "|":
+        return GameState.model_validate(json.loads(raw))
+    fields = raw.split("|")
+    fields.extend(_STATE_ADDED_DEFAULTS[len(fields) - 10:])
+    _, room_id, status, order_raw, current, last_raw, pass_count, winner, flags_raw, _ = fields[:10]
+    moves, deadline, version = fields[10:]
+    order = [_uuid(player_hex) for player_hex in order_raw.split(",")] if order_raw else []
+    last_play: Optional[LastPlay] = None
+    if last_raw:
+        combo_type, mask, by_player = last_raw.split(".")
+        last_play = _trusted(
+            LastPlay,
+            {
+                "type": _COMBO_TYPES[int(combo_type)],
+                "cards": mask_to_cards(int(mask, 16)),
+                "by_player_id": order[int(by_player)],
+            },
+        )
+    flags = int(flags_raw)
+    return _trusted(
+        GameState,
+        {
+            "room_id": _uuid(room_id),
+            "status": _STATUSES[int(status)],
+            "deck": [],
+            "players_order": order,
+            "current_turn": order[int(current)],
+            "last_play": last_play,
+            "pass_count": int(pass_count),
+            "winner_id": order[int(winner)] if winner else None,
+            "first_game": bool(flags & _FIRST_GAME),
+            "first_turn_required": bool(flags & _FIRST_TURN_REQUIRED),
+            "move_count": int(moves),
+            "turn_deadline": datetime.fromtimestamp(int(deadline) / 1000, tz=timezone.utc) if deadline else None,
+            "version": int(version or moves),
+        },
+    )
+
+
+# Players and room meta stay JSON; only their UUID, enum and datetime fields need
+# converting. A player is a JSON record under its id plus one hash entry per counter
+# field; records from before the split still carry the counters themselves.
+def encode_player(player: Player) -> str:
+    return json.dumps(player.model_dump(mode="json", exclude=set(PLAYER_COUNTER_FIELDS)))
+
+
+def encode_player_fields(
+    players: Iterable[Player], fields: Sequence[str] = PLAYER_COUNTER_FIELDS
+) -> Dict[str, str]:
+    mapping = {}
+    for player in players:
+        for field in fields:
+            value = getattr(player, field)
+            mapping[player_field(str(player.id), field)] = str(int(value))
+    return mapping
+
+
+def player_hash_keys(player_id: str) -> List[str]:
+    return [player_id, *(player_field(player_id, field) for field in PLAYER_COUNTER_FIELDS)]
+
+
+def decode_players(players_raw: Dict[str, str]) -> List[Player]:
+    counters: Dict[str, Dict[str, str]] = {}
+    records = []
+    for key, value in players_raw.items():
+        player_id, _, field = key.partition(":")
+        if field:
+            counters.setdefault(player_id, {})[field] = value
+        else:
+            records.append((key, value))
+    return [decode_player(raw, counters.get(player_id)) for player_id, raw in records]
+
+
+def decode_player(raw: str, counters: Optional[Dict[str, str]] = None) -> Player:
+    data = {**_PLAYER_DEFAULTS, **json.loads(raw)}
+    data["id"] = _uuid(data["id"])
+    data["user_id"] = _uuid(data["user_id"])
+    if data["bot_level"] is not None:
+        data["bot_level"] = BotLevel(data["bot_level"])
+    if counters:
+        if "score" in counters:
+            data["score"] = int(counters["score"])
+        if "hand_count" in counters:
+            data["hand_count"] = int(counters["hand_count"])
+        if "is_ready" in counters:
+            data["is_ready"] = counters["is_ready"] == "1"
+    return _trusted(Player, data)
+
+
+def decode_room(meta: dict, players: List[Player]) -> Room:
+    data = {**_ROOM_DEFAULTS, **meta}
+    data["id"] = _uuid(data["id"])
+    data["host_id"] = _uuid(data["host_id"])
+    data["host_user_id"] = _uuid(data["host_user_id"])
+    data["status"] = RoomStatus(data["status"])
+    data["created_at"] = datetime.fromisoformat(data["created_at"])
+    data["players"] = players
+    return _trusted(Room, data)
+
+
+# Profiling showed pydantic-core validation itself is cheap; the time goes to parsing
+# UUID strings and to model_construct's per-field Python loop. Room and player ids
+# repeat on every read, so parsed UUIDs are cached, and instances are assembled
+# directly from a dict that already holds every field with its final type.
+@lru_cache(maxsize=UUID_CACHE_SIZE)
+def _uuid(value: str) -> UUID:
+    return UUID(value)
+
+
+def _trusted(model: Type[M], values: dict) -> M:
+    instance = _new_object(model)
+    _set_attribute(instance, "__dict__", values)
+    _set_attribute(instance, "__pydantic_fields_set__", set(values))
+    _set_attribute(instance, "__pydantic_extra__", None)
+    _set_attribute(instance, "__pydantic_private__", None)
+    return instance
+
+
+def _immutable_defaults(model: Type[BaseModel]) -> dict:
+    # Mutable defaults (lists, dicts) are left out; decoders always set those fields.
+    return {
+        name: field.default
+        for name, field in model.model_fields.items()
+        if not field.is_required() and not isinstance(field.default, (list, dict, set))
+    }
+
+
+_PLAYER_DEFAULTS = _immutable_defaults(Player)
+_ROOM_DEFAULTS = _immutable_defaults(Room)
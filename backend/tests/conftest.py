@@ -0,0 +1,117 @@
+import importlib
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+
+# The backend runs with its own directory on sys.path (``uvicorn app:app``), so modules
+# import each other by bare name. Expose the same module objects under ``backend.`` too,
+# otherwise ``backend.schemas.Card`` and ``schemas.Card`` would be two distinct classes.
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+for _path in (BACKEND_DIR.parent, BACKEND_DIR):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+for _module_path in sorted(BACKEND_DIR.glob("*.py")):
+    if _module_path.stem != "__init__":
+        sys.modules.setdefault(f"backend.{_module_path.stem}", importlib.import_module(_module_path.stem))
+
+
+class RoundTripCounter:
+    def __init__(self) -> None:
+        self.count = 0
+        self.commands = 0
+
+    def reset(self) -> None:
+        self.count = 0
+        self.commands = 0
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    # In-memory Redis (with Lua) patched in behind redis_store.get_redis; every command
+    # sent on its own and every pipeline flush counts as one round trip, and the
+    # commands inside a pipeline are counted one by one.
+    fakeredis = pytest.importorskip("fakeredis")
+    from redis.asyncio.client import Pipeline
+
+    import redis_store
+
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    counter = RoundTripCounter()
+    execute_command = client.execute_command
+    pipeline_execute = Pipeline.execute
+
+    async def counted_command(*args, **options):
+        counter.count += 1
+        counter.commands += 1
+        return await execute_command(*args, **options)
+
+    async def counted_pipeline(self, *args, **kwargs):
+        counter.count += 1
+        counter.commands += len(self.command_stack)
+        return await pipeline_execute(self, *args, **kwargs)
+
+    monkeypatch.setattr(client, "execute_command", counted_command)
+    monkeypatch.setattr(Pipeline, "execute", counted_pipeline)
+    monkeypatch.setattr(redis_store, "_redis", client)
+    client.round_trips = counter
+    return client
+
+
+@pytest.fixture
+def seed_room(redis_client):
+    # Writes a room mid-game straight into Redis: one player per hand, seats in order.
+    from redis_store import room_hands_key, room_meta_key, room_players_key, room_state_key
+    from schemas import GameState, GameStatus, LastPlay, Player, Room, RoomStatus
+    from storage_codec import encode_player, encode_player_fields
+
+    async def seed(hands, current_seat=0, last_play=None, first_turn_required=False, code="ABC234", scores=None):
+        players = [
+            Player(
+                id=uuid4(),
+                user_id=uuid4(),
+                name=f"P{seat}",
+                seat=seat,
+                hand_count=len(hand),
+                score=scores[seat] if scores else 0,
+                status="active",
+            )
+            for seat, hand in enumerate(hands)
+        ]
+        room = Room(
+            id=uuid4(),
+            code=code,
+            host_id=players[0].id,
+            host_user_id=players[0].user_id,
+            status=RoomStatus.in_game,
+            max_players=4,
+            games_played=1,
+            created_at=datetime.utcnow(),
+        )
+        order = [player.id for player in players]
+        if last_play is not None:
+            seat, cards = last_play
+            last_play = LastPlay(type="single" if len(cards) == 1 else "pair", cards=cards, by_player_id=order[seat])
+        state = GameState(
+            room_id=room.id,
+            status=GameStatus.playing,
+            players_order=order,
+            current_turn=order[current_seat],
+            last_play=last_play,
+            first_turn_required=first_turn_required,
+        )
+        await redis_client.set(room_meta_key(code), json.dumps(room.model_dump(mode="json", exclude={"players"})))
+        await redis_client.set(room_state_key(code), json.dumps(state.model_dump(mode="json")))
+        for player, hand in zip(players, hands):
+            raw_hand = json.dumps([card.model_dump(mode="json") for card in hand])
+            await redis_client.hset(room_players_key(code), str(player.id), encode_player(player))
+            await redis_client.hset(room_players_key(code), mapping=encode_player_fields([player]))
+            await redis_client.hset(room_hands_key(code), str(player.id), raw_hand)
+        redis_client.round_trips.reset()
+        return order
+
+    return seed
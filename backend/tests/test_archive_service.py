@@ -0,0 +1,82 @@
+import asyncio
+import random
+
+import pytest
+
+import backend.archive_service as archive_service
+from backend import game_service
+from backend.redis_store import room_state_key
+from backend.room_service import get_players
+from backend.schemas import GameStatus
+
+CODE = "ABC234"
+
+
+@pytest.fixture(autouse=True)
+def archive(tmp_path, monkeypatch):
+    archive = archive_service.GameArchive(str(tmp_path / "archive.sqlite3"))
+    monkeypatch.setattr(archive_service, "archive", archive)
+    monkeypatch.setattr(archive_service, "ARCHIVE_FLUSH_SECONDS", 0.01)
+    return archive
+
+
+async def play_game(rng):
+    await game_service.start_game(CODE)
+    state = await game_service.get_game_state(CODE)
+    while state.status == GameStatus.playing:
+        plays, can_pass = await game_service.get_legal_plays(CODE, state.current_turn)
+        if can_pass and (not plays or rng.random() < 0.3):
+            state = await game_service.pass_turn(CODE, state.current_turn)
+        else:
+            cards = [card.model_dump(mode="json") for card in rng.choice(plays)]
+            state = await game_service.play_turn(CODE, state.current_turn, cards)
+    await archive_service.archive_finished_game(CODE, state)
+    return state
+
+
+def test_finished_games_are_archived_with_their_points(redis_client, seed_room, archive):
+    async def scenario():
+        order = await seed_room([[], [], [], []])
+        await redis_client.delete(room_state_key(CODE))
+        state = await play_game(random.Random(8))
+        await asyncio.sleep(0.05)  # the background flush
+
+        players = await get_players(CODE)
+        user_id = str(players[0].user_id)
+        [summary] = await archive.recent_games(user_id, 10)
+        assert summary["winner_id"] == str(state.winner_id)
+        assert summary["move_count"] == state.move_count
+        # Scores started at zero, so the game's points are the players' scores now.
+        assert {player["player_id"]: player["score_delta"] for player in summary["players"]} == {
+            str(player.id): player.score for player in players
+        }
+
+        game = await archive.game(summary["id"])
+        assert [move[0] for move in game["moves"][:1] + game["moves"][-1:]] == ["start", "end"]
+        assert [player["player_id"] for player in game["players"]] == [str(player_id) for player_id in order]
+        assert game["started_at"] <= game["finished_at"]
+        assert await archive.game("missing") is None
+
+    asyncio.run(scenario())
+
+
+def test_recent_games_page_backwards_in_time(redis_client, seed_room, archive):
+    async def scenario():
+        await seed_room([[], []])
+        rng = random.Random(2)
+        for _ in range(3):
+            await redis_client.delete(room_state_key(CODE))
+            await play_game(rng)
+            await asyncio.sleep(0.002)
+        await archive.flush()
+
+        user_id = str((await get_players(CODE))[1].user_id)
+        newest = await archive.recent_games(user_id, 2)
+        assert len(newest) == 2
+        assert newest[0]["finished_at"] >= newest[1]["finished_at"]
+        older = await archive.recent_games(user_id, 2, before=newest[1]["finished_at"])
+        assert len(older) == 1
+        assert older[0]["id"] not in {game["id"] for game in newest}
+        await archive.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+import backend.bot_service as bot_service
+from backend.bot_service import BotMetrics, build_turn_view, choose_move, decide_move, fallback_move
+from backend.card_mask import THREE_OF_SPADES_MASK, cards_to_mask
+from backend.policies import TurnView
+from backend.schemas import BotLevel, Card, GameState, GameStatus, LastPlay, Player, Suit
+
+
+def make_card(rank: int, suit: Suit) -> Card:
+    return Card(rank=rank, suit=suit)
+
+
+def make_player(seat: int, hand_count: int) -> Player:
+    return Player(id=uuid4(), user_id=uuid4(), name=f"P{seat}", seat=seat, hand_count=hand_count)
+
+
+def test_build_turn_view_orders_opponents_after_bot():
+    players = [make_player(seat, 10 + seat) for seat in range(4)]
+    order = [player.id for player in players]
+    hand = [make_card(3, Suit.spades), make_card(9, Suit.hearts)]
+    state = GameState(
+        room_id=uuid4(),
+        status=GameStatus.playing,
+        players_order=order,
+        current_turn=order[2],
+        last_play=LastPlay(type="single", cards=[make_card(8, Suit.clubs)], by_player_id=order[1]),
+    )
+    view = build_turn_view(state, players, order[2], hand)
+    assert view.hand_mask == cards_to_mask(hand)
+    assert view.last_mask == cards_to_mask([make_card(8, Suit.clubs)])
+    assert view.opponent_counts == (13, 10, 11)
+
+
+def test_fallback_move_leads_lowest_card_or_passes():
+    hand = cards_to_mask([make_card(3, Suit.spades), make_card(12, Suit.hearts)])
+    assert fallback_move(TurnView(hand_mask=hand, first_turn=True)) == THREE_OF_SPADES_MASK
+    assert fallback_move(TurnView(hand_mask=hand, last_mask=1 << 20)) == 0
+
+
+def test_decide_move_uses_policy_within_budget():
+    hand = cards_to_mask([make_card(5, Suit.spades), make_card(5, Suit.hearts), make_card(9, Suit.clubs)])
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        bot_service.set_executor(executor)
+        try:
+            move = asyncio.run(decide_move(BotLevel.normal, TurnView(hand_mask=hand)))
+        finally:
+            bot_service.set_executor(None)
+    assert move == cards_to_mask([make_card(5, Suit.spades), make_card(5, Suit.hearts)])
+
+
+def test_search_stops_at_its_deadline():
+    hand = cards_to_mask([make_card(rank, Suit.hearts) for rank in range(3, 10)])
+    view = TurnView(hand_mask=hand)
+    move, timed_out = choose_move(BotLevel.hard.value, view, 1, deadline=0.0)
+    assert (move, timed_out) == (fallback_move(view), True)
+    move, timed_out = choose_move(BotLevel.hard.value, view, 1, deadline=float("inf"))
+    assert move == hand and not timed_out
+
+
+def test_decide_move_records_a_search_that_ran_out(monkeypatch):
+    # A budget already spent: the search gives up at its first candidate.
+    monkeypatch.setattr(bot_service, "BOT_MOVE_BUDGET_SECONDS", -1.0)
+    metrics = BotMetrics()
+    monkeypatch.setattr(bot_service, "bot_metrics", metrics)
+    hand = cards_to_mask([make_card(4, Suit.clubs), make_card(4, Suit.hearts), make_card(11, Suit.hearts)])
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        bot_service.set_executor(executor)
+        try:
+            move = asyncio.run(decide_move(BotLevel.hard, TurnView(hand_mask=hand)))
+        finally:
+            bot_service.set_executor(None)
+    assert move == cards_to_mask([make_card(4, Suit.clubs)])
+    assert metrics.snapshot()["timeouts"] == 1
+
+
+def test_decide_move_falls_back_when_the_pool_is_stuck(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(bot_service, "BOT_MOVE_BUDGET_SECONDS", 0.05)
+    monkeypatch.setattr(bot_service, "BOT_MOVE_GRACE_SECONDS", 0)
+    monkeypatch.setattr(bot_service, "choose_move", lambda level, view, seed, deadline: release.wait(5) and (0, False))
+    metrics = BotMetrics()
+    monkeypatch.setattr(bot_service, "bot_metrics", metrics)
+    hand = cards_to_mask([make_card(7, Suit.clubs), make_card(11, Suit.hearts)])
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        bot_service.set_executor(executor)
+        try:
+            move = asyncio.run(decide_move(BotLevel.hard, TurnView(hand_mask=hand)))
+        finally:
+            release.set()
+            bot_service.set_executor(None)
+    assert move == cards_to_mask([make_card(7, Suit.clubs)])
+    snapshot = metrics.snapshot()
+    assert snapshot["decisions"] == 1
+    assert snapshot["timeouts"] == 1
+    assert snapshot["max_ms"] >= 50
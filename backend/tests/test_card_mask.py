@@ -0,0 +1,106 @@
+import pytest
+
+from backend.card_mask import (
+    FULL_DECK_MASK,
+    THREE_OF_SPADES_MASK,
+    card_bit,
+    cards_to_mask,
+    mask_to_cards,
+    rank_count,
+)
+from backend.rules import (
+    combo_table_stats,
+    configure_combo_table,
+    evaluate_combo,
+    evaluate_mask,
+    validate_play_mask,
+)
+from backend.schemas import Card, ComboType, Suit
+
+
+def make_card(rank: int, suit: Suit) -> Card:
+    return Card(rank=rank, suit=suit)
+
+
+def test_bit_layout_is_rank_major_with_suit_low_bits():
+    assert card_bit(make_card(3, Suit.spades)) == THREE_OF_SPADES_MASK
+    assert card_bit(make_card(3, Suit.hearts)) == 1 << 3
+    assert card_bit(make_card(4, Suit.spades)) == 1 << 4
+    assert card_bit(make_card(15, Suit.hearts)) == 1 << 51
+
+
+def test_mask_round_trip_full_deck():
+    deck = [make_card(rank, suit) for rank in range(3, 16) for suit in Suit]
+    mask = cards_to_mask(deck)
+    assert mask == FULL_DECK_MASK
+    assert [(card.rank, card.suit) for card in mask_to_cards(mask)] == [
+        (card.rank, card.suit) for card in sorted(deck, key=card_bit)
+    ]
+
+
+def test_rank_count():
+    mask = cards_to_mask([make_card(9, Suit.spades), make_card(9, Suit.hearts), make_card(10, Suit.clubs)])
+    assert rank_count(mask, 9) == 2
+    assert rank_count(mask, 10) == 1
+    assert rank_count(mask, 11) == 0
+
+
+def test_evaluate_mask_matches_card_adapter():
+    cards = [
+        make_card(7, Suit.spades),
+        make_card(7, Suit.hearts),
+        make_card(8, Suit.clubs),
+        make_card(8, Suit.diamonds),
+        make_card(9, Suit.spades),
+        make_card(9, Suit.clubs),
+    ]
+    combo = evaluate_mask(cards_to_mask(cards))
+    assert combo == evaluate_combo(cards)
+    assert combo.type == ComboType.consecutive_pairs
+    assert combo.rank == 9
+    assert combo.length == 3
+
+
+def test_evaluate_combo_rejects_duplicate_cards():
+    with pytest.raises(ValueError):
+        evaluate_combo([make_card(7, Suit.spades), make_card(7, Suit.spades)])
+
+
+def test_evaluate_mask_rejects_gapped_pairs():
+    cards = [
+        make_card(3, Suit.spades),
+        make_card(3, Suit.clubs),
+        make_card(4, Suit.spades),
+        make_card(4, Suit.clubs),
+        make_card(6, Suit.spades),
+        make_card(6, Suit.clubs),
+    ]
+    with pytest.raises(ValueError):
+        evaluate_mask(cards_to_mask(cards))
+
+
+def test_validate_play_mask_suit_tiebreak():
+    last = cards_to_mask([make_card(8, Suit.clubs)])
+    assert validate_play_mask(cards_to_mask([make_card(8, Suit.hearts)]), last).type == ComboType.single
+    with pytest.raises(ValueError):
+        validate_play_mask(cards_to_mask([make_card(8, Suit.spades)]), last)
+
+
+def test_combo_table_matches_direct_classification():
+    straight = cards_to_mask(
+        [make_card(rank, suit) for rank, suit in zip(range(5, 11), [Suit.spades, Suit.hearts] * 3)]
+    )
+    long_pairs = cards_to_mask(
+        [make_card(rank, suit) for rank in range(3, 8) for suit in (Suit.clubs, Suit.diamonds)]
+    )
+    masks = [THREE_OF_SPADES_MASK, straight, long_pairs]
+    with_table = [evaluate_mask(mask) for mask in masks]
+    assert combo_table_stats()["entries"] > 0
+    configure_combo_table(False)
+    try:
+        assert combo_table_stats()["entries"] == 0
+        assert [evaluate_mask(mask) for mask in masks] == with_table
+    finally:
+        configure_combo_table(True)
+    assert with_table[1].type == ComboType.straight and with_table[1].length == 6
+    assert with_table[2].type == ComboType.consecutive_pairs and with_table[2].length == 5
@@ -0,0 +1,107 @@
+import asyncio
+import json
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from starlette.requests import Request
+
+import backend.ws_service as ws_service
+from backend.redis_store import USER_TTL_SECONDS, user_key
+from backend.room_hub import RoomHub
+from backend.room_service import get_room, join_room, leave_room, set_player_ready, set_player_status
+from backend.user_service import User
+
+CODE = "ABC234"
+
+# (round trips, commands) each operation may cost. index_room's ZREMs are most of the
+# commands of a write that changes players or status; a WS broadcast is one PUBLISH.
+BUDGETS = {
+    "get_room": (1, 2),
+    "join_room": (3, 25),
+    "leave_room": (2, 20),
+    "set_player_ready": (2, 5),
+    "set_player_status": (2, 3),
+    "ws room.join": (4, 5),
+    "ws player.ready": (3, 6),
+}
+
+
+class FakeWebSocket:
+    def __init__(self) -> None:
+        self.sent = []
+
+    async def send_json(self, message: dict) -> None:
+        self.sent.append(message)
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(json.loads(text))
+
+
+def json_request(code: str, body: dict) -> Request:
+    async def receive():
+        return {"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}
+
+    scope = {"type": "http", "method": "POST", "path_params": {"code": code}, "query_string": b"", "headers": []}
+    return Request(scope, receive)
+
+
+@pytest.fixture
+def budget(redis_client):
+    async def measure(operation, call):
+        redis_client.round_trips.reset()
+        result = await call
+        spent = (redis_client.round_trips.count, redis_client.round_trips.commands)
+        round_trips, commands = BUDGETS[operation]
+        assert spent[0] <= round_trips, f"{operation}: {spent[0]} round trips"
+        assert spent[1] <= commands, f"{operation}: {spent[1]} commands"
+        return result
+
+    return measure
+
+
+async def new_user(redis_client) -> str:
+    now = datetime.utcnow()
+    user = User(id=uuid4(), name="Newcomer", created_at=now, last_joined_at=now)
+    await redis_client.set(user_key(str(user.id)), json.dumps(user.model_dump(mode="json")), ex=USER_TTL_SECONDS)
+    return str(user.id)
+
+
+def test_rest_room_operations_stay_within_budget(redis_client, seed_room, budget):
+    async def scenario():
+        order = await seed_room([[], []])
+        room = await budget("get_room", get_room(CODE))
+        assert len(room.players) == 2
+
+        response = await budget("join_room", join_room(json_request(CODE, {"user_id": await new_user(redis_client)})))
+        player_id = json.loads(response.body)["player_id"]
+        room = await budget("set_player_ready", set_player_ready(CODE, order[1], True))
+        assert next(player for player in room.players if player.id == order[1]).is_ready
+        room = await budget("set_player_status", set_player_status(CODE, order[1], "disconnected"))
+        assert next(player for player in room.players if player.id == order[1]).status == "disconnected"
+
+        response = await budget("leave_room", leave_room(json_request(CODE, {"player_id": player_id})))
+        assert len(json.loads(response.body)["room"]["players"]) == 2
+
+    asyncio.run(scenario())
+
+
+def test_ws_room_events_stay_within_budget(redis_client, seed_room, budget, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(ws_service, "room_hub", RoomHub())
+        order = await seed_room([[], []])
+        websocket = FakeWebSocket()
+        state = ws_service.ConnectionState()
+
+        join = {"code": CODE, "player_id": str(order[0])}
+        await budget("ws room.join", ws_service._handle_room_join(websocket, join, state))
+        await asyncio.sleep(0)
+        assert [message["type"] for message in websocket.sent] == ["room:update", "game:start", "hand:deal"]
+
+        ready = {"code": CODE, "player_id": str(order[1]), "is_ready": True}
+        await budget("ws player.ready", ws_service._handle_player_ready(websocket, ready, state))
+        await asyncio.sleep(0)
+        assert websocket.sent[-1]["type"] == "room:update"
+        await ws_service.room_hub.close()
+
+    asyncio.run(scenario())
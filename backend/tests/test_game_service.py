@@ -0,0 +1,212 @@
+import asyncio
+
+import pytest
+
+from backend import game_service
+from backend.card_mask import cards_to_mask
+from backend.game_engine import deal_from_seed
+from backend.redis_store import room_meta_key, room_players_key, room_state_key
+from backend.room_service import add_bot, get_players, get_room, set_player_ready
+from backend.schemas import BotLevel, Card, GameState, GameStatus, RoomStatus, Suit
+from backend.storage_codec import decode_state, encode_state
+
+CODE = "ABC234"
+
+
+def make_card(rank: int, suit: Suit) -> Card:
+    return Card(rank=rank, suit=suit)
+
+
+async def players_by_id():
+    return {player.id: player for player in await get_players(CODE)}
+
+
+def payload(*cards):
+    return [card.model_dump(mode="json") for card in cards]
+
+
+def test_play_turn_commits_in_two_round_trips(redis_client, seed_room):
+    async def scenario():
+        hands = [
+            [make_card(3, Suit.spades), make_card(9, Suit.hearts)],
+            [make_card(5, Suit.clubs), make_card(7, Suit.hearts)],
+        ]
+        order = await seed_room(hands, first_turn_required=True)
+        state = await game_service.play_turn(CODE, order[0], payload(make_card(3, Suit.spades)))
+        assert state.current_turn == order[1]
+        assert not state.first_turn_required
+
+        # The first call also pays the one-off NOSCRIPT + SCRIPT LOAD.
+        redis_client.round_trips.reset()
+        state = await game_service.play_turn(CODE, order[1], payload(make_card(5, Suit.clubs)))
+        assert redis_client.round_trips.count == 2
+
+        stored = decode_state(await redis_client.get(room_state_key(CODE)))
+        assert stored == state
+        players = await players_by_id()
+        assert players[order[1]].hand_count == 1
+        assert await game_service.get_hand(CODE, order[1]) == [make_card(7, Suit.hearts)]
+
+    asyncio.run(scenario())
+
+
+def test_pass_turn_commits_in_two_round_trips(redis_client, seed_room):
+    async def scenario():
+        hands = [[make_card(9, Suit.hearts)], [make_card(5, Suit.clubs)], [make_card(6, Suit.clubs)]]
+        order = await seed_room(hands, current_seat=1, last_play=(0, [make_card(8, Suit.hearts)]))
+        await game_service.pass_turn(CODE, order[1])
+        redis_client.round_trips.reset()
+        state = await game_service.pass_turn(CODE, order[2])
+        assert redis_client.round_trips.count == 2
+        assert state.current_turn == order[0]
+        assert state.last_play is None
+
+    asyncio.run(scenario())
+
+
+def test_play_turn_applies_chop_and_end_game_scores(redis_client, seed_room):
+    async def scenario():
+        bomb = [make_card(rank, suit) for rank in (4, 5, 6) for suit in (Suit.spades, Suit.hearts)]
+        hands = [bomb, [make_card(9, Suit.clubs), make_card(10, Suit.clubs)]]
+        order = await seed_room(hands, last_play=(1, [make_card(15, Suit.hearts)]))
+        state = await game_service.play_turn(CODE, order[0], payload(*bomb))
+        assert state.status == GameStatus.finished
+        assert state.winner_id == order[0]
+        players = await players_by_id()
+        # Red 2 chopped (+2/-2) plus the two-player end-game table (+2/-2).
+        assert players[order[0]].score == 4
+        assert players[order[1]].score == -4
+        assert players[order[0]].hand_count == 0
+
+    asyncio.run(scenario())
+
+
+def test_play_turn_rejects_cards_already_played(redis_client, seed_room):
+    async def scenario():
+        hands = [[make_card(9, Suit.hearts), make_card(4, Suit.clubs)], [make_card(5, Suit.clubs)]]
+        order = await seed_room(hands)
+        first, second = await asyncio.gather(
+            game_service.play_turn(CODE, order[0], payload(make_card(9, Suit.hearts))),
+            game_service.play_turn(CODE, order[0], payload(make_card(9, Suit.hearts))),
+            return_exceptions=True,
+        )
+        results = [first, second]
+        assert sum(isinstance(result, GameState) for result in results) == 1
+        error = next(result for result in results if isinstance(result, Exception))
+        assert isinstance(error, ValueError)
+        assert await game_service.get_hand(CODE, order[0]) == [make_card(4, Suit.clubs)]
+
+    asyncio.run(scenario())
+
+
+def test_play_turn_rejects_duplicate_cards(redis_client, seed_room):
+    async def scenario():
+        order = await seed_room([[make_card(9, Suit.hearts)], [make_card(5, Suit.clubs)]])
+        with pytest.raises(ValueError, match="Cards not in hand"):
+            await game_service.play_turn(
+                CODE, order[0], payload(make_card(9, Suit.hearts), make_card(9, Suit.hearts))
+            )
+
+    asyncio.run(scenario())
+
+
+def test_end_game_scoring_for_four_players_is_one_commit(redis_client, seed_room):
+    async def scenario():
+        hands = [
+            [make_card(9, Suit.hearts)],
+            [make_card(5, Suit.clubs)],
+            [make_card(6, Suit.clubs), make_card(7, Suit.clubs)],
+            [make_card(8, Suit.clubs), make_card(10, Suit.clubs), make_card(11, Suit.clubs)],
+        ]
+        order = await seed_room(hands, scores=[1, 2, 3, 4])
+        await game_service.play_turn(CODE, order[0], payload(make_card(9, Suit.hearts)))
+        players = await players_by_id()
+        assert [players[player_id].score for player_id in order] == [3, 3, 2, 2]
+
+    asyncio.run(scenario())
+
+
+def test_start_game_sets_hand_counts_in_its_write_pipeline(redis_client, seed_room):
+    async def scenario():
+        order = await seed_room([[], [], [], []])
+        await redis_client.delete(room_state_key(CODE))
+        redis_client.round_trips.reset()
+        await game_service.start_game(CODE)
+        # GET meta + HGETALL players in one pipeline (get_room), one write pipeline.
+        assert redis_client.round_trips.count == 2
+        players = await players_by_id()
+        assert [players[player_id].hand_count for player_id in order] == [13, 13, 13, 13]
+
+    asyncio.run(scenario())
+
+
+def test_scores_migrate_from_legacy_player_records(redis_client, seed_room):
+    async def scenario():
+        hands = [[make_card(15, Suit.hearts)], [make_card(5, Suit.clubs), make_card(6, Suit.clubs)]]
+        order = await seed_room(hands, scores=[7, -1])
+        # Rewrite the players the way they were stored before counters had their own fields.
+        for player in (await players_by_id()).values():
+            await redis_client.hdel(room_players_key(CODE), f"{player.id}:score", f"{player.id}:hand_count")
+            await redis_client.hset(room_players_key(CODE), str(player.id), player.model_dump_json())
+        await game_service.play_turn(CODE, order[0], payload(make_card(15, Suit.hearts)))
+        players = await players_by_id()
+        assert players[order[0]].score == 9
+        assert players[order[1]].score == -3
+        assert players[order[1]].hand_count == 2
+
+    asyncio.run(scenario())
+
+
+def test_start_game_records_the_deal_seed(redis_client, seed_room):
+    async def scenario():
+        order = await seed_room([[], [], []])
+        await redis_client.delete(room_state_key(CODE))
+        await game_service.start_game(CODE)
+        seed, players_order = await game_service.get_deal(CODE)
+        assert players_order == order
+        for player_id, cards in deal_from_seed(order, seed).items():
+            assert cards_to_mask(await game_service.get_hand(CODE, player_id)) == cards_to_mask(cards)
+
+    asyncio.run(scenario())
+
+
+def test_state_versions_keep_increasing_across_games_and_series(redis_client, seed_room):
+    async def scenario():
+        order = await seed_room([[make_card(3, Suit.spades)], [make_card(5, Suit.clubs)]])
+        finished = await game_service.play_turn(CODE, order[0], payload(make_card(3, Suit.spades)))
+        assert finished.version == 1
+        next_state, series_reset = await game_service.maybe_start_next_game(CODE)
+        assert (next_state.version, series_reset) == (2, False)
+
+        # The series ends with the last game: its state is deleted, its version kept.
+        last_game = next_state.model_copy(update={"status": GameStatus.finished, "version": 7})
+        await redis_client.set(room_state_key(CODE), encode_state(last_game))
+        room = await get_room(CODE)
+        room.max_games = room.games_played
+        await redis_client.set(room_meta_key(CODE), room.model_dump_json(exclude={"players"}))
+        assert await game_service.maybe_start_next_game(CODE) == (None, True)
+        assert (await game_service.start_game(CODE)).version == 8
+
+    asyncio.run(scenario())
+
+
+def test_room_with_a_bot_can_start_again_after_its_series(redis_client, seed_room):
+    async def scenario():
+        order = await seed_room([[], []])
+        room = await get_room(CODE)
+        room.status = RoomStatus.waiting
+        await redis_client.set(room_meta_key(CODE), room.model_dump_json(exclude={"players"}))
+        await redis_client.delete(room_state_key(CODE))
+        await add_bot(CODE, BotLevel.easy)
+        state = await game_service.start_game(CODE, max_games=1)
+
+        finished = state.model_copy(update={"status": GameStatus.finished})
+        await redis_client.set(room_state_key(CODE), encode_state(finished))
+        assert await game_service.maybe_start_next_game(CODE) == (None, True)
+        for player_id in order:
+            room = await set_player_ready(CODE, player_id, True)
+        assert room.status == RoomStatus.ready
+        assert [player.is_ready for player in room.players if player.is_bot] == [True]
+        assert (await game_service.start_game(CODE)).status == GameStatus.playing
+
+    asyncio.run(scenario())
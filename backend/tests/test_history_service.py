@@ -0,0 +1,70 @@
+import asyncio
+import random
+
+import pytest
+
+import backend.move_log as move_log
+from backend import game_service, history_service
+from backend.redis_store import room_moves_key, room_state_key
+from backend.room_service import get_players
+from backend.schemas import GameStatus
+
+CODE = "ABC234"
+
+
+@pytest.fixture(autouse=True)
+def frequent_snapshots(monkeypatch):
+    monkeypatch.setattr(move_log, "MOVE_LOG_SNAPSHOT_EVERY", 4)
+    monkeypatch.setattr(history_service, "MOVE_LOG_SNAPSHOT_EVERY", 4)
+
+
+async def play_out(rng):
+    # Random legal moves until someone wins; returns the state after every move.
+    states = [await game_service.get_game_state(CODE)]
+    state = states[0]
+    while state.status == GameStatus.playing:
+        plays, can_pass = await game_service.get_legal_plays(CODE, state.current_turn)
+        if can_pass and (not plays or rng.random() < 0.3):
+            state = await game_service.pass_turn(CODE, state.current_turn)
+        else:
+            cards = [card.model_dump(mode="json") for card in rng.choice(plays)]
+            state = await game_service.play_turn(CODE, state.current_turn, cards)
+        states.append(state)
+    return states
+
+
+def test_every_move_index_rebuilds_the_committed_state(redis_client, seed_room):
+    async def scenario():
+        order = await seed_room([[], [], [], []])
+        await redis_client.delete(room_state_key(CODE))
+        await game_service.start_game(CODE)
+        states = await play_out(random.Random(3))
+
+        for index, state in enumerate(states):
+            assert await history_service.get_state_at(CODE, index) == state.model_copy(update={"turn_deadline": None})
+        assert (await history_service.get_state_at(CODE)).move_count == states[-1].move_count
+
+        moves = await history_service.get_moves(CODE)
+        assert [move.type for move in moves[:1] + moves[-1:]] == ["start", "end"]
+        assert moves[-1].by_player_id == states[-1].winner_id
+        assert len(moves) == len(states) + 1
+        assert {move.by_player_id for move in moves} <= set(order)
+        players = await get_players(CODE)
+        assert sum(player.score for player in players) == 0
+
+    asyncio.run(scenario())
+
+
+def test_unrecorded_moves_are_rejected(redis_client, seed_room):
+    async def scenario():
+        await seed_room([[], []])
+        await redis_client.delete(room_state_key(CODE))
+        await game_service.start_game(CODE)
+        with pytest.raises(ValueError):
+            await history_service.get_state_at(CODE, 1)
+        # Once trimmed past its snapshot, a move can no longer be rebuilt.
+        await redis_client.xtrim(room_moves_key(CODE), minid="1-0")
+        with pytest.raises(ValueError):
+            await history_service.get_state_at(CODE, 0)
+
+    asyncio.run(scenario())
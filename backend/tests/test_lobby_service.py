@@ -0,0 +1,107 @@
+import asyncio
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from starlette.requests import Request
+
+import backend.lobby_service as lobby_service
+from backend import room_service
+from backend.lobby_service import list_rooms, list_rooms_handler
+from backend.redis_store import lobby_index_key, lobby_room_key, room_meta_key, room_players_key
+from backend.schemas import BotLevel, Player, Room
+
+
+def new_room(code: str, minutes_ago: int = 0) -> Room:
+    host = Player(id=uuid4(), user_id=uuid4(), name=f"Host {code}", seat=0, is_host=True)
+    created_at = datetime.utcnow() - timedelta(minutes=minutes_ago)
+    return Room(
+        id=uuid4(), code="", host_id=host.id, host_user_id=host.user_id, players=[host], created_at=created_at
+    )
+
+
+async def insert(monkeypatch, *rooms):
+    codes = iter([room.code or f"ROOM{index:02d}" for index, room in enumerate(rooms)])
+    monkeypatch.setattr(room_service.room_codes, "take", lambda: next(codes))
+    return [await room_service.insert_room(room) for room in rooms]
+
+
+def test_index_follows_players_and_status(redis_client, monkeypatch):
+    async def scenario():
+        (room,) = await insert(monkeypatch, new_room("ROOM00"))
+        assert await redis_client.zrange(lobby_index_key("waiting", 3), 0, -1) == ["ROOM00"]
+
+        # The host counts as ready, so a ready bot makes the room ready.
+        room = await room_service.add_bot("ROOM00", BotLevel.easy)
+        assert await redis_client.zrange(lobby_index_key("waiting", 3), 0, -1) == []
+        assert await redis_client.zrange(lobby_index_key("ready", 2), 0, -1) == ["ROOM00"]
+        rooms, _ = await list_rooms(["ready"], 1, 10)
+        assert rooms[0]["players"] == 2
+        assert rooms[0]["host_name"] == "Host ROOM00"
+
+        bot = next(player for player in room.players if player.is_bot)
+        room = await room_service.set_player_ready("ROOM00", bot.id, False)
+        assert room.status.value == "waiting"
+        assert await redis_client.zrange(lobby_index_key("waiting", 2), 0, -1) == ["ROOM00"]
+        assert await redis_client.zrange(lobby_index_key("ready", 2), 0, -1) == []
+
+        for player in room.players:
+            await room_service.remove_player("ROOM00", player.id)
+        assert await list_rooms(["waiting", "ready"], 0, 10) == ([], None)
+        assert await redis_client.get(lobby_room_key("ROOM00")) is None
+
+    asyncio.run(scenario())
+
+
+def test_pages_are_newest_first_and_never_read_room_meta(redis_client, monkeypatch):
+    async def scenario():
+        await insert(monkeypatch, *(new_room("", minutes_ago) for minutes_ago in range(5)))
+        await redis_client.delete(*(room_meta_key(f"ROOM{index:02d}") for index in range(5)))
+        await redis_client.delete(*(room_players_key(f"ROOM{index:02d}") for index in range(5)))
+
+        seen = []
+        before = None
+        while True:
+            redis_client.round_trips.reset()
+            rooms, before = await list_rooms(["waiting"], 1, 2, before)
+            assert redis_client.round_trips.count == 2
+            seen += [room["code"] for room in rooms]
+            if before is None:
+                break
+        assert seen == [f"ROOM{index:02d}" for index in range(5)]
+
+    asyncio.run(scenario())
+
+
+def test_expired_rooms_drop_out_of_the_index(redis_client, monkeypatch):
+    async def scenario():
+        await insert(monkeypatch, new_room(""), new_room("", 1))
+        await redis_client.delete(lobby_room_key("ROOM00"))
+        rooms, _ = await list_rooms(["waiting"], 1, 10)
+        assert [room["code"] for room in rooms] == ["ROOM01"]
+        assert await redis_client.zrange(lobby_index_key("waiting", 3), 0, -1) == ["ROOM01"]
+
+    asyncio.run(scenario())
+
+
+def lobby_request(query: str, etag: str = None) -> Request:
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    return Request({"type": "http", "method": "GET", "query_string": query.encode(), "headers": headers})
+
+
+def test_handler_serves_cached_pages_with_an_etag(redis_client, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(lobby_service, "_page_cache", {})
+        await insert(monkeypatch, new_room(""))
+        response = await list_rooms_handler(lobby_request("limit=5"))
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+
+        redis_client.round_trips.reset()
+        response = await list_rooms_handler(lobby_request("limit=5", etag))
+        assert response.status_code == 304
+        assert redis_client.round_trips.count == 0
+
+        response = await list_rooms_handler(lobby_request("limit=500"))
+        assert response.status_code == 400
+
+    asyncio.run(scenario())
@@ -0,0 +1,162 @@
+import asyncio
+import json
+from datetime import datetime
+from uuid import UUID, uuid4
+
+import pytest
+
+import backend.matchmaking_service as matchmaking_service
+from backend import room_service
+from backend.matchmaking_service import Matchmaker, cancel, enqueue, get_ticket
+from backend.redis_store import ROOMS_ACTIVE_KEY, USER_TTL_SECONDS, matchmaking_queue_key, user_key
+from backend.room_service import get_players, get_room
+from backend.user_service import User
+
+
+async def new_users(redis_client, count):
+    users = []
+    for index in range(count):
+        now = datetime.utcnow()
+        user = User(id=uuid4(), name=f"U{index}", created_at=now, last_joined_at=now)
+        await redis_client.set(user_key(str(user.id)), json.dumps(user.model_dump(mode="json")), ex=USER_TTL_SECONDS)
+        users.append(user)
+    return users
+
+
+async def queue(users, max_players):
+    user_ids = [str(user.id) for user in users]
+    for user_id in user_ids:
+        await enqueue(user_id, max_players)
+    return user_ids
+
+
+def test_full_groups_get_new_rooms_and_the_rest_wait(redis_client):
+    async def scenario():
+        users = await queue(await new_users(redis_client, 7), 3)
+        assert await Matchmaker().match_once() == 6
+
+        tickets = [await get_ticket(user_id) for user_id in users]
+        waiting = [user_id for user_id, ticket in zip(users, tickets) if ticket["status"] == "queued"]
+        codes = {ticket["room_code"] for ticket in tickets if ticket["status"] == "matched"}
+        assert len(codes) == 2
+        for code in codes:
+            room = await get_room(code)
+            assert room.max_players == 3
+            assert len(room.players) == 3
+        assert await redis_client.zrange(matchmaking_queue_key(3), 0, -1) == waiting
+        assert len(waiting) == 1
+
+    asyncio.run(scenario())
+
+
+def test_open_rooms_are_filled_before_new_ones_are_made(redis_client):
+    async def scenario():
+        users = await new_users(redis_client, 5)
+        room = await room_service.open_room(users[:2], 4)
+
+        user_ids = await queue(users[2:], 4)
+        assert await Matchmaker().match_once() == 2
+        tickets = [await get_ticket(user_id) for user_id in user_ids]
+        assert sorted(ticket.get("room_code", "") for ticket in tickets) == ["", room.code, room.code]
+        players = await get_players(room.code)
+        assert sorted(player.seat for player in players) == [0, 1, 2, 3]
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_users_are_not_seated_or_requeued(redis_client):
+    async def scenario():
+        users = await queue(await new_users(redis_client, 3), 2)
+        await cancel(users[0])
+        assert await Matchmaker().match_once() == 2
+        assert await get_ticket(users[0]) is None
+        assert await redis_client.zcard(matchmaking_queue_key(2)) == 0
+
+    asyncio.run(scenario())
+
+
+def test_short_groups_get_a_room_after_the_longest_wait(redis_client, monkeypatch):
+    async def scenario():
+        users = await queue(await new_users(redis_client, 3), 4)
+        assert await Matchmaker().match_once() == 0
+        (longest_waiting,) = await redis_client.zrange(matchmaking_queue_key(4), 0, 0)
+        monkeypatch.setattr(matchmaking_service, "MATCHMAKING_MAX_WAIT_SECONDS", 0)
+        assert await Matchmaker().match_once() == 3
+        room = await get_room((await get_ticket(users[0]))["room_code"])
+        assert room.host_user_id == UUID(longest_waiting)
+        assert len(room.players) == 3
+
+    asyncio.run(scenario())
+
+
+def test_open_rooms_past_the_first_lobby_page_are_filled(redis_client, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(matchmaking_service, "LOBBY_PAGE_LIMIT", 2)
+        users = await new_users(redis_client, 8)
+        room = await room_service.open_room(users[:2], 4)
+        # Newer rooms of another size fill the first pages of the lobby.
+        for user in users[2:7]:
+            await room_service.open_room([user], 3)
+
+        user_ids = await queue(users[7:], 4)
+        assert await Matchmaker().match_once() == 1
+        assert (await get_ticket(user_ids[0]))["room_code"] == room.code
+
+    asyncio.run(scenario())
+
+
+def test_users_are_requeued_when_a_tick_fails_partway(redis_client, monkeypatch):
+    async def scenario():
+        user_ids = await queue(await new_users(redis_client, 8), 4)
+        opened = []
+
+        async def open_one_room(users, max_players):
+            if opened:
+                raise RuntimeError("redis went away")
+            opened.append(await room_service.open_room(users, max_players))
+            return opened[0]
+
+        monkeypatch.setattr(matchmaking_service, "open_room", open_one_room)
+        with pytest.raises(RuntimeError):
+            await Matchmaker().match_once()
+
+        tickets = {user_id: await get_ticket(user_id) for user_id in user_ids}
+        seated = [user_id for user_id in user_ids if tickets[user_id]["status"] == "matched"]
+        assert {tickets[user_id]["room_code"] for user_id in seated} == {opened[0].code}
+        unseated = sorted(set(user_ids) - set(seated))
+        assert len(unseated) == 4
+        assert sorted(await redis_client.zrange(matchmaking_queue_key(4), 0, -1)) == unseated
+
+        monkeypatch.setattr(matchmaking_service, "open_room", room_service.open_room)
+        assert await Matchmaker().match_once() == 4
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_matchers_seat_each_user_once(redis_client, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(matchmaking_service, "MATCHMAKING_MAX_WAIT_SECONDS", 0)
+        users = await new_users(redis_client, 41)
+        await room_service.open_room(users[:1], 4)
+        user_ids = await queue(users[1:], 4)
+
+        # Four matchers race over the same queue and the same half-empty room.
+        for _ in range(3):
+            await asyncio.gather(*(Matchmaker(batch=7).match_once() for _ in range(4)))
+        # A tick on its own then groups any single users the racing ticks put back.
+        await Matchmaker().match_once()
+
+        seated = []
+        for code in await redis_client.smembers(ROOMS_ACTIVE_KEY):
+            players = await get_players(code)
+            assert len(players) <= 4
+            assert len({player.seat for player in players}) == len(players)
+            seated += [str(player.user_id) for player in players]
+        queued = await redis_client.zrange(matchmaking_queue_key(4), 0, -1)
+        assert len(seated) == len(set(seated))
+        assert sorted(queued + seated) == sorted(str(user.id) for user in users)
+        assert len(queued) < 2
+        for user_id in user_ids:
+            assert (await get_ticket(user_id))["status"] == ("queued" if user_id in queued else "matched")
+
+    asyncio.run(scenario())
@@ -0,0 +1,74 @@
+import random
+
+from backend.card_mask import THREE_OF_SPADES_MASK, cards_to_mask
+from backend.rules import beats, evaluate_mask, hand_combos, legal_plays
+from backend.schemas import Card, ComboType, Suit
+
+
+def make_card(rank: int, suit: Suit) -> Card:
+    return Card(rank=rank, suit=suit)
+
+
+def _brute_force_combos(hand_mask: int) -> set:
+    bits = [1 << index for index in range(52) if hand_mask >> index & 1]
+    combos = set()
+    for subset in range(1, 1 << len(bits)):
+        mask = sum(bit for position, bit in enumerate(bits) if subset >> position & 1)
+        try:
+            evaluate_mask(mask)
+        except ValueError:
+            continue
+        combos.add(mask)
+    return combos
+
+
+def test_hand_combos_matches_brute_force():
+    rng = random.Random(3)
+    for _ in range(5):
+        hand_mask = sum(1 << index for index in rng.sample(range(52), 11))
+        generated = hand_combos(hand_mask)
+        assert len(generated) == len(set(generated))
+        assert set(generated) == _brute_force_combos(hand_mask)
+
+
+def test_legal_plays_first_turn_requires_three_of_spades():
+    hand = cards_to_mask(
+        [
+            make_card(3, Suit.spades),
+            make_card(3, Suit.hearts),
+            make_card(4, Suit.clubs),
+            make_card(5, Suit.diamonds),
+            make_card(9, Suit.spades),
+        ]
+    )
+    plays = legal_plays(hand, 0, True)
+    assert plays
+    assert all(mask & THREE_OF_SPADES_MASK for mask in plays)
+    assert cards_to_mask([make_card(9, Suit.spades)]) not in plays
+
+
+def test_legal_plays_only_returns_beating_combos():
+    hand = cards_to_mask(
+        [
+            make_card(6, Suit.spades),
+            make_card(6, Suit.clubs),
+            make_card(6, Suit.diamonds),
+            make_card(6, Suit.hearts),
+            make_card(8, Suit.spades),
+            make_card(14, Suit.hearts),
+        ]
+    )
+    last_mask = cards_to_mask([make_card(15, Suit.spades)])
+    plays = legal_plays(hand, last_mask)
+    last = evaluate_mask(last_mask)
+    assert all(beats(evaluate_mask(mask), last) for mask in plays)
+    assert [evaluate_mask(mask).type for mask in plays] == [ComboType.four_kind]
+
+
+def test_legal_plays_is_cached_per_hand_and_trick():
+    hand = cards_to_mask([make_card(7, Suit.spades), make_card(7, Suit.hearts), make_card(10, Suit.clubs)])
+    last_mask = cards_to_mask([make_card(7, Suit.clubs)])
+    first = legal_plays(hand, last_mask)
+    hits = legal_plays.cache_info().hits
+    assert legal_plays(hand, last_mask) is first
+    assert legal_plays.cache_info().hits == hits + 1
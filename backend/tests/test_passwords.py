@@ -0,0 +1,79 @@
+import asyncio
+import hashlib
+import json
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from starlette.requests import Request
+
+import backend.passwords as passwords
+from backend.passwords import hash_password, verify_password
+from backend.redis_store import USER_TTL_SECONDS, room_meta_key, user_key
+from backend.room_service import join_room
+from backend.user_service import User
+
+CODE = "ABC234"
+
+
+def test_hashes_are_salted_and_verify():
+    async def scenario():
+        first, second = await asyncio.gather(hash_password("hunter2"), hash_password("hunter2"))
+        assert first != second
+        assert await verify_password("hunter2", first) == (True, None)
+        assert await verify_password("hunter3", first) == (False, None)
+
+    asyncio.run(scenario())
+
+
+def test_legacy_sha256_hashes_verify_and_come_back_upgraded():
+    async def scenario():
+        legacy = hashlib.sha256(b"hunter2").hexdigest()
+        assert await verify_password("wrong", legacy) == (False, None)
+        matches, upgraded = await verify_password("hunter2", legacy)
+        assert matches
+        assert upgraded.startswith("scrypt$")
+        assert await verify_password("hunter2", upgraded) == (True, None)
+
+    asyncio.run(scenario())
+
+
+def test_checks_past_the_pending_cap_are_refused(monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(passwords, "PASSWORD_HASH_MAX_PENDING", 2)
+        results = await asyncio.gather(*(hash_password("hunter2") for _ in range(3)), return_exceptions=True)
+        assert sum(isinstance(result, ValueError) for result in results) == 1
+        assert passwords._pending == 0
+
+    asyncio.run(scenario())
+
+
+def join_request(user_id: str, password: str) -> Request:
+    async def receive():
+        body = json.dumps({"user_id": user_id, "password": password}).encode()
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    scope = {"type": "http", "method": "POST", "path_params": {"code": CODE}, "query_string": b"", "headers": []}
+    return Request(scope, receive)
+
+
+@pytest.mark.parametrize("password, status_code", [("hunter2", 200), ("hunter3", 403)])
+def test_join_upgrades_a_legacy_room_password(redis_client, seed_room, password, status_code):
+    async def scenario():
+        await seed_room([[], []])
+        meta = json.loads(await redis_client.get(room_meta_key(CODE)))
+        legacy = hashlib.sha256(b"hunter2").hexdigest()
+        await redis_client.set(room_meta_key(CODE), json.dumps({**meta, "password_hash": legacy}))
+        now = datetime.utcnow()
+        user = User(id=uuid4(), name="Guest", created_at=now, last_joined_at=now)
+        await redis_client.set(user_key(str(user.id)), json.dumps(user.model_dump(mode="json")), ex=USER_TTL_SECONDS)
+
+        response = await join_room(join_request(str(user.id), password))
+        assert response.status_code == status_code
+        stored = json.loads(await redis_client.get(room_meta_key(CODE)))["password_hash"]
+        if status_code == 200:
+            assert await verify_password("hunter2", stored) == (True, None)
+        else:
+            assert stored == legacy
+
+    asyncio.run(scenario())
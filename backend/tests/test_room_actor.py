@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+import backend.room_actor as room_actor
+from backend import game_service
+from backend.room_service import get_players
+from backend.schemas import Card, GameState, Suit
+from backend.storage_codec import decode_state
+
+CODE = "ABC234"
+
+
+@pytest.fixture(autouse=True)
+def actors_enabled(monkeypatch):
+    monkeypatch.setattr(room_actor, "ROOM_ACTORS_ENABLED", True)
+    monkeypatch.setattr(room_actor, "ROOM_WRITE_BEHIND_SECONDS", 0.01)
+    yield
+    # Actors are bound to the event loop of the test that started them.
+    room_actor._actors.clear()
+
+
+def make_card(rank: int, suit: Suit) -> Card:
+    return Card(rank=rank, suit=suit)
+
+
+def payload(*cards):
+    return [card.model_dump(mode="json") for card in cards]
+
+
+def test_moves_after_load_skip_redis_until_write_behind(redis_client, seed_room):
+    async def scenario():
+        hands = [
+            [make_card(9, Suit.hearts), make_card(4, Suit.clubs)],
+            [make_card(10, Suit.clubs), make_card(5, Suit.hearts)],
+        ]
+        order = await seed_room(hands)
+        await room_actor.get_game_state(CODE)
+        redis_client.round_trips.reset()
+
+        await room_actor.play_turn(CODE, order[0], payload(make_card(9, Suit.hearts)))
+        state = await room_actor.play_turn(CODE, order[1], payload(make_card(10, Suit.clubs)))
+        assert redis_client.round_trips.count == 0
+        assert (await room_actor.get_players(CODE))[0].hand_count == 1
+
+        await asyncio.sleep(0.05)
+        stored = decode_state(await redis_client.get("room:ABC234:state"))
+        assert stored == state
+        assert await game_service.get_hand(CODE, order[1]) == [make_card(5, Suit.hearts)]
+        players = {player.id: player for player in await get_players(CODE)}
+        assert players[order[0]].hand_count == 1
+        assert players[order[1]].hand_count == 1
+        await room_actor.shutdown_room_actors()
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_plays_are_serialized(redis_client, seed_room):
+    async def scenario():
+        hands = [[make_card(9, Suit.hearts), make_card(4, Suit.clubs)], [make_card(5, Suit.clubs)]]
+        order = await seed_room(hands)
+        results = await asyncio.gather(
+            room_actor.play_turn(CODE, order[0], payload(make_card(9, Suit.hearts))),
+            room_actor.play_turn(CODE, order[0], payload(make_card(9, Suit.hearts))),
+            return_exceptions=True,
+        )
+        assert isinstance(results[0], GameState)
+        assert isinstance(results[1], ValueError)
+        assert str(results[1]) == "Not your turn"
+        await room_actor.shutdown_room_actors()
+
+    asyncio.run(scenario())
+
+
+def test_redis_operations_see_flushed_state(redis_client, seed_room):
+    async def scenario():
+        hands = [[make_card(15, Suit.hearts)], [make_card(10, Suit.clubs), make_card(5, Suit.hearts)]]
+        order = await seed_room(hands, current_seat=0)
+        state = await room_actor.play_turn(CODE, order[0], payload(make_card(15, Suit.hearts)))
+        assert state.winner_id == order[0]
+        # Marking a player disconnected rewrites their JSON in Redis; it must run after
+        # the pending scores were written, not clobber them.
+        room = await room_actor.set_player_status(CODE, order[1], "disconnected")
+        players = {player.id: player for player in room.players}
+        assert players[order[0]].score == 2
+        assert players[order[1]].score == -2
+        assert players[order[1]].status == "disconnected"
+        await room_actor.shutdown_room_actors()
+
+    asyncio.run(scenario())
+
+
+def test_disabled_mode_goes_straight_to_redis(redis_client, seed_room, monkeypatch):
+    monkeypatch.setattr(room_actor, "ROOM_ACTORS_ENABLED", False)
+
+    async def scenario():
+        order = await seed_room([[make_card(9, Suit.hearts)], [make_card(5, Suit.clubs)]])
+        await room_actor.play_turn(CODE, order[0], payload(make_card(9, Suit.hearts)))
+        assert not room_actor._actors
+
+    asyncio.run(scenario())
+
+
+def test_write_behind_appends_the_move_log(redis_client, seed_room):
+    async def scenario():
+        hands = [[make_card(9, Suit.hearts), make_card(4, Suit.clubs)], [make_card(5, Suit.clubs)]]
+        order = await seed_room(hands, current_seat=1, last_play=(0, [make_card(4, Suit.hearts)]))
+        await room_actor.pass_turn(CODE, order[1])
+        await room_actor.play_turn(CODE, order[0], payload(make_card(9, Suit.hearts)))
+        await room_actor.shutdown_room_actors()
+        entries = await redis_client.xrange("room:ABC234:moves")
+        assert [(entry_id, fields["type"]) for entry_id, fields in entries] == [("1-0", "pass"), ("2-0", "play")]
+
+    asyncio.run(scenario())
@@ -0,0 +1,188 @@
+import asyncio
+import json
+
+import backend.room_hub as room_hub
+from backend.redis_store import room_channel
+from backend.room_hub import RoomHub
+
+CODE = "ABC234"
+
+
+class FakeWebSocket:
+    def __init__(self) -> None:
+        self.sent = []
+        self.received = asyncio.Event()
+        self.close_code = None
+
+    async def send_json(self, message: dict) -> None:
+        self.sent.append(message)
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(json.loads(text))
+        self.received.set()
+
+    async def close(self, code: int = 1000) -> None:
+        self.close_code = code
+
+
+class StuckWebSocket(FakeWebSocket):
+    async def send_text(self, text: str) -> None:
+        await asyncio.Event().wait()
+
+
+class ClosedWebSocket(FakeWebSocket):
+    async def send_text(self, text: str) -> None:
+        raise RuntimeError("socket closed")
+
+
+async def settle():
+    # Long enough for a PUBLISH to reach the other hub's subscriber task.
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+
+
+def test_broadcasts_reach_sockets_on_other_instances_once(redis_client):
+    async def scenario():
+        first, second = RoomHub(), RoomHub()
+        here, there = FakeWebSocket(), FakeWebSocket()
+        await first.connect(here, CODE, "p1")
+        await second.connect(there, CODE, "p2")
+
+        await first.broadcast(CODE, {"type": "room:update"})
+        await asyncio.wait_for(there.received.wait(), 1)
+        await first.send_to_player(CODE, "p2", {"type": "hand:deal"})
+        await first.send_to_player(CODE, "p1", {"type": "hand:deal"})
+        await settle()
+        assert [message["type"] for message in here.sent] == ["room:update", "hand:deal"]
+        assert [message["type"] for message in there.sent] == ["room:update", "hand:deal"]
+
+        await first.close()
+        await second.close()
+
+    asyncio.run(scenario())
+
+
+def test_room_channels_follow_local_sockets(redis_client):
+    async def scenario():
+        hub = RoomHub()
+        sockets = [FakeWebSocket(), FakeWebSocket()]
+        await hub.connect(sockets[0], CODE, "p1")
+        await hub.connect(sockets[1], CODE, "p2")
+        assert await redis_client.pubsub_numsub(room_channel(CODE)) == [(room_channel(CODE), 1)]
+
+        await hub.disconnect(sockets[0], CODE, "p1")
+        assert await redis_client.pubsub_numsub(room_channel(CODE)) == [(room_channel(CODE), 1)]
+        await hub.disconnect(sockets[1], CODE)
+        await settle()
+        assert await redis_client.pubsub_numsub(room_channel(CODE)) == [(room_channel(CODE), 0)]
+        await hub.close()
+
+    asyncio.run(scenario())
+
+
+def test_room_stays_subscribed_when_joined_while_its_last_socket_leaves(redis_client):
+    async def scenario():
+        hub = RoomHub()
+        leaving, joining = FakeWebSocket(), FakeWebSocket()
+        await hub.connect(leaving, CODE, "p1")
+        await asyncio.gather(hub.disconnect(leaving, CODE), hub.connect(joining, CODE, "p2"))
+        assert await redis_client.pubsub_numsub(room_channel(CODE)) == [(room_channel(CODE), 1)]
+        assert hub._rooms == {CODE: {"p2": {joining}}}
+        await hub.close()
+
+    asyncio.run(scenario())
+
+
+def test_hub_without_pubsub_only_delivers_locally(redis_client):
+    async def scenario():
+        hub = RoomHub(pubsub_enabled=False)
+        websocket = FakeWebSocket()
+        await hub.connect(websocket, CODE, "p1")
+        redis_client.round_trips.reset()
+        await hub.broadcast(CODE, {"type": "room:update"})
+        await asyncio.wait_for(websocket.received.wait(), 1)
+        assert redis_client.round_trips.count == 0
+        assert websocket.sent == [{"type": "room:update"}]
+        await hub.close()
+
+    asyncio.run(scenario())
+
+
+def test_stuck_and_closed_sockets_are_dropped_without_holding_up_the_room(redis_client, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(room_hub, "ROOM_HUB_SEND_TIMEOUT_SECONDS", 0.05)
+        hub = RoomHub(pubsub_enabled=False)
+        healthy, stuck, closed = FakeWebSocket(), StuckWebSocket(), ClosedWebSocket()
+        await hub.connect(stuck, CODE, "p1")
+        await hub.connect(healthy, CODE, "p1")
+        await hub.connect(closed, CODE, "p2")
+
+        await asyncio.wait_for(hub.broadcast(CODE, {"type": "room:update"}), 0.01)
+        await asyncio.wait_for(healthy.received.wait(), 0.04)
+        await hub.broadcast(CODE, {"type": "turn:play"})
+        await asyncio.sleep(0.1)
+        assert [message["type"] for message in healthy.sent] == ["room:update", "turn:play"]
+        assert hub._rooms == {CODE: {"p1": {healthy}}}
+        assert (stuck.close_code, closed.close_code) == (1013, 1013)
+        assert hub.snapshot()["send_failures"] == 2
+        await hub.close()
+
+    asyncio.run(scenario())
+
+
+def test_full_outbox_keeps_the_newest_snapshots_then_disconnects(redis_client, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(room_hub, "ROOM_HUB_QUEUE_SIZE", 4)
+        hub = RoomHub(pubsub_enabled=False)
+        slow = FakeWebSocket()
+        await hub.connect(slow, CODE, "p1")
+        for index in range(3):
+            await hub.broadcast(CODE, {"type": "room:update", "payload": {"index": index}})
+        await hub.broadcast(CODE, {"type": "hand:deal"})
+        await hub.broadcast(CODE, {"type": "turn:play", "payload": {"index": 3}})
+        await hub.broadcast(CODE, {"type": "room:update", "payload": {"index": 4}})
+        assert hub.snapshot()["max_queue_depth"] == 4
+        assert hub.snapshot()["coalesced"] == 2
+        await settle()
+        assert [(message["type"], message.get("payload")) for message in slow.sent] == [
+            ("room:update", {"index": 2}),
+            ("hand:deal", None),
+            ("turn:play", {"index": 3}),
+            ("room:update", {"index": 4}),
+        ]
+
+        # Nothing left to coalesce: the fifth queued event is one too many.
+        for _ in range(5):
+            await hub.broadcast(CODE, {"type": "hand:deal"})
+        await settle()
+        assert len(slow.sent) == 4
+        assert slow.close_code == 1013
+        assert hub._rooms == {}
+        assert hub.snapshot() == {
+            "connections": 0,
+            "queued": 0,
+            "max_queue_depth": 0,
+            "queue_size": 4,
+            "coalesced": 2,
+            "slow_disconnects": 1,
+            "send_failures": 0,
+        }
+
+    asyncio.run(scenario())
+
+
+def test_replies_queue_behind_broadcasts(redis_client):
+    async def scenario():
+        hub = RoomHub(pubsub_enabled=False)
+        websocket = FakeWebSocket()
+        await hub.send(websocket, {"type": "error"})
+        await hub.connect(websocket, CODE, "p1")
+        await hub.broadcast(CODE, {"type": "room:update"})
+        await hub.send(websocket, {"type": "hand:deal"})
+        assert [message["type"] for message in websocket.sent] == ["error"]
+        await hub.disconnect(websocket, CODE, "p1")
+        await settle()
+        assert [message["type"] for message in websocket.sent] == ["error", "room:update", "hand:deal"]
+        assert hub.snapshot()["connections"] == 0
+
+    asyncio.run(scenario())
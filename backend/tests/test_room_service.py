@@ -0,0 +1,104 @@
+import asyncio
+from datetime import datetime
+from uuid import uuid4
+
+import backend.room_codes as room_codes
+from backend import room_service
+from backend.redis_store import ROOMS_ACTIVE_KEY, room_players_key
+from backend.room_service import get_players, get_room, set_player_ready, set_player_status, update_players
+from backend.schemas import Player, Room
+
+CODE = "ABC234"
+
+
+def test_update_players_is_one_round_trip(redis_client, seed_room):
+    async def scenario():
+        await seed_room([[], [], [], []])
+        players = await get_players(CODE)
+        for player in players:
+            player.score += 5
+            player.name = player.name.lower()
+        redis_client.round_trips.reset()
+        await update_players(CODE, players)
+        assert redis_client.round_trips.count == 1
+        stored = {player.id: player for player in await get_players(CODE)}
+        assert all(stored[player.id] == player for player in players)
+
+    asyncio.run(scenario())
+
+
+def test_update_players_can_write_only_counter_fields(redis_client, seed_room):
+    async def scenario():
+        await seed_room([[], []])
+        players = await get_players(CODE)
+        players[0].hand_count = 4
+        players[0].name = "not written"
+        await update_players(CODE, players[:1], ("hand_count",))
+        stored = (await get_players(CODE))[0]
+        assert stored.hand_count == 4
+        assert stored.name == "P0"
+
+    asyncio.run(scenario())
+
+
+def test_ready_and_status_updates_leave_other_fields_alone(redis_client, seed_room):
+    async def scenario():
+        order = await seed_room([[], []])
+        # A score change committed elsewhere after this request read the players.
+        await redis_client.hincrby(room_players_key(CODE), f"{order[1]}:score", 3)
+        await set_player_status(CODE, order[1], "disconnected")
+        room = await set_player_ready(CODE, order[1], True)
+        player = next(player for player in room.players if player.id == order[1])
+        assert player.is_ready
+        stored = next(player for player in await get_players(CODE) if player.id == order[1])
+        assert stored.is_ready
+        assert stored.status == "disconnected"
+        assert stored.score == 3
+
+    asyncio.run(scenario())
+
+
+def test_removed_player_leaves_no_fields_behind(redis_client, seed_room):
+    async def scenario():
+        order = await seed_room([[], [], []])
+        await room_service.remove_player(CODE, order[2])
+        keys = await redis_client.hkeys(room_players_key(CODE))
+        assert not any(key.startswith(str(order[2])) for key in keys)
+
+    asyncio.run(scenario())
+
+
+def new_room() -> Room:
+    host = Player(id=uuid4(), user_id=uuid4(), name="Host", seat=0, is_host=True)
+    return Room(
+        id=uuid4(), code="", host_id=host.id, host_user_id=host.user_id, players=[host], created_at=datetime.utcnow()
+    )
+
+
+def test_insert_room_skips_a_code_claimed_since_the_pool_checked_it(redis_client, seed_room, monkeypatch):
+    async def scenario():
+        await seed_room([[], []])
+        existing = await get_room(CODE)
+        codes = iter([CODE, "XYZ789"])
+        monkeypatch.setattr(room_service.room_codes, "take", lambda: next(codes))
+        room = await room_service.insert_room(new_room())
+        assert room.code == "XYZ789"
+        assert await get_room(CODE) == existing
+        assert (await get_room("XYZ789")).players == room.players
+        assert await redis_client.sismember(ROOMS_ACTIVE_KEY, "XYZ789")
+
+    asyncio.run(scenario())
+
+
+def test_code_pool_only_keeps_codes_that_are_free(redis_client, seed_room, monkeypatch):
+    async def scenario():
+        await seed_room([[], []])
+        candidates = iter([CODE, "FREE22", "FREE33"])
+        monkeypatch.setattr(room_codes, "generate_room_code", lambda: next(candidates))
+        pool = room_codes.RoomCodePool(size=3)
+        redis_client.round_trips.reset()
+        await pool.refill()
+        assert redis_client.round_trips.count == 1
+        assert sorted(pool._codes) == ["FREE22", "FREE33"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,81 @@
+import random
+from functools import lru_cache
+
+from backend.card_mask import cards_to_mask
+from backend.rules import evaluate_mask
+from backend.schemas import Card, ComboType, SpecialHand, Suit
+from backend.solver import detect_special_hand, min_combo_count, solve_hand, solve_hands
+
+
+def make_card(rank: int, suit: Suit) -> Card:
+    return Card(rank=rank, suit=suit)
+
+
+def _brute_force_min(hand_mask: int) -> int:
+    bits = [1 << index for index in range(52) if hand_mask >> index & 1]
+
+    @lru_cache(maxsize=None)
+    def best(remaining: int) -> int:
+        if not remaining:
+            return 0
+        low = remaining & -remaining
+        others = [bit for bit in bits if remaining & bit and bit != low]
+        result = len(bits)
+        for subset in range(1 << len(others)):
+            combo = low | sum(bit for position, bit in enumerate(others) if subset >> position & 1)
+            try:
+                evaluate_mask(combo)
+            except ValueError:
+                continue
+            result = min(result, 1 + best(remaining & ~combo))
+        return result
+
+    return best(hand_mask)
+
+
+def test_min_combo_count_matches_brute_force():
+    rng = random.Random(11)
+    for _ in range(20):
+        hand_mask = sum(1 << index for index in rng.sample(range(40), 9))
+        assert min_combo_count(hand_mask) == _brute_force_min(hand_mask)
+
+
+def test_solution_partitions_hand_into_valid_combos():
+    rng = random.Random(12)
+    for analysis in solve_hands(sum(1 << index for index in rng.sample(range(52), 13)) for _ in range(50)):
+        union = 0
+        for combo in analysis.combos:
+            evaluate_mask(combo)
+            assert not union & combo
+            union |= combo
+        assert union == analysis.hand_mask
+
+
+def test_solve_hand_reports_chop_holdings():
+    cards = [make_card(9, suit) for suit in Suit]
+    cards += [make_card(rank, suit) for rank in (4, 5, 6) for suit in (Suit.spades, Suit.hearts)]
+    cards += [make_card(12, Suit.clubs), make_card(15, Suit.hearts), make_card(3, Suit.clubs)]
+    analysis = solve_hand(cards_to_mask(cards))
+    assert analysis.four_kind_ranks == (9,)
+    assert analysis.longest_pair_run == 3
+    assert analysis.combo_count == 5
+    assert {evaluate_mask(combo).type for combo in analysis.combos} >= {
+        ComboType.four_kind,
+        ComboType.consecutive_pairs,
+    }
+
+
+def test_detect_special_hands():
+    four_twos = cards_to_mask([make_card(15, suit) for suit in Suit])
+    dragon = cards_to_mask([make_card(rank, Suit.spades) for rank in range(3, 15)])
+    six_pairs = cards_to_mask(
+        [make_card(rank, suit) for rank in (3, 5, 7, 9, 11, 13) for suit in (Suit.clubs, Suit.hearts)]
+    )
+    five_runs = cards_to_mask(
+        [make_card(rank, suit) for rank in range(6, 11) for suit in (Suit.clubs, Suit.hearts)]
+    )
+    assert detect_special_hand(four_twos) == SpecialHand.four_twos
+    assert detect_special_hand(dragon) == SpecialHand.dragon_straight
+    assert detect_special_hand(six_pairs) == SpecialHand.six_pairs
+    assert detect_special_hand(five_runs) == SpecialHand.five_consecutive_pairs
+    assert detect_special_hand(cards_to_mask([make_card(3, Suit.spades)])) is None
@@ -0,0 +1,132 @@
+import json
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from backend.card_mask import cards_to_mask
+from backend.schemas import (
+    BotLevel,
+    Card,
+    ComboType,
+    GameState,
+    GameStatus,
+    LastPlay,
+    Player,
+    Room,
+    RoomStatus,
+    Suit,
+)
+from backend.storage_codec import (
+    HAND_PREFIX,
+    STATE_PREFIX,
+    decode_hand,
+    decode_player,
+    decode_room,
+    decode_state,
+    encode_cards_json,
+    encode_hand,
+    encode_state,
+)
+
+
+def make_card(rank: int, suit: Suit) -> Card:
+    return Card(rank=rank, suit=suit)
+
+
+def make_state(**overrides) -> GameState:
+    order = [uuid4() for _ in range(4)]
+    fields = dict(
+        room_id=uuid4(),
+        status=GameStatus.playing,
+        players_order=order,
+        current_turn=order[2],
+        last_play=LastPlay(
+            type=ComboType.pair,
+            cards=[make_card(9, Suit.clubs), make_card(9, Suit.hearts)],
+            by_player_id=order[1],
+        ),
+        pass_count=1,
+        first_game=True,
+        first_turn_required=False,
+    )
+    fields.update(overrides)
+    return GameState(**fields)
+
+
+def test_hand_round_trips_compactly():
+    hand = [make_card(3, Suit.spades), make_card(10, Suit.diamonds), make_card(15, Suit.hearts)]
+    raw = encode_hand(cards_to_mask(hand))
+    assert raw.startswith(HAND_PREFIX)
+    assert len(raw) <= len(HAND_PREFIX) + 13
+    assert decode_hand(raw) == cards_to_mask(hand)
+    assert decode_hand(encode_hand(0)) == 0
+
+
+def test_legacy_json_hand_still_decodes():
+    hand = [make_card(14, Suit.spades), make_card(4, Suit.clubs)]
+    assert decode_hand(encode_cards_json(hand)) == cards_to_mask(hand)
+
+
+def test_state_round_trips():
+    state = make_state()
+    raw = encode_state(state)
+    assert raw.startswith(STATE_PREFIX)
+    assert decode_state(raw) == state
+
+
+def test_finished_state_without_last_play_round_trips():
+    state = make_state(last_play=None, status=GameStatus.finished, first_game=False)
+    state.winner_id = state.players_order[0]
+    assert decode_state(encode_state(state)) == state
+
+
+def test_turn_deadline_round_trips_in_milliseconds():
+    state = make_state(turn_deadline=datetime(2026, 5, 1, 12, 30, 5, 123000, tzinfo=timezone.utc))
+    assert decode_state(encode_state(state)) == state
+
+
+def test_older_state_versions_read_with_defaults():
+    state = make_state(move_count=12, turn_deadline=datetime(2026, 5, 1, tzinfo=timezone.utc), version=20)
+    fields = encode_state(state).split("|")
+    assert decode_state("|".join(["s3", *fields[1:-1]])) == state.model_copy(update={"version": 12})
+    assert decode_state("|".join(["s2", *fields[1:-2]])) == state.model_copy(
+        update={"turn_deadline": None, "version": 12}
+    )
+    assert decode_state("|".join(["s1", *fields[1:-3]])) == state.model_copy(
+        update={"move_count": 0, "turn_deadline": None, "version": 0}
+    )
+
+
+def test_legacy_json_state_still_decodes():
+    state = make_state()
+    assert decode_state(json.dumps(state.model_dump(mode="json"))) == state
+
+
+def test_decoded_state_matches_validated_model():
+    state = make_state()
+    decoded = decode_state(encode_state(state))
+    assert decoded.model_dump() == state.model_dump()
+    assert GameState.model_validate(decoded.model_dump(mode="json")) == decoded
+
+
+def test_player_and_room_decode_without_validation_match_validated_models():
+    bot = Player(
+        id=uuid4(), user_id=uuid4(), name="Bot 2", seat=1, is_ready=True, is_bot=True, bot_level=BotLevel.hard
+    )
+    host = Player(id=uuid4(), user_id=uuid4(), name="Host", seat=0, is_host=True, score=-3)
+    players = [decode_player(json.dumps(player.model_dump(mode="json"))) for player in (host, bot)]
+    assert players == [host, bot]
+
+    room = Room(
+        id=uuid4(),
+        code="ABC234",
+        host_id=host.id,
+        host_user_id=host.user_id,
+        status=RoomStatus.in_game,
+        players=[host, bot],
+        created_at=datetime.utcnow(),
+        games_played=2,
+    )
+    meta = json.loads(json.dumps(room.model_dump(mode="json", exclude={"players"})))
+    decoded = decode_room(meta, players)
+    assert decoded == room
+    assert decoded.model_dump(mode="json") == room.model_dump(mode="json")
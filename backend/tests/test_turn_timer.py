@@ -0,0 +1,112 @@
+import asyncio
+import time
+
+import pytest
+
+import backend.ws_service as ws_service
+from backend import game_service
+from backend.redis_store import ROOMS_PLAYING_KEY
+from backend.schemas import Card, Suit
+from backend.turn_timer import TimingWheel
+
+CODE = "ABC234"
+
+
+def make_card(rank: int, suit: Suit) -> Card:
+    return Card(rank=rank, suit=suit)
+
+
+@pytest.fixture(autouse=True)
+def fresh_turn_timers(monkeypatch):
+    # The shared wheel's task belongs to the event loop of the test that started it.
+    monkeypatch.setattr(ws_service, "turn_timers", TimingWheel(ws_service._expire_turn))
+
+
+def test_wheel_fires_each_key_once_at_its_latest_deadline():
+    async def scenario():
+        fired = []
+
+        async def on_expire(key, token):
+            fired.append((key, token))
+
+        # Long ticks so that only the explicit advance() calls move the wheel.
+        wheel = TimingWheel(on_expire, tick_seconds=10, slots=4)
+        now = time.time()
+        wheel.schedule("a", now + 25, 1)
+        wheel.schedule("b", now + 25, 1)
+        wheel.schedule("a", now + 95, 2)  # rescheduled past one revolution
+        wheel.cancel("b")
+        wheel.advance(9)
+        await asyncio.sleep(0)
+        assert fired == []
+        assert len(wheel) == 1
+        wheel.advance()
+        await asyncio.sleep(0)
+        assert fired == [("a", 2)]
+        assert len(wheel) == 0
+        await wheel.stop()
+
+    asyncio.run(scenario())
+
+
+def test_expired_turn_passes_when_a_play_is_on_the_table(redis_client, seed_room):
+    async def scenario():
+        hands = [[make_card(9, Suit.hearts)], [make_card(5, Suit.clubs)], [make_card(6, Suit.clubs)]]
+        order = await seed_room(hands, current_seat=1, last_play=(0, [make_card(8, Suit.hearts)]))
+        await ws_service._expire_turn(CODE, 0)
+        state = await game_service.get_game_state(CODE)
+        assert state.current_turn == order[2]
+        assert state.pass_count == 1
+        # The deadline of the new turn is on the wheel, tagged with its move.
+        assert len(ws_service.turn_timers) == 1
+
+        # A timer that a real move has already answered does nothing.
+        await ws_service._expire_turn(CODE, 0)
+        assert await game_service.get_game_state(CODE) == state
+
+    asyncio.run(scenario())
+
+
+def test_expired_lead_plays_the_lowest_single(redis_client, seed_room):
+    async def scenario():
+        hands = [
+            [make_card(12, Suit.hearts), make_card(3, Suit.spades), make_card(7, Suit.clubs)],
+            [make_card(5, Suit.clubs)],
+        ]
+        order = await seed_room(hands, first_turn_required=True)
+        await ws_service._expire_turn(CODE, 0)
+        state = await game_service.get_game_state(CODE)
+        assert state.last_play.cards == [make_card(3, Suit.spades)]
+        assert state.current_turn == order[1]
+        assert state.turn_deadline is not None
+
+    asyncio.run(scenario())
+
+
+def test_deadlines_are_restored_from_stored_state(redis_client, seed_room):
+    async def scenario():
+        await seed_room([[], [], []])
+        await redis_client.delete("room:ABC234:state")
+        # A room whose state expired while it was listed as playing.
+        await redis_client.zadd(ROOMS_PLAYING_KEY, {"GONE99": 0})
+        state = await game_service.start_game(CODE)
+        assert state.turn_deadline is not None
+        assert await redis_client.zscore(ROOMS_PLAYING_KEY, CODE) == round(state.turn_deadline.timestamp() * 1000)
+
+        playing = await game_service.get_playing_states()
+        assert playing == [(CODE, state)]
+        assert await redis_client.zrange(ROOMS_PLAYING_KEY, 0, -1) == [CODE]
+        await ws_service.restore_turn_timers()
+        assert len(ws_service.turn_timers) == 1
+
+    asyncio.run(scenario())
+
+
+def test_rooms_leave_the_playing_set_when_their_game_ends(redis_client, seed_room):
+    async def scenario():
+        order = await seed_room([[make_card(3, Suit.spades)], [make_card(5, Suit.clubs), make_card(6, Suit.clubs)]])
+        await redis_client.zadd(ROOMS_PLAYING_KEY, {CODE: 0})
+        await game_service.play_turn(CODE, order[0], [make_card(3, Suit.spades).model_dump(mode="json")])
+        assert await redis_client.zcard(ROOMS_PLAYING_KEY) == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,206 @@
+import asyncio
+import json
+
+from starlette.websockets import WebSocketDisconnect
+
+import backend.ws_service as ws_service
+from backend import game_service
+from backend.redis_store import room_state_key
+from backend.room_hub import RoomHub
+from backend.schemas import Card, SpecialHand, Suit
+
+CODE = "ABC234"
+
+
+class FakeWebSocket:
+    def __init__(self) -> None:
+        self.sent = []
+
+    async def send_json(self, message: dict) -> None:
+        self.sent.append(message)
+
+    async def send_text(self, text: str) -> None:
+        self.sent.append(json.loads(text))
+
+
+class ScriptedWebSocket(FakeWebSocket):
+    def __init__(self, messages) -> None:
+        super().__init__()
+        self.messages = list(messages)
+
+    async def accept(self) -> None:
+        pass
+
+    async def receive_json(self) -> dict:
+        if not self.messages:
+            raise WebSocketDisconnect()
+        return self.messages.pop(0)
+
+
+def payload(*cards):
+    return [card.model_dump(mode="json") for card in cards]
+
+
+async def connected_table(seed_room, monkeypatch):
+    monkeypatch.setattr(game_service, "TURN_TIMEOUT_SECONDS", 0)
+    monkeypatch.setattr(ws_service, "room_hub", RoomHub(pubsub_enabled=False))
+    monkeypatch.setattr(ws_service, "_turn_views", {})
+    hands = [
+        [Card(rank=3, suit=Suit.spades), Card(rank=9, suit=Suit.hearts)],
+        [Card(rank=5, suit=Suit.clubs), Card(rank=7, suit=Suit.hearts)],
+    ]
+    order = await seed_room(hands)
+    websocket = FakeWebSocket()
+    await ws_service.room_hub.connect(websocket, CODE, str(order[0]))
+    return order, websocket
+
+
+async def play(player_id, *cards) -> None:
+    await ws_service._broadcast_turn_play(CODE, await ws_service.play_turn(CODE, player_id, payload(*cards)))
+
+
+def test_turns_go_out_as_deltas_on_the_previous_version(redis_client, seed_room, monkeypatch):
+    async def scenario():
+        order, websocket = await connected_table(seed_room, monkeypatch)
+        # Nothing sent for the room yet: the first delta carries every field.
+        await play(order[0], Card(rank=3, suit=Suit.spades))
+        await play(order[1], Card(rank=5, suit=Suit.clubs))
+        await ws_service._broadcast_turn_pass(CODE, await ws_service.pass_turn(CODE, order[0]))
+        await asyncio.sleep(0)
+
+        first, second, passed = (message["payload"] for message in websocket.sent)
+        assert [message["type"] for message in websocket.sent] == ["turn:play", "turn:play", "turn:pass"]
+        assert first["version"] == 1
+        assert {"room_id", "players_order", "last_play"} <= set(first["state"])
+        assert len(first["players"]) == 2
+
+        assert second["version"] == 2
+        assert set(second["state"]) == {"current_turn", "last_play", "move_count"}
+        assert second["state"]["last_play"]["by_player_id"] == str(order[1])
+        assert second["players"] == {str(order[1]): {"hand_count": 1}}
+
+        # Everyone else passed, so the trick goes back to its winner.
+        assert passed["version"] == 3
+        assert passed["state"] == {"current_turn": str(order[1]), "last_play": None, "move_count": 3}
+        assert "players" not in passed
+        await ws_service.room_hub.close()
+
+    asyncio.run(scenario())
+
+
+def test_turn_views_are_dropped_with_the_rooms_last_socket(redis_client, seed_room, monkeypatch):
+    async def scenario():
+        order, websocket = await connected_table(seed_room, monkeypatch)
+        await play(order[0], Card(rank=3, suit=Suit.spades))
+        assert list(ws_service._turn_views) == [CODE]
+
+        await ws_service._disconnect(websocket, CODE, str(order[0]))
+        assert ws_service._turn_views == {}
+        # Turns nobody here watches, e.g. a timeout, leave no view behind.
+        await play(order[1], Card(rank=5, suit=Suit.clubs))
+        assert ws_service._turn_views == {}
+        await ws_service.room_hub.close()
+
+    asyncio.run(scenario())
+
+
+def test_full_state_and_room_go_out_on_every_turn_without_deltas(redis_client, seed_room, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(ws_service, "STATE_DELTAS_ENABLED", False)
+        order, websocket = await connected_table(seed_room, monkeypatch)
+        await play(order[0], Card(rank=3, suit=Suit.spades))
+        await asyncio.sleep(0)
+
+        assert [message["type"] for message in websocket.sent] == ["turn:play", "room:update"]
+        assert websocket.sent[0]["payload"]["state"]["version"] == 1
+        assert len(websocket.sent[1]["payload"]["room"]["players"]) == 2
+        await ws_service.room_hub.close()
+
+    asyncio.run(scenario())
+
+
+def test_special_hands_stay_out_of_what_the_table_sees(redis_client, seed_room, monkeypatch):
+    async def scenario():
+        order, websocket = await connected_table(seed_room, monkeypatch)
+        four_twos = [Card(rank=15, suit=suit) for suit in Suit]
+        rigged = {order[0]: four_twos, order[1]: [Card(rank=3, suit=Suit.spades), Card(rank=4, suit=Suit.clubs)]}
+        monkeypatch.setattr(game_service, "deal_from_seed", lambda players, seed: rigged)
+        await redis_client.delete(room_state_key(CODE))
+        host = {"code": CODE, "player_id": str(order[0])}
+        await ws_service._handle_game_start(websocket, host, ws_service.ConnectionState())
+        other = FakeWebSocket()
+        sync = {"code": CODE, "player_id": str(order[1])}
+        await ws_service._handle_room_sync(other, sync, ws_service.ConnectionState())
+        await asyncio.sleep(0)
+
+        assert await game_service.get_special_hands(CODE) == {order[0]: SpecialHand.four_twos}
+        sent = json.dumps(websocket.sent + other.sent)
+        assert "special" not in sent
+        assert SpecialHand.four_twos.value not in sent
+        await ws_service.room_hub.close()
+
+    asyncio.run(scenario())
+
+
+def test_error_that_ends_the_connection_reaches_the_client(redis_client, seed_room, monkeypatch):
+    async def scenario():
+        order, _ = await connected_table(seed_room, monkeypatch)
+        join = {"type": "room:join", "payload": {"code": CODE, "player_id": str(order[1])}}
+        # Not order[1]'s turn: play_turn raises and the connection ends with an error.
+        cards = payload(Card(rank=5, suit=Suit.clubs))
+        play = {"type": "turn:play", "payload": {"code": CODE, "player_id": str(order[1]), "cards": cards}}
+        websocket = ScriptedWebSocket([join, play])
+        await ws_service.websocket_endpoint(websocket)
+
+        assert [message["type"] for message in websocket.sent] == ["room:update", "game:start", "hand:deal", "error"]
+        assert websocket.sent[-1]["payload"] == {"message": "Not your turn"}
+        await ws_service.room_hub.close()
+
+    asyncio.run(scenario())
+
+
+def test_hint_off_turn_answers_without_dropping_the_player(redis_client, seed_room, monkeypatch):
+    async def scenario():
+        order, table = await connected_table(seed_room, monkeypatch)
+        join = {"type": "room:join", "payload": {"code": CODE, "player_id": str(order[1])}}
+        hint = {"type": "turn:hint", "payload": {"code": CODE, "player_id": str(order[1])}}
+        cards = payload(Card(rank=3, suit=Suit.spades))
+        opponent_plays = {"type": "turn:play", "payload": {"code": CODE, "player_id": str(order[0]), "cards": cards}}
+        websocket = ScriptedWebSocket([join, hint, opponent_plays, hint])
+        await ws_service.websocket_endpoint(websocket)
+        await ws_service.room_hub.flush(websocket)
+
+        types = [message["type"] for message in websocket.sent]
+        assert "error" not in types
+        # The connection outlived the off-turn hint: the play and the second hint reached it.
+        assert types.index("turn:hint") < types.index("turn:play")
+        off_turn, on_turn = (message["payload"] for message in websocket.sent if message["type"] == "turn:hint")
+        assert off_turn == {"plays": [], "can_pass": False}
+        both = [payload(Card(rank=5, suit=Suit.clubs)), payload(Card(rank=7, suit=Suit.hearts))]
+        assert on_turn == {"plays": both, "can_pass": True}
+        await ws_service.room_hub.close()
+
+    asyncio.run(scenario())
+
+
+def test_bot_runner_survives_an_unexpected_error(monkeypatch, caplog):
+    calls = []
+
+    async def flaky_state(code):
+        calls.append(code)
+        if len(calls) == 1:
+            # A turn request lands while the runner is busy, then Redis drops out.
+            ws_service._schedule_bots(code)
+            raise ConnectionError("connection reset")
+        return None
+
+    async def scenario():
+        monkeypatch.setattr(ws_service, "get_game_state", flaky_state)
+        monkeypatch.setattr(ws_service, "_bot_runners", {})
+        ws_service._schedule_bots(CODE)
+        await ws_service._bot_runners[CODE]
+
+    asyncio.run(scenario())
+    assert calls == [CODE, CODE]
+    assert ws_service._bot_runners == {}
+    assert "connection reset" in caplog.text
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+# One hashed timing wheel per process drives every room's turn deadline: a single task
+# wakes once per tick and only looks at the slot for that tick, so scheduling,
+# rescheduling and cancelling are O(1) whatever the number of tables. Deadlines
+# further out than one revolution stay in their slot until their tick comes round.
+TURN_TIMER_TICK_SECONDS = float(os.getenv("TURN_TIMER_TICK_SECONDS", "0.25"))
+TURN_TIMER_SLOTS = int(os.getenv("TURN_TIMER_SLOTS", "512"))
+
+logger = logging.getLogger(__name__)
+
+ExpiryCallback = Callable[[str, int], Awaitable[None]]
+
+
+class TimingWheel:
+    def __init__(
+        self,
+        on_expire: ExpiryCallback,
+        tick_seconds: float = TURN_TIMER_TICK_SECONDS,
+        slots: int = TURN_TIMER_SLOTS,
+    ) -> None:
+        self._on_expire = on_expire
+        self._tick_seconds = tick_seconds
+        self._slots: List[Dict[str, Tuple[int, int]]] = [{} for _ in range(slots)]
+        self._entries: Dict[str, int] = {}
+        self._tick = 0
+        self._started_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._callbacks: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def schedule(self, key: str, deadline: float, token: int) -> None:
+        # ``deadline`` is wall-clock epoch seconds, as persisted; ``token`` is handed
+        # back to the callback so it can tell a stale expiry from a live one.
+        self._ensure_running()
+        self.cancel(key)
+        delay = max(0.0, deadline - time.time())
+        expires_at = self._tick + max(1, math.ceil(delay / self._tick_seconds))
+        self._slots[expires_at % len(self._slots)][key] = (expires_at, token)
+        self._entries[key] = expires_at
+
+    def cancel(self, key: str) -> None:
+        expires_at = self._entries.pop(key, None)
+        if expires_at is not None:
+            self._slots[expires_at % len(self._slots)].pop(key, None)
+
+    def advance(self, ticks: int = 1) -> None:
+        for _ in range(ticks):
+            self._tick += 1
+            slot = self._slots[self._tick % len(self._slots)]
+            due = [(key, token) for key, (expires_at, token) in slot.items() if expires_at <= self._tick]
+            for key, token in due:
+                del slot[key]
+                del self._entries[key]
+                task = asyncio.create_task(self._expire(key, token))
+                self._callbacks.add(task)
+                task.add_done_callback(self._callbacks.discard)
+
+    async def _expire(self, key: str, token: int) -> None:
+        try:
+            await self._on_expire(key, token)
+        except Exception:
+            logger.exception("Turn timer callback for %s failed", key)
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._started_at = time.monotonic() - self._tick * self._tick_seconds
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        # Ticks are counted against the monotonic clock, so a slow iteration catches up
+        # instead of pushing every later deadline back.
+        while True:
+            next_tick_at = self._started_at + (self._tick + 1) * self._tick_seconds
+            await asyncio.sleep(max(0.0, next_tick_at - time.monotonic()))
+            due = int((time.monotonic() - self._started_at) / self._tick_seconds) - self._tick
+            self.advance(max(1, due))
+
+    async def stop(self) -> None:
+        tasks = [task for task in (self._task, *self._callbacks) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._slots = [{} for _ in self._slots]
+        self._entries.clear()
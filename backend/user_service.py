@@ -1,9 +1,10 @@
 import json
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Iterable, List, Optional
 from uuid import UUID, uuid4
 
 from pydantic import BaseModel, Field, ValidationError
+from redis.asyncio.client import Pipeline
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
@@ -85,11 +86,28 @@ async def get_user(user_id: str) -> Optional[User]:
     return User.model_validate(json.loads(raw))
 
 
-async def touch_user_on_join(user_id: str) -> Optional[User]:
-    user = await get_user(user_id)
-    if user is None:
-        return None
+async def get_users(user_ids: Iterable[str]) -> Dict[str, User]:
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    client = await get_redis()
+    raws = await client.mget([user_key(user_id) for user_id in user_ids])
+    return {
+        user_id: User.model_validate(json.loads(raw)) for user_id, raw in zip(user_ids, raws) if raw is not None
+    }
+
+
+def touch_user(pipeline: Pipeline, user: User) -> None:
+    # Queue the last_joined_at update on a pipeline that is writing the join anyway.
     user.last_joined_at = datetime.utcnow()
+    pipeline.set(user_key(str(user.id)), json.dumps(user.model_dump(mode="json")), ex=USER_TTL_SECONDS)
+
+
+async def touch_users_on_join(users: List[User]) -> None:
+    if not users:
+        return
     client = await get_redis()
-    await client.set(user_key(user_id), json.dumps(user.model_dump(mode="json")), ex=USER_TTL_SECONDS)
-    return user
+    pipeline = client.pipeline(transaction=False)
+    for user in users:
+        touch_user(pipeline, user)
+    await pipeline.execute()
@@ -1,15 +1,61 @@
+import asyncio
+import logging
+import os
+import time
 from dataclasses import dataclass
-from typing import Awaitable, Callable, Dict
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
 from uuid import UUID
 
+from starlette.requests import Request
+from starlette.responses import JSONResponse
 from starlette.websockets import WebSocket, WebSocketDisconnect
 
+from bot_service import BOT_MOVE_DELAY_SECONDS, build_turn_view, decide_move
+from card_mask import mask_to_cards
 from events import EventType
-from game_service import get_game_state, get_hand, maybe_start_next_game, pass_turn, play_turn, start_game
+from game_service import get_playing_states
+from room_actor import (
+    add_bot,
+    archive_finished_game,
+    get_game_state,
+    get_hand,
+    get_legal_plays,
+    get_players,
+    get_room,
+    maybe_start_next_game,
+    pass_turn,
+    play_turn,
+    remove_player,
+    set_player_ready,
+    set_player_status,
+    start_game,
+)
 from room_hub import RoomHub
-from room_service import get_players, get_room, remove_player, set_player_ready, set_player_status
+from schemas import BotLevel, GameState, Player
+from turn_timer import TimingWheel
+
+# A player who disconnects on their turn gets this long, not the full turn timeout.
+DISCONNECTED_TURN_TIMEOUT_SECONDS = float(os.getenv("DISCONNECTED_TURN_TIMEOUT_SECONDS", "5"))
+
+# Plays and passes go out as deltas rather than the full state and room: the state
+# fields, hand counts and scores that changed since the last turn event this instance
+# sent for the room, stamped with the state version. If that event was not the
+# previous version (another instance sent it, or this one restarted) the delta carries
+# every field. Clients apply a delta only on top of the version before it and answer
+# a gap with room:sync; game:start, game:end and room:sync still send full snapshots.
+# STATE_DELTAS_ENABLED=0 sends the full state and room on every turn, for clients from
+# before deltas.
+STATE_DELTAS_ENABLED = os.getenv("STATE_DELTAS_ENABLED", "1") != "0"
+
+logger = logging.getLogger(__name__)
 
 room_hub = RoomHub()
+turn_timers = TimingWheel(lambda code, move_count: _expire_turn(code, move_count))
+_bot_runners: Dict[str, asyncio.Task] = {}
+_bot_reruns: Set[str] = set()
+# Room code -> (state, {player id: hand count and score}) as of the last turn event,
+# for rooms with a socket on this instance.
+_turn_views: Dict[str, Tuple[dict, Dict[str, dict]]] = {}
 
 Handler = Callable[[WebSocket, dict, "ConnectionState"], Awaitable[None]]
 _EVENT_HANDLERS: Dict[str, Handler] = {}
@@ -55,8 +101,9 @@ async def _handle_room_join(websocket: WebSocket, payload: dict, state: Connecti
     )
     room_state = await get_game_state(code)
     if room_state is not None:
-        await websocket.send_json(
-            {"type": EventType.game_start.value, "payload": {"state": room_state.model_dump(mode="json")}}
+        await room_hub.send(
+            websocket,
+            {"type": EventType.game_start.value, "payload": {"state": room_state.model_dump(mode="json")}},
         )
         await _send_player_hand(websocket, code, state.current_player)
 
@@ -69,7 +116,10 @@ async def _handle_room_leave(websocket: WebSocket, payload: dict, state: Connect
         await _send_error(websocket, "Missing code or player_id")
         return
     updated_room = await remove_player(code, _parse_uuid(player_id))
-    await room_hub.disconnect(websocket, code, player_id)
+    await _disconnect(websocket, code, player_id)
+    if updated_room is None or not updated_room.players:
+        # The last player left and the room's game state went with them.
+        _turn_views.pop(code.upper(), None)
     state.current_room = None
     state.current_player = None
     await room_hub.broadcast(
@@ -97,16 +147,18 @@ async def _handle_room_sync(websocket: WebSocket, payload: dict, state: Connecti
     if player_id not in {str(p.id) for p in room.players}:
         await _send_error(websocket, "Player not in room")
         return
-    await websocket.send_json(
+    await room_hub.send(
+        websocket,
         {
             "type": EventType.room_update.value,
             "payload": {"room": room.model_dump(mode="json", exclude={"password_hash"})},
-        }
+        },
     )
     room_state = await get_game_state(code)
     if room_state is not None:
-        await websocket.send_json(
-            {"type": EventType.game_start.value, "payload": {"state": room_state.model_dump(mode="json")}}
+        await room_hub.send(
+            websocket,
+            {"type": EventType.game_start.value, "payload": {"state": room_state.model_dump(mode="json")}},
         )
         await _send_player_hand(websocket, code, _parse_uuid(player_id))
 
@@ -129,6 +181,36 @@ async def _handle_player_ready(websocket: WebSocket, payload: dict, state: Conne
     )
 
 
+@register_event(EventType.room_add_bot)
+async def _handle_room_add_bot(websocket: WebSocket, payload: dict, state: ConnectionState) -> None:
+    code = payload.get("code")
+    player_id = payload.get("player_id")
+    level = payload.get("level", BotLevel.normal.value)
+    if not code or not player_id:
+        await _send_error(websocket, "Missing code or player_id")
+        return
+    room = await get_room(code)
+    if room is None:
+        await _send_error(websocket, "Room not found")
+        return
+    if str(room.host_id) != player_id:
+        await _send_error(websocket, "Only host can add bots")
+        return
+    try:
+        bot_level = BotLevel(level)
+    except ValueError:
+        await _send_error(websocket, "Invalid bot level")
+        return
+    room = await add_bot(code, bot_level)
+    await room_hub.broadcast(
+        code,
+        {
+            "type": EventType.room_update.value,
+            "payload": {"room": room.model_dump(mode="json", exclude={"password_hash"})},
+        },
+    )
+
+
 @register_event(EventType.game_start)
 async def _handle_game_start(websocket: WebSocket, payload: dict, state: ConnectionState) -> None:
     code = payload.get("code")
@@ -155,12 +237,9 @@ async def _handle_game_start(websocket: WebSocket, payload: dict, state: Connect
         except (TypeError, ValueError):
             await _send_error(websocket, "Invalid max_games")
             return
-    room_state = await start_game(code, max_games_value)
-    await room_hub.broadcast(
-        code,
-        {"type": EventType.game_start.value, "payload": {"state": room_state.model_dump(mode="json")}},
-    )
-    await _broadcast_player_hands(code)
+    room_state = await start_game(code, max_games_value, existing_state.version if existing_state else 0)
+    await _broadcast_game_start(code, room_state)
+    _schedule_bots(code)
 
 
 @register_event(EventType.turn_play)
@@ -172,34 +251,99 @@ async def _handle_turn_play(websocket: WebSocket, payload: dict, state: Connecti
         await _send_error(websocket, "Missing code, player_id, or cards")
         return
     room_state = await play_turn(code, _parse_uuid(player_id), cards)
-    await room_hub.broadcast(
-        code,
-        {"type": EventType.turn_play.value, "payload": {"state": room_state.model_dump(mode="json")}},
-    )
-    updated_room = await get_room(code)
-    await room_hub.broadcast(
-        code,
+    await _broadcast_turn_play(code, room_state)
+    _schedule_bots(code)
+
+
+@register_event(EventType.turn_pass)
+async def _handle_turn_pass(websocket: WebSocket, payload: dict, state: ConnectionState) -> None:
+    code = payload.get("code")
+    player_id = payload.get("player_id")
+    if not code or not player_id:
+        await _send_error(websocket, "Missing code or player_id")
+        return
+    room_state = await pass_turn(code, _parse_uuid(player_id))
+    await _broadcast_turn_pass(code, room_state)
+    _schedule_bots(code)
+
+
+@register_event(EventType.turn_hint)
+async def _handle_turn_hint(websocket: WebSocket, payload: dict, state: ConnectionState) -> None:
+    code = payload.get("code")
+    player_id = payload.get("player_id")
+    if not code or not player_id:
+        await _send_error(websocket, "Missing code or player_id")
+        return
+    try:
+        plays, can_pass = await get_legal_plays(code, _parse_uuid(player_id))
+    except ValueError as exc:
+        # Only a query: answer it without ending the connection like a failed move does.
+        await _send_error(websocket, str(exc))
+        return
+    await room_hub.send(
+        websocket,
         {
-            "type": EventType.room_update.value,
+            "type": EventType.turn_hint.value,
             "payload": {
-                "room": updated_room.model_dump(mode="json", exclude={"password_hash"})
-                if updated_room
-                else None
+                "plays": [[card.model_dump(mode="json") for card in cards] for cards in plays],
+                "can_pass": can_pass,
             },
         },
     )
+
+
+async def _broadcast_game_start(code: str, room_state: GameState) -> None:
+    _schedule_turn_timer(code, room_state)
+    state = room_state.model_dump(mode="json")
+    await room_hub.broadcast(code, {"type": EventType.game_start.value, "payload": {"state": state}})
+    room = await get_room(code)
+    if room is None:
+        return
+    if STATE_DELTAS_ENABLED:
+        # Turns no longer carry the room, so the new status and hand counts go out here.
+        await room_hub.broadcast(
+            code,
+            {
+                "type": EventType.room_update.value,
+                "payload": {"room": room.model_dump(mode="json", exclude={"password_hash"})},
+            },
+        )
+        _remember_turn_view(code, state, _player_views(room.players))
+    await _broadcast_player_hands(code, room.players)
+
+
+async def _broadcast_turn_play(code: str, room_state: GameState) -> None:
+    _schedule_turn_timer(code, room_state)
+    if STATE_DELTAS_ENABLED:
+        payload = _turn_delta(code, room_state, await get_players(code))
+        await room_hub.broadcast(code, {"type": EventType.turn_play.value, "payload": payload})
+    else:
+        await room_hub.broadcast(
+            code,
+            {"type": EventType.turn_play.value, "payload": {"state": room_state.model_dump(mode="json")}},
+        )
+        updated_room = await get_room(code)
+        await room_hub.broadcast(
+            code,
+            {
+                "type": EventType.room_update.value,
+                "payload": {
+                    "room": updated_room.model_dump(mode="json", exclude={"password_hash"})
+                    if updated_room
+                    else None
+                },
+            },
+        )
     if room_state.status.value == "finished":
+        _turn_views.pop(code.upper(), None)
         await room_hub.broadcast(
             code,
             {"type": EventType.game_end.value, "payload": {"state": room_state.model_dump(mode="json")}},
         )
+        await archive_finished_game(code, room_state)
         next_state, series_reset = await maybe_start_next_game(code)
         if next_state:
-            await room_hub.broadcast(
-                code,
-                {"type": EventType.game_start.value, "payload": {"state": next_state.model_dump(mode="json")}},
-            )
-            await _broadcast_player_hands(code)
+            await _broadcast_game_start(code, next_state)
         elif series_reset:
             updated_room = await get_room(code)
             await room_hub.broadcast(
@@ -215,18 +359,146 @@ async def _handle_turn_play(websocket: WebSocket, payload: dict, state: Connecti
             )
 
 
-@register_event(EventType.turn_pass)
-async def _handle_turn_pass(websocket: WebSocket, payload: dict, state: ConnectionState) -> None:
-    code = payload.get("code")
-    player_id = payload.get("player_id")
-    if not code or not player_id:
-        await _send_error(websocket, "Missing code or player_id")
+async def _broadcast_turn_pass(code: str, room_state: GameState) -> None:
+    _schedule_turn_timer(code, room_state)
+    if STATE_DELTAS_ENABLED:
+        payload = _turn_delta(code, room_state)
+    else:
+        payload = {"state": room_state.model_dump(mode="json")}
+    await room_hub.broadcast(code, {"type": EventType.turn_pass.value, "payload": payload})
+
+
+def _player_views(players: List[Player]) -> Dict[str, dict]:
+    return {str(player.id): {"hand_count": player.hand_count, "score": player.score} for player in players}
+
+
+def _turn_delta(code: str, room_state: GameState, players: Optional[List[Player]] = None) -> dict:
+    # Players are passed only when the move can change them, i.e. for a play.
+    state = room_state.model_dump(mode="json")
+    known_state, known_players = _turn_views.get(code.upper(), ({}, {}))
+    if known_state.get("version") != room_state.version - 1:
+        known_state, known_players = {}, {}
+    payload: dict = {
+        "version": room_state.version,
+        "state": {
+            field: value
+            for field, value in state.items()
+            if field != "version" and (field not in known_state or known_state[field] != value)
+        },
+    }
+    if players is not None:
+        player_views = _player_views(players)
+        changed = {}
+        for player_id, view in player_views.items():
+            known = known_players.get(player_id, {})
+            fields = {field: value for field, value in view.items() if known.get(field) != value}
+            if fields:
+                changed[player_id] = fields
+        if changed:
+            payload["players"] = changed
+        known_players = player_views
+    _remember_turn_view(code, state, known_players)
+    return payload
+
+
+def _remember_turn_view(code: str, state: dict, players: Dict[str, dict]) -> None:
+    # Only rooms with a socket here: turns of rooms nobody here watches, e.g. played
+    # out by timers, would otherwise keep views alive.
+    if room_hub.has_sockets(code):
+        _turn_views[code.upper()] = (state, players)
+    else:
+        _turn_views.pop(code.upper(), None)
+
+
+def _schedule_turn_timer(code: str, room_state: GameState) -> None:
+    code = code.upper()
+    if room_state.turn_deadline is None or room_state.status.value != "playing":
+        turn_timers.cancel(code)
         return
-    room_state = await pass_turn(code, _parse_uuid(player_id))
-    await room_hub.broadcast(
-        code,
-        {"type": EventType.turn_pass.value, "payload": {"state": room_state.model_dump(mode="json")}},
-    )
+    turn_timers.schedule(code, room_state.turn_deadline.timestamp(), room_state.move_count)
+
+
+async def _expire_turn(code: str, move_count: int) -> None:
+    # The move count tells a deadline that still stands from one a move has already
+    # answered, here or in another process.
+    room_state = await get_game_state(code)
+    if room_state is None or room_state.status.value != "playing" or room_state.move_count != move_count:
+        return
+    player_id = room_state.current_turn
+    try:
+        if room_state.last_play is not None:
+            await _broadcast_turn_pass(code, await pass_turn(code, player_id))
+        else:
+            # Leading: play the lowest single, which is the 3 of spades when it is required.
+            lowest = (await get_hand(code, player_id))[0]
+            await _broadcast_turn_play(code, await play_turn(code, player_id, [lowest.model_dump(mode="json")]))
+    except ValueError as exc:
+        logger.info("Turn timeout in room %s skipped: %s", code, exc)
+        return
+    _schedule_bots(code)
+
+
+async def restore_turn_timers() -> None:
+    for code, room_state in await get_playing_states():
+        _schedule_turn_timer(code, room_state)
+
+
+async def _shorten_turn_of_disconnected(code: str, player_id: UUID) -> None:
+    room_state = await get_game_state(code)
+    if room_state is None or room_state.status.value != "playing" or room_state.current_turn != player_id:
+        return
+    deadline = time.time() + DISCONNECTED_TURN_TIMEOUT_SECONDS
+    if room_state.turn_deadline is None or deadline < room_state.turn_deadline.timestamp():
+        turn_timers.schedule(code.upper(), deadline, room_state.move_count)
+
+
+def _schedule_bots(code: str) -> None:
+    # One runner task per room plays consecutive bot turns; a request that arrives
+    # while it is busy makes it re-check the state before exiting.
+    code = code.upper()
+    runner = _bot_runners.get(code)
+    if runner is not None and not runner.done():
+        _bot_reruns.add(code)
+        return
+    _bot_runners[code] = asyncio.create_task(_run_bots(code))
+
+
+async def _run_bots(code: str) -> None:
+    try:
+        while True:
+            _bot_reruns.discard(code)
+            try:
+                await _play_bot_turns(code)
+            except ValueError as exc:
+                logger.warning("Bot turn in room %s stopped: %s", code, exc)
+            except Exception:
+                # Nobody awaits this task; log it and let the rerun check still happen.
+                logger.exception("Bot turn in room %s failed", code)
+            if code not in _bot_reruns:
+                break
+    finally:
+        _bot_runners.pop(code, None)
+
+
+async def _play_bot_turns(code: str) -> None:
+    while True:
+        room_state = await get_game_state(code)
+        if room_state is None or room_state.status.value != "playing":
+            return
+        players = await get_players(code)
+        bot = next((p for p in players if p.id == room_state.current_turn and p.is_bot), None)
+        if bot is None or not any(not p.is_bot and p.status == "active" for p in players):
+            return
+        if BOT_MOVE_DELAY_SECONDS > 0:
+            await asyncio.sleep(BOT_MOVE_DELAY_SECONDS)
+        hand = await get_hand(code, bot.id)
+        view = build_turn_view(room_state, players, bot.id, hand)
+        move = await decide_move(bot.bot_level or BotLevel.normal, view)
+        if move:
+            cards = [card.model_dump(mode="json") for card in mask_to_cards(move)]
+            await _broadcast_turn_play(code, await play_turn(code, bot.id, cards))
+        else:
+            await _broadcast_turn_pass(code, await pass_turn(code, bot.id))
 
 
 async def websocket_endpoint(websocket):
@@ -251,6 +523,7 @@ async def websocket_endpoint(websocket):
                     state.current_player,
                     "disconnected",
                 )
+                await _shorten_turn_of_disconnected(state.current_room, state.current_player)
                 if updated_room:
                     await room_hub.broadcast(
                         state.current_room,
@@ -261,7 +534,7 @@ async def websocket_endpoint(websocket):
                             },
                         },
                     )
-            await room_hub.disconnect(
+            await _disconnect(
                 websocket,
                 state.current_room,
                 str(state.current_player) if state.current_player else None,
@@ -269,11 +542,31 @@ async def websocket_endpoint(websocket):
     except Exception as exc:
         await _send_error(websocket, str(exc))
         if state.current_room:
-            await room_hub.disconnect(
+            await _disconnect(
                 websocket,
                 state.current_room,
                 str(state.current_player) if state.current_player else None,
             )
+            # The error is queued behind the socket's broadcasts; send it before closing.
+            await room_hub.flush(websocket)
+
+
+async def room_hub_metrics_handler(request: Request):
+    """
+    ---
+    summary: WebSocket outbox metrics of this instance
+    responses:
+      200:
+        description: OK
+    """
+    return JSONResponse({"room_hub": room_hub.snapshot()})
+
+
+async def _disconnect(websocket: WebSocket, code: str, player_id: str | None) -> None:
+    await room_hub.disconnect(websocket, code, player_id)
+    if not room_hub.has_sockets(code):
+        # No socket here watches the room; a later turn event just carries every field.
+        _turn_views.pop(code.upper(), None)
 
 
 def _parse_uuid(value: str) -> UUID:
@@ -281,7 +574,7 @@ def _parse_uuid(value: str) -> UUID:
 
 
 async def _send_error(websocket, message: str):
-    await websocket.send_json({"type": EventType.error.value, "payload": {"message": message}})
+    await room_hub.send(websocket, {"type": EventType.error.value, "payload": {"message": message}})
 
 
 async def _send_player_hand(websocket: WebSocket, code: str, player_id: UUID | None) -> None:
@@ -291,17 +584,19 @@ async def _send_player_hand(websocket: WebSocket, code: str, player_id: UUID | N
         cards = await get_hand(code, player_id)
     except ValueError:
         return
-    await websocket.send_json(
+    await room_hub.send(
+        websocket,
         {
             "type": EventType.hand_deal.value,
             "payload": {"cards": [card.model_dump(mode="json") for card in cards]},
-        }
+        },
     )
 
 
-async def _broadcast_player_hands(code: str) -> None:
-    players = await get_players(code)
+async def _broadcast_player_hands(code: str, players: List[Player]) -> None:
     for player in players:
+        if player.is_bot:
+            continue
         try:
             cards = await get_hand(code, player.id)
         except ValueError:
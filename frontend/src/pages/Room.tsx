@@ -16,6 +16,8 @@ type RoomPlayer = {
   hand_count: number
   score: number
   status: string
+  is_bot?: boolean
+  bot_level?: 'easy' | 'normal' | 'hard' | null
 }
 
 type RoomPayload = {
@@ -51,6 +53,14 @@ type GameStatePayload = {
   winner_id: string | null
   first_game: boolean
   first_turn_required: boolean
+  version: number
+}
+
+// A play or pass: the fields that changed on top of the state one version earlier.
+type TurnDelta = {
+  version: number
+  state: Partial<GameStatePayload>
+  players?: Record<string, Partial<Pick<RoomPlayer, 'hand_count' | 'score'>>>
 }
 
 const Room = () => {
@@ -58,6 +68,8 @@ const Room = () => {
   const navigate = useNavigate()
   const socketRef = useRef<WebSocket | null>(null)
   const dealTimersRef = useRef<number[]>([])
+  const stateVersionRef = useRef<number | null>(null)
+  const syncRequestedRef = useRef(false)
   const [menuOpen, setMenuOpen] = useState(false)
   const [room, setRoom] = useState<RoomPayload | null>(null)
   const [gameState, setGameState] = useState<GameStatePayload | null>(null)
@@ -169,6 +181,40 @@ const Room = () => {
       )
     })
 
+    const resetState = (state: GameStatePayload | null) => {
+      stateVersionRef.current = state?.version ?? null
+      syncRequestedRef.current = false
+      setGameState(state)
+    }
+
+    const applyTurn = (delta: TurnDelta) => {
+      const version = stateVersionRef.current
+      if (version !== null && delta.version <= version) {
+        return
+      }
+      if (version === null || delta.version !== version + 1) {
+        // Missed an update: ask for a full snapshot once, ignore deltas until it comes.
+        if (!syncRequestedRef.current) {
+          syncRequestedRef.current = true
+          sendRoomEvent('room:sync', { code: roomCode, player_id: playerId })
+        }
+        return
+      }
+      stateVersionRef.current = delta.version
+      setGameState((prev) => (prev ? { ...prev, ...delta.state, version: delta.version } : prev))
+      const changed = delta.players
+      if (changed) {
+        setRoom((prev) =>
+          prev
+            ? {
+                ...prev,
+                players: prev.players.map((player) => ({ ...player, ...changed[player.id] })),
+              }
+            : prev,
+        )
+      }
+    }
+
     socket.addEventListener('message', (event) => {
       try {
         const message = JSON.parse(event.data)
@@ -180,16 +226,25 @@ const Room = () => {
             }
             setRoom(message.payload.room)
             if (message.payload.room.status === 'waiting') {
-              setGameState(null)
+              resetState(null)
               setHand([])
             }
             break
           case 'game:start':
-          case 'turn:play':
-          case 'turn:pass':
           case 'game:end':
             if (message.payload?.state) {
-              setGameState(message.payload.state)
+              resetState(message.payload.state)
+            }
+            break
+          case 'turn:play':
+          case 'turn:pass':
+            if (message.payload?.version === undefined) {
+              // Full state, from a server that does not send deltas.
+              if (message.payload?.state) {
+                resetState(message.payload.state)
+              }
+            } else {
+              applyTurn(message.payload as TurnDelta)
             }
             break
           case 'hand:deal':
@@ -372,19 +427,34 @@ const Room = () => {
               </button>
 
               {isHost ? (
-                <button
-                  type="button"
-                  className="primary"
-                  onClick={() =>
-                    sendRoomEvent('game:start', {
-                      code: roomCode,
-                      player_id: playerId,
-                      max_games: maxGames,
-                    })
-                  }
-                >
-                  Start game
-                </button>
+                <>
+                  <button
+                    type="button"
+                    disabled={players.length >= (room?.max_players ?? 4)}
+                    onClick={() =>
+                      sendRoomEvent('room:add_bot', {
+                        code: roomCode,
+                        player_id: playerId,
+                        level: 'normal',
+                      })
+                    }
+                  >
+                    Add bot
+                  </button>
+                  <button
+                    type="button"
+                    className="primary"
+                    onClick={() =>
+                      sendRoomEvent('game:start', {
+                        code: roomCode,
+                        player_id: playerId,
+                        max_games: maxGames,
+                      })
+                    }
+                  >
+                    Start game
+                  </button>
+                </>
               ) : (
                 <button
                   type="button"